@@ -0,0 +1,179 @@
+# app/admission.py
+"""
+Control de admisión de /chat, en proceso y por worker.
+
+- Cubo de tokens por IP y por sessionId (429).
+- Cubo global de sesiones nuevas por segundo (429): un cliente que inventa
+  un sessionId por mensaje no llena el store de contextos.
+- Tope de turnos en curso (503): con el worker saturado se rechaza al
+  momento en lugar de encolar y subir la latencia de todos.
+
+La IP es la de `request.client`: detrás de Caddy hay que arrancar uvicorn con
+--proxy-headers para que sea la del cliente y no la del proxy.
+"""
+import math
+import time
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Iterator
+
+from app.config import settings
+from app.metrics import CHAT_REJECTIONS
+
+
+class Rejected(Exception):
+    def __init__(self, status_code: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status_code = status_code
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))   # segundos, para Retry-After
+
+
+class TokenBuckets:
+    """Cubos de tokens por clave; solo guarda las `max_keys` más recientes (LRU)."""
+
+    def __init__(self, rate: float, burst: int, max_keys: int, clock=time.monotonic):
+        self.rate = rate
+        self.burst = burst
+        self.max_keys = max_keys
+        self._clock = clock
+        # clave -> (tokens, instante de la última actualización)
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._buckets)
+
+    def take(self, key: str, cost: float = 1) -> float:
+        """Consume `cost` tokens. Devuelve 0 si había, o los segundos hasta que los haya."""
+        if self.rate <= 0:
+            return 0.0
+        now = self._clock()
+        cost = min(cost, self.burst)
+
+        item = self._buckets.get(key)
+        if item is None:
+            tokens = float(self.burst)
+            if len(self._buckets) >= self.max_keys:
+                self._buckets.popitem(last=False)
+        else:
+            tokens, last = item
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            self._buckets.move_to_end(key)
+
+        if tokens >= cost:
+            self._buckets[key] = (tokens - cost, now)
+            return 0.0
+        self._buckets[key] = (tokens, now)
+        return (cost - tokens) / self.rate
+
+
+class RecentKeys:
+    """Las `max_keys` claves vistas más recientemente (LRU), sin valores."""
+
+    def __init__(self, max_keys: int):
+        self.max_keys = max_keys
+        self._keys: OrderedDict[str, None] = OrderedDict()
+
+    def __contains__(self, key: str) -> bool:
+        return key in self._keys
+
+    def __len__(self) -> int:
+        return len(self._keys)
+
+    def touch(self, key: str) -> None:
+        if key in self._keys:
+            self._keys.move_to_end(key)
+            return
+        if len(self._keys) >= self.max_keys:
+            self._keys.popitem(last=False)
+        self._keys[key] = None
+
+
+class AdmissionControl:
+    def __init__(
+        self,
+        *,
+        session_rate: float,
+        session_burst: int,
+        ip_rate: float,
+        ip_burst: int,
+        new_session_rate: float,
+        new_session_burst: int,
+        max_inflight: int,
+        max_keys: int,
+        enabled: bool = True,
+    ):
+        self.enabled = enabled
+        self.max_inflight = max_inflight
+        self.inflight = 0
+        self._sessions = TokenBuckets(session_rate, session_burst, max_keys)
+        # sesiones ya vistas, aparte de los cubos: con la tasa por sesión
+        # desactivada no hay cubos y todo contaría como sesión nueva
+        self._known = RecentKeys(max_keys)
+        self._ips = TokenBuckets(ip_rate, ip_burst, max_keys)
+        self._new_sessions = TokenBuckets(new_session_rate, new_session_burst, 1)
+
+    def check(self, ip: str | None, session_ids: list[str]) -> None:
+        """
+        Lanza Rejected si la petición supera algún límite de tasa. Con un solo
+        sessionId se cobra a su cubo; en lotes solo cuentan las sesiones nuevas.
+        """
+        if not self.enabled:
+            return
+        if ip is not None:
+            self._reject_if(self._ips.take(ip), "ip")
+
+        # sesión nueva = no vista en este worker (o expulsada por LRU)
+        new = [sid for sid in set(session_ids) if sid not in self._known]
+        if new:
+            self._reject_if(self._new_sessions.take("", len(new)), "new_sessions")
+        for sid in session_ids:
+            self._known.touch(sid)
+
+        if len(session_ids) == 1:
+            self._reject_if(self._sessions.take(session_ids[0]), "session")
+
+    @contextmanager
+    def slot(self) -> Iterator[None]:
+        """Ocupa un hueco de turno en curso; 503 si no queda ninguno."""
+        if self.enabled and self.inflight >= self.max_inflight:
+            CHAT_REJECTIONS.inc("overloaded")
+            raise Rejected(503, "overloaded", 1)
+        self.inflight += 1
+        try:
+            yield
+        finally:
+            self.inflight -= 1
+
+    @contextmanager
+    def admit(self, ip: str | None, session_ids: list[str]) -> Iterator[None]:
+        self.check(ip, session_ids)
+        with self.slot():
+            yield
+
+    @staticmethod
+    def _reject_if(wait: float, reason: str) -> None:
+        if wait:
+            CHAT_REJECTIONS.inc(reason)
+            raise Rejected(429, reason, wait)
+
+    def stats(self) -> dict:
+        return {
+            "inflight": self.inflight,
+            "max_inflight": self.max_inflight,
+            "tracked_sessions": len(self._known),
+            "tracked_ips": len(self._ips),
+        }
+
+
+admission = AdmissionControl(
+    session_rate=settings.session_rate_per_sec,
+    session_burst=settings.session_rate_burst,
+    ip_rate=settings.ip_rate_per_sec,
+    ip_burst=settings.ip_rate_burst,
+    new_session_rate=settings.new_sessions_per_sec,
+    new_session_burst=settings.new_sessions_burst,
+    max_inflight=settings.chat_max_inflight,
+    max_keys=settings.admission_max_keys,
+    enabled=settings.admission_enabled,
+)
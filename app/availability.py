@@ -0,0 +1,73 @@
+# app/availability.py
+"""
+Calendario de disponibilidad a partir de `daily_availability`.
+
+La tabla tiene una fila por (día, franja) con las citas no canceladas y se
+mantiene de forma incremental (ver `repositories.appointments`), así que un
+rango de 60 días es una lectura por rango de la clave primaria. Encima hay
+una cache en proceso con ETag; las escrituras locales la invalidan y las de
+otros workers se ven al caducar (CACHE_TTL).
+"""
+import hashlib
+import json
+import time
+from collections import OrderedDict
+from datetime import date, timedelta
+
+from app.occupancy import SLOT_MINUTES, half_day_window
+
+HALF_DAYS = ("mañana", "tarde")
+CACHE_TTL = 30.0
+CACHE_MAX_ENTRIES = 256
+
+
+def capacity(half_day: str) -> int:
+    start, end = half_day_window(half_day)
+    return max(0, (end - start) // SLOT_MINUTES)
+
+
+def build_calendar(rows: list[tuple[date, str, int]], date_from: date, date_to: date) -> list[dict]:
+    booked = {(d, h): n for d, h, n in rows}
+    days = []
+    day = date_from
+    while day <= date_to:
+        entry: dict = {"date": day.isoformat()}
+        full = True
+        for h in HALF_DAYS:
+            cap = capacity(h)
+            n = booked.get((day, h), 0)
+            entry[h] = {"booked": n, "capacity": cap, "full": n >= cap}
+            full &= n >= cap
+        entry["full"] = full
+        days.append(entry)
+        day += timedelta(days=1)
+    return days
+
+
+class CalendarCache:
+    def __init__(self, ttl: float = CACHE_TTL, max_entries: int = CACHE_MAX_ENTRIES, clock=time.monotonic):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._clock = clock
+        self._items: OrderedDict[tuple[date, date], tuple[float, bytes, str]] = OrderedDict()
+
+    def get(self, key: tuple[date, date]) -> tuple[bytes, str] | None:
+        item = self._items.get(key)
+        if item is None or item[0] <= self._clock():
+            return None
+        return item[1], item[2]
+
+    def put(self, key: tuple[date, date], days: list[dict]) -> tuple[bytes, str]:
+        body = json.dumps({"days": days}, ensure_ascii=False).encode()
+        etag = '"' + hashlib.sha1(body).hexdigest() + '"'
+        self._items[key] = (self._clock() + self.ttl, body, etag)
+        self._items.move_to_end(key)
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+        return body, etag
+
+    def clear(self) -> None:
+        self._items.clear()
+
+
+calendar_cache = CalendarCache()
@@ -0,0 +1,310 @@
+# app/chat_service.py
+"""
+Orquesta un turno de chat: carga el contexto, aplica el motor y persiste.
+Lo usan los endpoints; el motor (`app.engine`) no sabe nada de HTTP ni de BD.
+"""
+import asyncio
+import logging
+import time
+from collections import defaultdict
+from datetime import date
+
+from fastapi.concurrency import run_in_threadpool
+
+from app.context import ChatContext
+from app.context_store import StaleContext, store
+from app import replies
+from app.engine import RESOLVABLE, Reply, step
+from app.eventlog import event_log
+from app.llm.fallback import get_fallback
+from app.metrics import CHAT_LATENCY, CHAT_REPROMPTS, CHAT_TRANSITIONS, DB_WRITE_LATENCY
+from app.normalizers.date import normalize_utterance as parse_utterance   # sin métricas: el motor repite la llamada
+from app.occupancy import occupancy
+from app.session_locks import session_locks
+from app.state import ChatState
+from app.validators import normalize_date, normalize_time
+from app.writebehind import writer
+
+log = logging.getLogger(__name__)
+
+# estados que consultan la ocupación del día elegido
+_NEEDS_OCCUPANCY = frozenset((ChatState.ASK_TIME, ChatState.ASK_TIME_EDIT, ChatState.CONFIRMATION))
+
+# reintentos de un turno cuando otro worker ha guardado la sesión entremedias
+STALE_RETRIES = 3
+
+
+async def load_context(session_id: str) -> ChatContext:
+    # el store compartido hace I/O síncrono: fuera del event loop
+    if store.blocking:
+        return await run_in_threadpool(store.get, session_id)
+    return store.get(session_id)
+
+
+async def session_exists(session_id: str) -> bool:
+    if store.blocking:
+        return await run_in_threadpool(store.exists, session_id)
+    return store.exists(session_id)
+
+
+async def store_context(session_id: str, ctx: ChatContext) -> None:
+    # con un store compartido el contexto es una copia: hay que persistirlo
+    if store.blocking:
+        await run_in_threadpool(store.save, session_id, ctx)
+    else:
+        store.save(session_id, ctx)
+
+
+def _occupancy_day(ctx: ChatContext, text: str, resolved: str | None) -> int | None:
+    """Día cuya ocupación se consulta en este turno (ordinal), si alguno."""
+    if ctx.state is ChatState.ASK_DATE:
+        # "el viernes a las 10": la hora se comprueba en el mismo turno que la fecha
+        parsed = parse_utterance(text)
+        iso_date = resolved or parsed.date
+        return date.fromisoformat(iso_date).toordinal() if iso_date and parsed.time else None
+    if ctx.state in _NEEDS_OCCUPANCY:
+        return ctx.date_ordinal
+    return None
+
+
+async def ensure_occupancy(ctx: ChatContext, text: str, resolved: str | None = None) -> None:
+    ordinal = _occupancy_day(ctx, text, resolved)
+    if ordinal is None or not occupancy.needs_load(ordinal):
+        return
+    # BD y repositorio en el primer uso: la mayoría de turnos no los tocan
+    from app.database import AsyncSessionLocal
+    from app.repositories.appointments import booked_minutes
+
+    occupancy.begin_load(ordinal)
+    try:
+        async with AsyncSessionLocal() as db:
+            minutes = await booked_minutes(db, date.fromordinal(ordinal))
+    except Exception:
+        occupancy.cancel_load(ordinal)
+        # sin índice no se bloquea la reserva: el personal lo revisa después
+        log.exception("No se pudo cargar la ocupación del %s", date.fromordinal(ordinal))
+        return
+    occupancy.load(ordinal, minutes)
+
+
+async def resolve_with_llm(ctx: ChatContext, text: str) -> str | None:
+    """Valor del fallback LLM si el estado pide fecha/hora y las reglas no la entienden."""
+    kind = RESOLVABLE.get(ctx.state)
+    if kind is None:
+        return None
+    fallback = get_fallback()
+    if fallback is None:
+        return None
+
+    if kind == "date":
+        if normalize_date(text) is not None:
+            return None
+        return await fallback.resolve_date(text)
+    if normalize_time(text) is not None:
+        return None
+    return await fallback.resolve_time(text)
+
+
+def _release(row: dict) -> None:
+    occupancy.release(row["date"].toordinal(), row["time"].hour * 60 + row["time"].minute)
+
+
+def _event(
+    session_id: str, before: ChatState, ctx: ChatContext, text: str,
+    resolved: str | None, reply: Reply, elapsed: float,
+) -> tuple:
+    """Evento del turno para el registro (orden de eventlog.EVENT_FIELDS)."""
+    value = None
+    kind = RESOLVABLE.get(before)
+    if kind is not None and not reply.reprompt:
+        value = ctx.date_iso if kind == "date" else ctx.time_24h
+    return (
+        time.time(), session_id, before.value, ctx.state.value, text,
+        value, resolved is not None, reply.reprompt, reply.confirmed, round(elapsed * 1000, 3),
+    )
+
+
+def _step(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    before = ctx.state
+    reply = step(ctx, text, resolved)
+    if reply.reprompt:
+        CHAT_REPROMPTS.inc(before.value, reply.reprompt)
+    elif ctx.state is not before:
+        CHAT_TRANSITIONS.inc(before.value, ctx.state.value)
+    return reply
+
+
+async def persist_appointments(rows: list[dict]) -> list[dict]:
+    """
+    Guarda las citas. Devuelve las que NO se han guardado porque su clave de
+    idempotencia ya es de otra cita (un reintento de la misma cuenta como guardada).
+    """
+    # con la cola activa, el INSERT lo hace el writer en segundo plano
+    if writer.running:
+        for row in rows:
+            await writer.submit(row)
+        return []
+    from app.database import AsyncSessionLocal
+    from app.repositories.appointments import conflicting_rows, insert_appointments
+
+    with DB_WRITE_LATENCY.time("direct"):
+        async with AsyncSessionLocal() as db:
+            if await insert_appointments(db, rows) == len(rows):
+                return []
+            return await conflicting_rows(db, rows)
+
+
+def _unconfirm(session_id: str, ctx: ChatContext, row: dict, *, conflict: bool) -> None:
+    """La cita no ha quedado guardada: se libera la hora y se vuelve a pedir el "sí"."""
+    from app.repositories.appointments import idempotency_key
+
+    _release(row)
+    if row["idempotency_key"] != idempotency_key(session_id, ctx):
+        return   # en el lote la sesión ya empezó otra conversación
+    ctx.state = ChatState.CONFIRMATION
+    if conflict:
+        # la clave es de otra cita: el siguiente "sí" usa una nueva
+        log.error("Clave de idempotencia %s ya usada por otra cita", row["idempotency_key"])
+        ctx.new_conversation()
+
+
+async def _turn(session_id: str, text: str) -> Reply:
+    t0 = time.perf_counter()
+    ctx = await load_context(session_id)
+    state = ctx.state
+    row = None
+    try:
+        resolved = await resolve_with_llm(ctx, text)
+        await ensure_occupancy(ctx, text, resolved)
+        reply = _step(ctx, text, resolved)
+        if reply.confirmed:
+            from app.repositories.appointments import appointment_row
+
+            # la clave sale de la conversación: repetir el turno no duplica la cita
+            row = appointment_row(ctx, session_id)
+            try:
+                rejected = await persist_appointments([row])   # ✅ guardar SOLO aquí
+            except Exception:
+                _unconfirm(session_id, ctx, row, conflict=False)
+                raise
+            if rejected:
+                _unconfirm(session_id, ctx, row, conflict=True)
+                reply = Reply(replies.SAVE_FAILED)
+    finally:
+        elapsed = time.perf_counter() - t0
+        CHAT_LATENCY.observe(elapsed, state.value)
+        # compare-and-swap en el store compartido: puede lanzar StaleContext
+        try:
+            await store_context(session_id, ctx)
+        except StaleContext:
+            if row is not None:
+                _release(row)   # la marca es de este intento; el reintento la vuelve a poner
+            raise
+
+    # solo los turnos que han quedado guardados (no los que se repiten)
+    event_log.record(_event(session_id, state, ctx, text, resolved, reply, elapsed))
+    return reply
+
+
+async def _turn_retrying(session_id: str, text: str) -> Reply:
+    for _ in range(STALE_RETRIES):
+        try:
+            return await _turn(session_id, text)
+        except StaleContext:
+            # otro worker avanzó la sesión: se repite sobre su versión
+            log.info("Contexto desactualizado en la sesión %s; se repite el turno", session_id)
+    return await _turn(session_id, text)
+
+
+async def handle_message(session_id: str, text: str) -> Reply:
+    async with session_locks.hold(session_id):
+        return await _turn_retrying(session_id, text)
+
+
+# =========================
+# LOTES (pasarelas)
+# =========================
+async def handle_batch(messages: list[tuple[str, str]]) -> list[Reply]:
+    """
+    Procesa (session_id, texto) en orden dentro de cada sesión y con sesiones
+    distintas en paralelo. Las citas confirmadas se insertan juntas al final
+    (una transacción, o un lote de la cola write-behind).
+    Devuelve las respuestas en el orden de entrada. Si una sesión falla, las
+    demás terminan, no se guarda ninguna cita del lote y se relanza el error.
+    """
+    by_session: dict[str, list[int]] = defaultdict(list)
+    for i, (sid, _) in enumerate(messages):
+        by_session[sid].append(i)
+
+    async with session_locks.hold(*by_session):
+        return await _batch_locked(messages, by_session)
+
+
+async def _batch_locked(messages: list[tuple[str, str]], by_session: dict[str, list[int]]) -> list[Reply]:
+    out: list[Reply | None] = [None] * len(messages)
+    contexts: dict[str, ChatContext] = {}
+    confirmed: list[tuple[str, int, dict]] = []
+    events: dict[str, list[tuple]] = defaultdict(list)
+
+    async def run_session(sid: str, indexes: list[int]) -> None:
+        ctx = await load_context(sid)
+        contexts[sid] = ctx
+        for i in indexes:
+            t0 = time.perf_counter()
+            state = ctx.state
+            resolved = await resolve_with_llm(ctx, messages[i][1])
+            await ensure_occupancy(ctx, messages[i][1], resolved)
+            reply = _step(ctx, messages[i][1], resolved)
+            elapsed = time.perf_counter() - t0
+            CHAT_LATENCY.observe(elapsed, state.value)
+            events[sid].append(_event(sid, state, ctx, messages[i][1], resolved, reply, elapsed))
+            if reply.confirmed:
+                from app.repositories.appointments import appointment_row
+
+                # foto de la cita ahora: el contexto puede seguir cambiando en el lote
+                confirmed.append((sid, i, appointment_row(ctx, sid)))
+            out[i] = reply
+
+    # sin cancelar a las hermanas a mitad de turno: sus marcas se deshacen abajo
+    done = await asyncio.gather(*(run_session(sid, idx) for sid, idx in by_session.items()), return_exceptions=True)
+    failure = next((r for r in done if isinstance(r, Exception)), None)
+
+    try:
+        if failure is not None:
+            # como en _turn: la hora se libera y la sesión vuelve a pedir el "sí"
+            for sid, i, row in confirmed:
+                _unconfirm(sid, contexts[sid], row, conflict=False)
+        elif confirmed:
+            rejected = {id(row) for row in await persist_appointments([row for _, _, row in confirmed])}
+            for sid, i, row in confirmed:
+                if id(row) in rejected:
+                    _unconfirm(sid, contexts[sid], row, conflict=True)
+                    out[i] = Reply(replies.SAVE_FAILED)
+    except Exception:
+        for sid, i, row in confirmed:
+            _unconfirm(sid, contexts[sid], row, conflict=False)
+            out[i] = Reply(replies.SAVE_FAILED)
+    finally:
+        results = await asyncio.gather(
+            *(store_context(sid, ctx) for sid, ctx in contexts.items()),
+            return_exceptions=True,
+        )
+    if failure is not None:
+        raise failure
+
+    for sid, result in zip(contexts, results):
+        if isinstance(result, StaleContext):
+            # otro worker tocó la sesión durante el lote: sus mensajes se repiten
+            # uno a uno sobre la versión nueva (las citas ya guardadas no se duplican)
+            for row_sid, _, row in confirmed:
+                if row_sid == sid:
+                    _release(row)
+            for i in by_session[sid]:
+                out[i] = await _turn_retrying(sid, messages[i][1])
+        elif isinstance(result, Exception):
+            raise result
+        else:
+            for event in events[sid]:
+                event_log.record(event)
+
+    return out
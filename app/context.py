@@ -1,8 +1,43 @@
+import os
+import struct
+from datetime import date
+
 from app.state import ChatState
 
+_STATES = tuple(ChatState)
+_STATE_INDEX = {s: i for i, s in enumerate(_STATES)}
+
+_HALF_DAYS = (None, "mañana", "tarde")
+_HALF_DAY_INDEX = {h: i for i, h in enumerate(_HALF_DAYS)}
+
+# version, estado, franja, ordinal de fecha (0 = sin fecha), minutos (0xFFFF = sin hora),
+# id de la conversación (16 bytes)
+_HEADER = struct.Struct("<BBBIH16s")
+_LEN = struct.Struct("<H")
+_NONE_LEN = 0xFFFF
+MAX_TEXT_BYTES = _NONE_LEN - 1   # por campo de texto, en UTF-8
+_VERSION = 3
+
+_TEXT_FIELDS = ("name", "phone", "reason", "date_text", "time_text")
+
+
 class ChatContext:
-    def __init__(self):
-        self.state = ChatState.START
+    """
+    Contexto de una conversación, compacto: sin __dict__, estado y franja como
+    índices pequeños, fecha como ordinal y hora como minutos desde medianoche.
+    """
+
+    __slots__ = (
+        "_state", "_half_day",
+        "name", "phone", "reason",
+        "date_text", "time_text",
+        "date_ordinal", "time_minutes",
+        "conversation", "version",
+    )
+
+    def __init__(self, conversation: bytes | None = None):
+        self._state = 0   # ChatState.START
+        self._half_day = 0
 
         self.name: str | None = None
         self.phone: str | None = None
@@ -11,8 +46,109 @@ class ChatContext:
         # Texto del usuario
         self.date_text: str | None = None
         self.time_text: str | None = None
-        self.half_day: str | None = None   # "mañana" | "tarde"
 
         # Normalizado
-        self.date_iso: str | None = None   # YYYY-MM-DD
-        self.time_24h: str | None = None   # HH:MM
+        self.date_ordinal: int | None = None   # date.toordinal()
+        self.time_minutes: int | None = None   # minutos desde 00:00
+
+        # id aleatorio de esta conversación: clave de idempotencia de su cita.
+        # Si el contexto se pierde (TTL, reinicio) la siguiente tiene otro id.
+        self.conversation = conversation or os.urandom(16)
+        # versión en el store compartido (compare-and-swap); no se serializa
+        self.version = 0
+
+    def new_conversation(self) -> None:
+        self.conversation = os.urandom(16)
+
+    def reset(self) -> None:
+        # nueva conversación en la misma sesión: id nuevo, se conserva la versión
+        version = self.version
+        self.__init__()
+        self.version = version
+
+    # ---------- vistas ----------
+    @property
+    def state(self) -> ChatState:
+        return _STATES[self._state]
+
+    @state.setter
+    def state(self, value: ChatState) -> None:
+        self._state = _STATE_INDEX[value]
+
+    @property
+    def half_day(self) -> str | None:   # "mañana" | "tarde"
+        return _HALF_DAYS[self._half_day]
+
+    @half_day.setter
+    def half_day(self, value: str | None) -> None:
+        self._half_day = _HALF_DAY_INDEX[value]
+
+    @property
+    def date_iso(self) -> str | None:   # YYYY-MM-DD
+        if self.date_ordinal is None:
+            return None
+        return date.fromordinal(self.date_ordinal).isoformat()
+
+    @date_iso.setter
+    def date_iso(self, value: str | None) -> None:
+        self.date_ordinal = date.fromisoformat(value).toordinal() if value else None
+
+    @property
+    def time_24h(self) -> str | None:   # HH:MM
+        if self.time_minutes is None:
+            return None
+        return f"{self.time_minutes // 60:02d}:{self.time_minutes % 60:02d}"
+
+    @time_24h.setter
+    def time_24h(self, value: str | None) -> None:
+        if not value:
+            self.time_minutes = None
+            return
+        h, m = value.split(":")
+        self.time_minutes = int(h) * 60 + int(m)
+
+    # ---------- serialización binaria (stores compartidos) ----------
+    def to_bytes(self) -> bytes:
+        parts = [_HEADER.pack(
+            _VERSION,
+            self._state,
+            self._half_day,
+            self.date_ordinal or 0,
+            _NONE_LEN if self.time_minutes is None else self.time_minutes,
+            self.conversation,
+        )]
+        for f in _TEXT_FIELDS:
+            value = getattr(self, f)
+            if value is None:
+                parts.append(_LEN.pack(_NONE_LEN))
+            else:
+                encoded = value.encode()
+                if len(encoded) > MAX_TEXT_BYTES:
+                    # sin partir un carácter de varios bytes por la mitad
+                    encoded = encoded[:MAX_TEXT_BYTES].decode(errors="ignore").encode()
+                parts.append(_LEN.pack(len(encoded)))
+                parts.append(encoded)
+        return b"".join(parts)
+
+    @classmethod
+    def from_bytes(cls, data: bytes) -> "ChatContext":
+        """Lanza ValueError si `data` no es de este formato (p. ej. de otra versión)."""
+        if not data or data[0] != _VERSION:
+            raise ValueError(f"Versión de contexto no soportada: {data[:1].hex() or 'vacío'}")
+        _, state, half_day, ordinal, minutes, conversation = _HEADER.unpack_from(data)
+
+        ctx = cls(conversation)
+        ctx._state = state
+        ctx._half_day = half_day
+        ctx.date_ordinal = ordinal or None
+        ctx.time_minutes = None if minutes == _NONE_LEN else minutes
+
+        offset = _HEADER.size
+        for f in _TEXT_FIELDS:
+            (length,) = _LEN.unpack_from(data, offset)
+            offset += _LEN.size
+            if length == _NONE_LEN:
+                continue
+            setattr(ctx, f, data[offset:offset + length].decode())
+            offset += length
+        return ctx
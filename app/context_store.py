@@ -1,8 +1,266 @@
+# app/context_store.py
+import threading
+import time
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+
+from app.config import settings
 from app.context import ChatContext
 
-_CONTEXTS: dict[str, ChatContext] = {}
+
+class StaleContext(RuntimeError):
+    """Otro worker guardó la sesión después de leerla: hay que repetir el turno."""
+
+
+class ContextStore(ABC):
+    """
+    Almacén de contextos de conversación por sessionId.
+    `blocking` indica si las operaciones hacen I/O (hay que sacarlas del event loop).
+    """
+
+    blocking = False
+
+    def __init__(self):
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0     # expulsadas por tamaño (LRU)
+        self.expirations = 0   # expulsadas por TTL
+
+    @abstractmethod
+    def get(self, session_id: str) -> ChatContext:
+        """Devuelve el contexto de la sesión, creando uno nuevo si no existe."""
+
+    @abstractmethod
+    def save(self, session_id: str, ctx: ChatContext) -> None:
+        """Guarda el contexto; lanza StaleContext si cambió desde que se leyó."""
+
+    @abstractmethod
+    def exists(self, session_id: str) -> bool:
+        """¿Hay una sesión viva con ese id? Sin crearla ni contar hit/miss."""
+
+    @abstractmethod
+    def delete(self, session_id: str) -> None:
+        ...
+
+    @abstractmethod
+    def size(self) -> int:
+        ...
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "size": self.size(),
+        }
+
+
+# =========================
+# EN MEMORIA (LRU + TTL)
+# =========================
+class MemoryContextStore(ContextStore):
+    def __init__(self, max_entries: int, ttl_seconds: int, clock=time.monotonic):
+        super().__init__()
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._lock = threading.Lock()
+        # session_id -> (ctx, expires_at); el orden es el de uso (LRU al principio)
+        self._items: OrderedDict[str, tuple[ChatContext, float]] = OrderedDict()
+
+    def get(self, session_id: str) -> ChatContext:
+        now = self._clock()
+        with self._lock:
+            item = self._items.get(session_id)
+            if item is not None:
+                ctx, expires_at = item
+                if expires_at > now:
+                    self.hits += 1
+                    self._items[session_id] = (ctx, now + self.ttl_seconds)
+                    self._items.move_to_end(session_id)
+                    return ctx
+                del self._items[session_id]
+                self.expirations += 1
+
+            self.misses += 1
+            ctx = ChatContext()
+            self._put(session_id, ctx, now)
+            return ctx
+
+    def save(self, session_id: str, ctx: ChatContext) -> None:
+        with self._lock:
+            self._put(session_id, ctx, self._clock())
+
+    def exists(self, session_id: str) -> bool:
+        item = self._items.get(session_id)
+        return item is not None and item[1] > self._clock()
+
+    def delete(self, session_id: str) -> None:
+        with self._lock:
+            self._items.pop(session_id, None)
+
+    def size(self) -> int:
+        return len(self._items)
+
+    def _put(self, session_id: str, ctx: ChatContext, now: float) -> None:
+        self._items[session_id] = (ctx, now + self.ttl_seconds)
+        self._items.move_to_end(session_id)
+
+        # primero caducadas (las más antiguas están al principio), luego LRU
+        while self._items:
+            oldest_id, (_, expires_at) = next(iter(self._items.items()))
+            if expires_at > now:
+                break
+            del self._items[oldest_id]
+            self.expirations += 1
+
+        while len(self._items) > self.max_entries:
+            self._items.popitem(last=False)
+            self.evictions += 1
+
+
+# =========================
+# COMPARTIDO (tabla SQL)
+# =========================
+class SQLContextStore(ContextStore):
+    """
+    Contextos en una tabla `chat_sessions` compartida entre workers.
+    Sirve con Postgres en producción y con SQLite en local.
+
+    Cada fila lleva una versión: `save` solo escribe si sigue siendo la que
+    se leyó (compare-and-swap), así dos workers no se pisan la sesión.
+    """
+
+    blocking = True
+    PURGE_EVERY = 1000   # saves entre limpiezas de sesiones caducadas
+
+    def __init__(self, url: str, ttl_seconds: int, clock=time.time):
+        super().__init__()
+        self.url = url
+        self.ttl_seconds = ttl_seconds
+        self._clock = clock
+        self._saves = 0
+        self._engine = None
+        self._table = None
+        self._engine_lock = threading.Lock()
+
+    def _get_engine(self):
+        # engine y comprobación de esquema en el primer uso, no al importar
+        if self._engine is None:
+            with self._engine_lock:
+                if self._engine is None:
+                    from sqlalchemy import create_engine
+
+                    from app.schema import SESSION_MIGRATIONS, chat_sessions, ensure_schema, session_schema_version
+
+                    engine = create_engine(self.url, pool_pre_ping=True)
+                    ensure_schema(engine, SESSION_MIGRATIONS, session_schema_version)
+                    self._table = chat_sessions
+                    self._engine = engine
+        return self._engine
+
+    def get(self, session_id: str) -> ChatContext:
+        from sqlalchemy import select
+
+        engine = self._get_engine()
+        t = self._table
+        with engine.connect() as conn:
+            row = conn.execute(
+                select(t.c.data, t.c.expires_at, t.c.version).where(t.c.session_id == session_id)
+            ).first()
+
+        if row is not None and row.expires_at > self._clock():
+            try:
+                ctx = ChatContext.from_bytes(row.data)
+            except ValueError:
+                pass   # de un formato anterior: se trata como caducada
+            else:
+                self.hits += 1
+                ctx.version = row.version
+                return ctx
+
+        ctx = ChatContext()
+        if row is not None:
+            # caducada: contexto nuevo, pero el CAS se hace contra la fila que sigue ahí
+            self.expirations += 1
+            ctx.version = row.version
+        self.misses += 1
+        return ctx
+
+    def save(self, session_id: str, ctx: ChatContext) -> None:
+        from sqlalchemy import insert, update
+        from sqlalchemy.exc import IntegrityError
+
+        engine = self._get_engine()
+        t = self._table
+        values = {
+            "data": ctx.to_bytes(),
+            "expires_at": self._clock() + self.ttl_seconds,
+        }
+        with engine.begin() as conn:
+            if ctx.version:
+                result = conn.execute(
+                    update(t)
+                    .where(t.c.session_id == session_id, t.c.version == ctx.version)
+                    .values(version=ctx.version + 1, **values)
+                )
+                if result.rowcount == 0:
+                    raise StaleContext(session_id)
+            else:
+                try:
+                    conn.execute(insert(t).values(session_id=session_id, version=1, **values))
+                except IntegrityError:
+                    # otro worker la ha creado a la vez
+                    raise StaleContext(session_id) from None
+        ctx.version += 1
+
+        self._saves += 1
+        if self._saves % self.PURGE_EVERY == 0:
+            self.purge_expired()
+
+    def exists(self, session_id: str) -> bool:
+        from sqlalchemy import select
+
+        engine = self._get_engine()
+        t = self._table
+        with engine.connect() as conn:
+            expires_at = conn.execute(select(t.c.expires_at).where(t.c.session_id == session_id)).scalar()
+        return expires_at is not None and expires_at > self._clock()
+
+    def delete(self, session_id: str) -> None:
+        from sqlalchemy import delete
+
+        with self._get_engine().begin() as conn:
+            conn.execute(delete(self._table).where(self._table.c.session_id == session_id))
+
+    def size(self) -> int:
+        from sqlalchemy import func, select
+
+        with self._get_engine().connect() as conn:
+            return conn.execute(select(func.count()).select_from(self._table)).scalar_one()
+
+    def purge_expired(self) -> int:
+        from sqlalchemy import delete
+
+        with self._get_engine().begin() as conn:
+            result = conn.execute(delete(self._table).where(self._table.c.expires_at <= self._clock()))
+        self.expirations += result.rowcount
+        return result.rowcount
+
+
+def build_store() -> ContextStore:
+    if settings.session_backend == "sql":
+        return SQLContextStore(settings.session_store_url, settings.session_ttl_seconds)
+    return MemoryContextStore(settings.session_max_entries, settings.session_ttl_seconds)
+
+
+store: ContextStore = build_store()
+
 
 def get_context(session_id: str) -> ChatContext:
-    if session_id not in _CONTEXTS:
-        _CONTEXTS[session_id] = ChatContext(session_id=session_id)
-    return _CONTEXTS[session_id]
+    return store.get(session_id)
+
+
+def save_context(session_id: str, ctx: ChatContext) -> None:
+    store.save(session_id, ctx)
@@ -1,6 +1,12 @@
 # create_tables.py
-from app.database import engine
-from app.models import Base
+# Migración fuera de banda: python -m app.create_tables
+from app.config import settings
+from app.database import make_engine, DATABASE_URL
+from app.schema import SESSION_MIGRATIONS, migrate, session_schema_version
 
-Base.metadata.create_all(bind=engine)
-print("✅ Tablas creadas")
+version = migrate(make_engine(DATABASE_URL))
+print(f"✅ Esquema en la versión {version}")
+
+if settings.session_backend == "sql":
+    version = migrate(make_engine(settings.session_store_url), SESSION_MIGRATIONS, session_schema_version)
+    print(f"✅ Sesiones de chat en la versión {version}")
@@ -0,0 +1,322 @@
+# app/engine.py
+"""
+Motor de conversación independiente de FastAPI y de la BD.
+
+`step(ctx, text)` aplica un mensaje al contexto y devuelve la respuesta.
+Cada estado tiene su handler en `HANDLERS`; el despacho es un acceso a dict.
+Persistir la cita es cosa de quien llama (Reply.confirmed).
+"""
+from dataclasses import dataclass
+from typing import Callable
+
+from app import replies
+from app.config import settings
+from app.context import ChatContext
+from app.normalizers.fuzzy import Vocabulary
+from app.occupancy import format_minutes, occupancy
+from app.state import ChatState
+from app.validators import (
+    is_valid_name,
+    is_valid_phone,
+    is_valid_reason,
+    normalize_date,
+    normalize_time,
+    normalize_utterance,
+)
+
+AFTERNOON_FROM_HOUR = 14
+
+YES = frozenset(("sí", "si", "s"))
+NO = frozenset(("no", "n"))
+
+# respuestas de opción fija, tolerantes a erratas, mayúsculas y signos ("Sí.", "mñana", "tarde!")
+ANSWERS = Vocabulary({**dict.fromkeys(YES, True), **dict.fromkeys(NO, False)})
+HALF_DAYS = Vocabulary({"mañana": "mañana", "tarde": "tarde"})
+
+
+@dataclass(slots=True)
+class Reply:
+    text: str
+    confirmed: bool = False   # la cita del contexto debe guardarse
+    reprompt: str | None = None   # motivo, si se vuelve a pedir el mismo dato
+
+
+Handler = Callable[[ChatContext, str], Reply]
+
+
+def _minutes(t24: str) -> int:
+    h, m = t24.split(":")
+    return int(h) * 60 + int(m)
+
+
+# =========================
+# START / DATOS PERSONALES
+# =========================
+def _start(ctx: ChatContext, text: str) -> Reply:
+    ctx.state = ChatState.ASK_NAME
+    return Reply(replies.GREETING)
+
+
+def _ask_name(ctx: ChatContext, text: str) -> Reply:
+    if not is_valid_name(text):
+        return Reply(replies.ASK_NAME_AGAIN, reprompt="short_name")
+
+    ctx.name = text
+    ctx.state = ChatState.ASK_PHONE
+    return Reply(replies.greet_name(ctx.name))
+
+
+def _ask_phone(ctx: ChatContext, text: str) -> Reply:
+    if not is_valid_phone(text):
+        return Reply(replies.INVALID_PHONE, reprompt="invalid_phone")
+
+    ctx.phone = text
+    ctx.state = ChatState.ASK_REASON
+    return Reply(replies.ASK_REASON)
+
+
+def _ask_reason(ctx: ChatContext, text: str) -> Reply:
+    if not is_valid_reason(text):
+        return Reply(replies.ASK_REASON_AGAIN, reprompt="short_reason")
+
+    ctx.reason = text
+    ctx.state = ChatState.ASK_DATE
+    return Reply(replies.ASK_DATE)
+
+
+# =========================
+# FECHA / FRANJA / HORA
+# =========================
+def _ask_date(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    parsed = normalize_utterance(text)
+    iso_date = resolved or parsed.date
+    if not iso_date:
+        return Reply(replies.INVALID_DATE, reprompt="invalid_date")
+
+    ctx.date_text = text     # lo que dijo el usuario
+    ctx.date_iso = iso_date  # YYYY-MM-DD
+
+    # la misma frase puede traer franja y hora: "el viernes a las 10"
+    half_day = parsed.half_day
+    t24, closed = _clinic_time(parsed.time, half_day)
+    if t24 and half_day is None:
+        half_day = "tarde" if int(t24[:2]) >= AFTERNOON_FROM_HOUR else "mañana"
+
+    # hora fuera de horario ("a las 23"): la fecha vale, la hora se vuelve a pedir
+    notice = _out_of_hours() if closed else None
+    if half_day is None:
+        # sin franja ni hora, o una hora que vale de mañana y de tarde
+        ctx.state = ChatState.ASK_HALF_DAY
+        return Reply(replies.ASK_HALF_DAY if notice is None else f"{notice}\n\n{replies.ASK_HALF_DAY}")
+
+    ctx.half_day = half_day
+    ctx.state = ChatState.ASK_TIME
+    if t24 is None:
+        chosen = replies.half_day_chosen(half_day)
+        return Reply(chosen if notice is None else f"{notice}\n\n{chosen}")
+    return _ask_time(ctx, text, resolved=t24)
+
+
+def _clinic_time(t24: str | None, half_day: str | None) -> tuple[str | None, bool]:
+    """
+    (hora dentro del horario de la clínica o None, ¿cae fuera de horario?).
+    Una hora de 1 a 12 ("a las 5", "cinco") puede ser de mañana o de tarde:
+    vale la lectura que cae en horario, la de tarde primero si esa es la franja;
+    sin franja y si caben las dos, no hay hora (se pide la franja).
+    """
+    if t24 is None:
+        return None, False
+    hour, minute = int(t24[:2]), int(t24[3:])
+    if half_day == "mañana" or not 1 <= hour <= 12:
+        readings = (hour,)
+    else:
+        readings = (hour + 12, hour) if half_day == "tarde" else (hour, hour + 12)
+    open_at, close_at = settings.clinic_open_hour * 60, settings.clinic_close_hour * 60
+    fits = [h for h in readings if open_at <= h * 60 + minute < close_at]
+    if not fits:
+        return None, True
+    if len(fits) > 1 and half_day is None:
+        return None, False
+    return f"{fits[0]:02d}:{minute:02d}", False
+
+
+def _out_of_hours() -> str:
+    return replies.out_of_hours(settings.clinic_open_hour, settings.clinic_close_hour)
+
+
+def _ask_half_day(ctx: ChatContext, text: str) -> Reply:
+    # "mñana", "Tarde!" o una frase: "por la tarde", "mejor de tarde"
+    choice = HALF_DAYS.lookup(text) or normalize_utterance(text).half_day
+    if choice is None:
+        return Reply(replies.INVALID_HALF_DAY, reprompt="invalid_half_day")
+
+    ctx.half_day = choice
+    ctx.state = ChatState.ASK_TIME
+    return Reply(replies.half_day_chosen(choice))
+
+
+def _ask_time(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    # con la franja ya elegida, "cinco" por la tarde son las 17:00
+    t24, closed = _clinic_time(resolved or normalize_time(text), ctx.half_day)
+    if closed:
+        return Reply(_out_of_hours(), reprompt="out_of_hours")
+    if not t24:
+        return Reply(replies.INVALID_TIME, reprompt="invalid_time")
+
+    hour = int(t24.split(":")[0])
+
+    # Validación suave según franja
+    if ctx.half_day == "mañana" and hour >= AFTERNOON_FROM_HOUR:
+        return Reply(replies.TIME_LOOKS_AFTERNOON, reprompt="wrong_half_day")
+    if ctx.half_day == "tarde" and hour < AFTERNOON_FROM_HOUR:
+        return Reply(replies.TIME_LOOKS_MORNING, reprompt="wrong_half_day")
+
+    taken = _slot_unavailable(ctx, _minutes(t24), ChatState.ASK_DATE)
+    if taken:
+        return taken
+
+    ctx.time_text = text   # lo que dijo el usuario
+    ctx.time_24h = t24     # HH:MM
+    ctx.state = ChatState.CONFIRMATION
+    return Reply(replies.summary(ctx))
+
+
+def _slot_unavailable(ctx: ChatContext, minutes: int, date_state: ChatState) -> Reply | None:
+    """Si la hora está ocupada, respuesta con alternativas; si está libre, None."""
+    if ctx.date_ordinal is None or not occupancy.is_taken(ctx.date_ordinal, minutes):
+        return None
+
+    half_day = ctx.half_day or ("tarde" if minutes >= AFTERNOON_FROM_HOUR * 60 else "mañana")
+    free = occupancy.nearest_free(ctx.date_ordinal, minutes, half_day)
+    if not free:
+        ctx.state = date_state
+        return Reply(replies.day_full(half_day), reprompt="day_full")
+    return Reply(replies.slot_taken([format_minutes(m) for m in free]), reprompt="slot_taken")
+
+
+# =========================
+# CONFIRMACIÓN / CAMBIOS
+# =========================
+def _confirmation(ctx: ChatContext, text: str) -> Reply:
+    answer = ANSWERS.lookup(text)
+
+    if answer is True:
+        # otra sesión puede haber reservado la hora mientras tanto
+        ctx.state = ChatState.ASK_TIME_EDIT
+        taken = _slot_unavailable(ctx, ctx.time_minutes, ChatState.ASK_DATE_EDIT)
+        if taken:
+            return taken
+
+        occupancy.mark(ctx.date_ordinal, ctx.time_minutes)
+        ctx.state = ChatState.CONFIRMED
+        return Reply(replies.CONFIRMED, confirmed=True)
+
+    if answer is False:
+        ctx.state = ChatState.CHANGE_WHAT
+        return Reply(replies.CHANGE_WHAT)
+
+    return Reply(replies.YES_OR_NO, reprompt="yes_or_no")
+
+
+_CHANGE_OPTIONS = {
+    "1": (ChatState.ASK_DATE_EDIT, replies.ASK_DATE_EDIT),
+    "2": (ChatState.ASK_TIME_EDIT, replies.ASK_TIME_EDIT),
+    "3": (ChatState.ASK_REASON_EDIT, replies.ASK_REASON_EDIT),
+}
+
+
+# "1", "1️⃣", "1." o el nombre de la opción
+_CHANGE_CHOICES = Vocabulary({
+    **{key: key for key in _CHANGE_OPTIONS},
+    "fecha": "1",
+    "hora": "2",
+    "motivo": "3",
+})
+
+
+def _change_what(ctx: ChatContext, text: str) -> Reply:
+    option = _CHANGE_OPTIONS.get(_CHANGE_CHOICES.lookup(text))
+    if option is None:
+        return Reply(replies.INVALID_CHANGE_OPTION, reprompt="invalid_option")
+
+    ctx.state, reply = option
+    return Reply(reply)
+
+
+def _ask_date_edit(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    iso_date = resolved or normalize_date(text)
+    if not iso_date:
+        return Reply(replies.INVALID_DATE, reprompt="invalid_date")
+
+    ctx.date_text = text
+    ctx.date_iso = iso_date
+    ctx.state = ChatState.CONFIRMATION
+    return Reply(replies.edit_summary(replies.DATE_UPDATED, ctx))
+
+
+def _ask_time_edit(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    t24, closed = _clinic_time(resolved or normalize_time(text), ctx.half_day)
+    if closed:
+        return Reply(_out_of_hours(), reprompt="out_of_hours")
+    if not t24:
+        return Reply(replies.INVALID_TIME_EDIT, reprompt="invalid_time")
+
+    taken = _slot_unavailable(ctx, _minutes(t24), ChatState.ASK_DATE_EDIT)
+    if taken:
+        return taken
+
+    ctx.time_text = text
+    ctx.time_24h = t24
+    ctx.state = ChatState.CONFIRMATION
+    return Reply(replies.edit_summary(replies.TIME_UPDATED, ctx))
+
+
+def _ask_reason_edit(ctx: ChatContext, text: str) -> Reply:
+    if not is_valid_reason(text):
+        return Reply(replies.INVALID_REASON_EDIT, reprompt="short_reason")
+
+    ctx.reason = text
+    ctx.state = ChatState.CONFIRMATION
+    return Reply(replies.edit_summary(replies.REASON_UPDATED, ctx))
+
+
+def _confirmed(ctx: ChatContext, text: str) -> Reply:
+    # conversación terminada: se empieza una nueva
+    ctx.reset()
+    return Reply(replies.RESTART)
+
+
+HANDLERS: dict[ChatState, Handler] = {
+    ChatState.START: _start,
+    ChatState.ASK_NAME: _ask_name,
+    ChatState.ASK_PHONE: _ask_phone,
+    ChatState.ASK_REASON: _ask_reason,
+    ChatState.ASK_DATE: _ask_date,
+    ChatState.ASK_HALF_DAY: _ask_half_day,
+    ChatState.ASK_TIME: _ask_time,
+    ChatState.CONFIRMATION: _confirmation,
+    ChatState.CHANGE_WHAT: _change_what,
+    ChatState.ASK_DATE_EDIT: _ask_date_edit,
+    ChatState.ASK_TIME_EDIT: _ask_time_edit,
+    ChatState.ASK_REASON_EDIT: _ask_reason_edit,
+    ChatState.CONFIRMED: _confirmed,
+}
+
+
+# estados cuyo dato puede venir ya resuelto por otra vía (fallback LLM)
+RESOLVABLE: dict[ChatState, str] = {
+    ChatState.ASK_DATE: "date",
+    ChatState.ASK_DATE_EDIT: "date",
+    ChatState.ASK_TIME: "time",
+    ChatState.ASK_TIME_EDIT: "time",
+}
+
+
+def step(ctx: ChatContext, text: str, resolved: str | None = None) -> Reply:
+    """
+    Aplica `text` al contexto. `resolved` (solo en estados de RESOLVABLE) es
+    el valor ya normalizado: ISO para fechas, HH:MM para horas.
+    """
+    if resolved is not None:
+        return HANDLERS[ctx.state](ctx, text.strip(), resolved=resolved)
+    return HANDLERS[ctx.state](ctx, text.strip())
@@ -0,0 +1,297 @@
+# app/eventlog.py
+"""
+Registro de eventos de conversación: un evento por turno (sesión, estado
+antes/después, texto, valor normalizado, latencia) para embudos y disputas.
+
+`record` solo añade a un anillo en memoria (nunca espera ni hace I/O; si el
+anillo se llena se pierden los eventos más antiguos y se cuentan). Una tarea
+lo vacía por lotes en segmentos NDJSON que rotan por tamaño y edad; con
+EVENT_LOG_COPY_TO_DB=1 cada lote se copia además a `conversation_events`.
+
+El segmento en curso se llama `*.ndjson.open`; al rotar pasa a `*.ndjson`.
+Reproducir segmentos a través del motor:
+
+    python -m app.eventlog replay events/events-*.ndjson
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import time
+from collections import deque
+from datetime import datetime
+from typing import Iterable, Iterator, NamedTuple
+
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+EVENT_FIELDS = (
+    "ts", "session_id", "state_from", "state_to", "text",
+    "value", "llm", "reprompt", "confirmed", "latency_ms",
+)
+
+
+class EventLog:
+    def __init__(
+        self,
+        directory: str,
+        *,
+        capacity: int,
+        flush_interval: float,
+        segment_bytes: int,
+        segment_seconds: float,
+        copy_to_db: bool = False,
+    ):
+        self.directory = directory
+        self.flush_interval = flush_interval
+        self.segment_bytes = segment_bytes
+        self.segment_seconds = segment_seconds
+        self.copy_to_db = copy_to_db
+        self._buffer: deque[tuple] = deque(maxlen=capacity)
+        self._wakeup: asyncio.Event | None = None
+        self._task: asyncio.Task | None = None
+        self._stopping = False
+
+        # segmento en curso (solo lo toca el hilo de escritura)
+        self._segment = None
+        self._segment_path = ""
+        self._segment_opened = 0.0
+
+        # métricas
+        self.recorded = 0
+        self.dropped = 0
+        self.written = 0
+        self.copied = 0
+        self.failed_flushes = 0
+        self.segments = 0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------- ciclo de vida ----------
+    async def start(self) -> None:
+        if self.running:
+            return
+        os.makedirs(self.directory, exist_ok=True)
+        self._stopping = False
+        self._wakeup = asyncio.Event()
+        self._task = asyncio.create_task(self._run(), name="event-log")
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        self._stopping = True
+        self._wakeup.set()
+        await self._task
+        self._task = None
+        await asyncio.to_thread(self._close_segment)
+
+    def record(self, event: tuple) -> None:
+        """Evento en el orden de EVENT_FIELDS. No bloquea."""
+        if self._task is None:
+            return
+        if len(self._buffer) == self._buffer.maxlen:
+            self.dropped += 1
+        self._buffer.append(event)
+        self.recorded += 1
+        if len(self._buffer) * 2 >= self._buffer.maxlen:
+            self._wakeup.set()   # medio lleno: no esperar al intervalo
+
+    # ---------- bucle ----------
+    async def _run(self) -> None:
+        while not self._stopping:
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+            await self._flush()
+
+    async def _flush(self) -> None:
+        batch = list(self._buffer)
+        self._buffer.clear()
+        try:
+            await asyncio.to_thread(self._write, batch)
+        except Exception:
+            self.failed_flushes += 1
+            log.exception("No se pudieron escribir %d eventos de conversación", len(batch))
+
+    # ---------- segmentos ----------
+    def _write(self, batch: list[tuple]) -> None:
+        now = time.time()
+        if self._segment is not None and (
+            self._segment.tell() >= self.segment_bytes or now - self._segment_opened >= self.segment_seconds
+        ):
+            self._close_segment()
+        if not batch:
+            return
+
+        if self._segment is None:
+            self._open_segment(now)
+        self._segment.write("".join(
+            json.dumps(dict(zip(EVENT_FIELDS, e)), ensure_ascii=False) + "\n" for e in batch
+        ))
+        self._segment.flush()
+        self.written += len(batch)
+
+        if self.copy_to_db:
+            self._copy(batch)
+
+    def _open_segment(self, now: float) -> None:
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.gmtime(now))
+        name = f"events-{stamp}-{os.getpid()}-{self.segments:04d}.ndjson"
+        self._segment_path = os.path.join(self.directory, name)
+        self._segment = open(self._segment_path + ".open", "a", encoding="utf-8")
+        self._segment_opened = now
+        self.segments += 1
+
+    def _close_segment(self) -> None:
+        if self._segment is None:
+            return
+        self._segment.close()
+        self._segment = None
+        os.replace(self._segment_path + ".open", self._segment_path)
+
+    def _copy(self, batch: list[tuple]) -> None:
+        from app.database import bulk_copy, get_engine
+        from app.models import ConversationEvent
+
+        rows = [(datetime.utcfromtimestamp(e[0]),) + e[1:] for e in batch]
+        try:
+            with get_engine().begin() as conn:
+                bulk_copy(conn, ConversationEvent.__table__, EVENT_FIELDS, rows)
+        except Exception:
+            # el segmento ya tiene los eventos: se pueden cargar después
+            log.exception("Fallo copiando %d eventos a la BD", len(rows))
+            return
+        self.copied += len(rows)
+
+    def stats(self) -> dict:
+        return {
+            "buffered": len(self._buffer),
+            "recorded": self.recorded,
+            "dropped": self.dropped,
+            "written": self.written,
+            "copied": self.copied,
+            "failed_flushes": self.failed_flushes,
+            "segments": self.segments,
+        }
+
+
+event_log = EventLog(
+    settings.event_log_dir,
+    capacity=settings.event_log_buffer,
+    flush_interval=settings.event_log_flush_ms / 1000,
+    segment_bytes=settings.event_log_segment_mb * 1024 * 1024,
+    segment_seconds=settings.event_log_segment_minutes * 60,
+    copy_to_db=settings.event_log_copy_to_db,
+)
+
+
+# =========================
+# LECTURA Y REPRODUCCIÓN
+# =========================
+def read_segments(paths: Iterable[str]) -> Iterator[dict]:
+    """Eventos de los segmentos, en orden, sin cargarlos enteros en memoria."""
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+class ReplayStep(NamedTuple):
+    event: dict
+    state_from: str   # estado del contexto reproducido antes del turno
+    state_to: str     # estado tras reproducir el turno
+    reply: str
+    skipped: str | None = None   # motivo si el turno no se ha podido reproducir
+
+    @property
+    def matches(self) -> bool:
+        return self.state_from == self.event["state_from"] and self.state_to == self.event["state_to"]
+
+
+# estados desde los que un contexto vacío basta para seguir la sesión
+_FRESH_STATES = frozenset(("START", "CONFIRMED"))
+
+
+def replay(events: Iterable[dict]) -> Iterator[ReplayStep]:
+    """
+    Pasa cada evento por el motor con un contexto por sesión. Las fechas y
+    horas se toman ya normalizadas del evento: la reproducción no depende del
+    día en que se haga ni del fallback LLM. Usa el índice de ocupación del
+    proceso, así que se ejecuta aparte (CLI), no dentro de un worker.
+
+    Una sesión empezada en un segmento anterior no tiene sus datos (nombre,
+    fecha, hora...): sus turnos se omiten (`skipped`) hasta que empieza otra
+    conversación.
+    """
+    from app.context import ChatContext
+    from app.engine import RESOLVABLE, step
+    from app.state import ChatState
+
+    contexts: dict[str, ChatContext] = {}
+    for event in events:
+        sid = event["session_id"]
+        ctx = contexts.get(sid)
+        if ctx is None:
+            if event["state_from"] not in _FRESH_STATES:
+                yield ReplayStep(event, event["state_from"], event["state_from"], "", "sin historial")
+                continue
+            ctx = contexts[sid] = ChatContext()
+            ctx.state = ChatState(event["state_from"])
+        state_from = ctx.state.value
+        if state_from != event["state_from"]:
+            # la reproducción se ha separado del registro: se sigue desde el estado registrado
+            ctx.state = ChatState(event["state_from"])
+
+        resolved = event["value"] if ctx.state in RESOLVABLE else None
+        try:
+            reply = step(ctx, event["text"], resolved)
+        except (TypeError, ValueError) as exc:
+            # estado forzado sin los datos que necesita (p. ej. confirmar sin hora)
+            del contexts[sid]
+            yield ReplayStep(event, state_from, state_from, "", f"{type(exc).__name__}: {exc}")
+            continue
+        yield ReplayStep(event, state_from, ctx.state.value, reply.text)
+
+
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Registro de eventos de conversación")
+    sub = parser.add_subparsers(dest="command", required=True)
+    p_replay = sub.add_parser("replay", help="reproduce segmentos a través del motor")
+    p_replay.add_argument("paths", nargs="+")
+    p_replay.add_argument("--verbose", action="store_true", help="muestra cada turno")
+    args = parser.parse_args(argv)
+
+    total = mismatches = skipped = 0
+    sessions = set()
+    for r in replay(read_segments(args.paths)):
+        total += 1
+        sessions.add(r.event["session_id"])
+        if r.skipped:
+            skipped += 1
+            if args.verbose:
+                print(f"- {r.event['session_id']} {r.event['state_from']}→{r.event['state_to']} "
+                      f"omitido ({r.skipped}): {r.event['text']!r}")
+            continue
+        if not r.matches:
+            mismatches += 1
+        if args.verbose or not r.matches:
+            mark = "✓" if r.matches else "✗"
+            print(
+                f"{mark} {r.event['session_id']} {r.event['state_from']}→{r.event['state_to']} "
+                f"(reproducido {r.state_from}→{r.state_to}): {r.event['text']!r}"
+            )
+
+    print(f"{total} turnos de {len(sessions)} sesiones, {mismatches} diferencias, {skipped} omitidos")
+    return 0 if mismatches == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
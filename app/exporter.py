@@ -0,0 +1,50 @@
+# app/exporter.py
+"""
+Exportación de citas en CSV o NDJSON, en streaming: se codifica bloque a
+bloque según llegan del cursor de servidor.
+"""
+import csv
+import io
+import json
+from datetime import date
+from typing import Iterator
+
+from app.database import ReadSessionLocal
+from app.repositories.appointments import EXPORT_COLUMNS, iter_appointment_partitions
+from app.responses import plain
+
+FORMATS = ("csv", "ndjson")
+
+MEDIA_TYPES = {
+    "csv": "text/csv; charset=utf-8",
+    "ndjson": "application/x-ndjson",
+}
+
+
+def _csv_chunks(partitions: Iterator[list]) -> Iterator[bytes]:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(EXPORT_COLUMNS)
+    yield buf.getvalue().encode()
+
+    for rows in partitions:
+        buf.seek(0)
+        buf.truncate()
+        writer.writerows([tuple(map(plain, row)) for row in rows])
+        yield buf.getvalue().encode()
+
+
+def _ndjson_chunks(partitions: Iterator[list]) -> Iterator[bytes]:
+    for rows in partitions:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, map(plain, row))), ensure_ascii=False) + "\n"
+            for row in rows
+        ).encode()
+
+
+def iter_export(fmt: str, date_from: date | None = None, date_to: date | None = None) -> Iterator[bytes]:
+    # sesión propia: vive lo que dure la respuesta, no lo que dure el endpoint
+    with ReadSessionLocal() as db:
+        partitions = iter_appointment_partitions(db, date_from=date_from, date_to=date_to)
+        encode = _csv_chunks if fmt == "csv" else _ndjson_chunks
+        yield from encode(partitions)
@@ -0,0 +1,299 @@
+# app/importer.py
+"""
+Importación masiva de citas desde CSV o NDJSON.
+
+Se lee en streaming, se normaliza fecha/hora por lotes y cada lote válido se
+carga con COPY (Postgres) en su propia transacción. Los rechazos se notifican
+por línea a `on_reject`; la memoria depende del tamaño de lote, no del fichero.
+
+Columnas: name, phone, reason, date, time y opcionales id, half_day, status,
+created_at (las que escribe app.exporter). Fecha y hora en ISO; si no, se
+entienden como texto libre con los normalizadores del chat.
+
+Cada fila lleva un id estable (el del fichero, o derivado de su contenido) y
+la clave de idempotencia "import:<id>": reimportar el mismo fichero no
+duplica citas, las que ya están se cuentan como omitidas.
+
+    python -m app.importer citas.csv [--format csv|ndjson] [--chunk-size 5000]
+"""
+import argparse
+import csv
+import json
+import sys
+import uuid
+from dataclasses import dataclass
+from datetime import date, datetime, time
+from typing import Callable, Iterable, Iterator, TextIO
+
+from sqlalchemy import select
+
+from app.availability import calendar_cache
+from app.database import bulk_copy, get_engine, prepare_database
+from app.engine import AFTERNOON_FROM_HOUR
+from app.model.appointment_status import AppointmentStatus
+from app.models import Appointment
+from app.repositories.appointments import availability_deltas, availability_upsert
+from app.validators import PHONE_RE, is_valid_name, is_valid_reason, normalize_date, normalize_time
+
+COLUMNS = ("id", "name", "phone", "reason", "date", "time", "half_day", "status", "created_at", "idempotency_key")
+FORMATS = ("csv", "ndjson")
+DEFAULT_CHUNK_SIZE = 5000
+
+_STATUSES = frozenset(s.value for s in AppointmentStatus)
+_HALF_DAYS = frozenset(("mañana", "tarde"))
+
+
+@dataclass(slots=True)
+class Reject:
+    line: int
+    error: str
+
+
+@dataclass(slots=True)
+class ImportResult:
+    imported: int = 0
+    rejected: int = 0
+    skipped: int = 0   # ya estaban en la BD (misma cita importada antes)
+
+
+# ids de las filas sin id: mismo contenido, mismo id
+_IMPORT_NAMESPACE = uuid.UUID("9f4c2a5e-6b1d-4c3e-8a7f-2d5b1e0c9a64")
+
+
+# =========================
+# LECTURA
+# =========================
+def iter_records(stream: TextIO, fmt: str) -> Iterator[tuple[int, dict | None, str | None]]:
+    """(nº de línea, registro, error de parseo) uno a uno, sin cargar el fichero."""
+    if fmt == "csv":
+        reader = csv.DictReader(stream)
+        for rec in reader:
+            yield reader.line_num, rec, None
+        return
+
+    for lineno, line in enumerate(stream, start=1):
+        if not line.strip():
+            continue
+        try:
+            rec = json.loads(line)
+        except json.JSONDecodeError as exc:
+            yield lineno, None, f"JSON no válido: {exc.msg}"
+            continue
+        if not isinstance(rec, dict):
+            yield lineno, None, "se esperaba un objeto JSON"
+            continue
+        yield lineno, rec, None
+
+
+def _field(rec: dict, key: str) -> str:
+    value = rec.get(key)
+    return "" if value is None else str(value).strip()
+
+
+# =========================
+# VALIDACIÓN
+# =========================
+def _parse_date(text: str) -> date | None:
+    try:
+        return date.fromisoformat(text)   # lo que escribe el exportador
+    except ValueError:
+        iso = normalize_date(text)        # texto libre: "20/11", "20 de noviembre"
+        return date.fromisoformat(iso) if iso else None
+
+
+def _parse_time(text: str) -> time | None:
+    try:
+        return time.fromisoformat(text)   # "10:30:00" o "10:30"
+    except ValueError:
+        t24 = normalize_time(text)
+        return time.fromisoformat(t24) if t24 else None
+
+
+def _parse_id(text: str) -> uuid.UUID | None:
+    try:
+        return uuid.UUID(text)
+    except ValueError:
+        return None
+
+
+def _parse_created_at(text: str) -> datetime | None:
+    try:
+        return datetime.fromisoformat(text)
+    except ValueError:
+        return None
+
+
+def _validate_chunk(chunk: list[tuple[int, dict]]) -> tuple[list[tuple], list[Reject]]:
+    # cada texto de fecha/hora distinto se interpreta una sola vez por lote
+    dates: dict[str, date | None] = {}
+    times: dict[str, time | None] = {}
+    for _, rec in chunk:
+        d, t = _field(rec, "date"), _field(rec, "time")
+        if d not in dates:
+            dates[d] = _parse_date(d)
+        if t not in times:
+            times[t] = _parse_time(t)
+
+    now = datetime.utcnow()
+    rows: list[tuple] = []
+    rejects: list[Reject] = []
+
+    for lineno, rec in chunk:
+        name, phone, reason = _field(rec, "name"), _field(rec, "phone"), _field(rec, "reason")
+        day, t = dates[_field(rec, "date")], times[_field(rec, "time")]
+        half_day = _field(rec, "half_day").lower()
+        status = _field(rec, "status").lower() or AppointmentStatus.CONFIRMED.value
+        raw_id, raw_created = _field(rec, "id"), _field(rec, "created_at")
+        row_id = _parse_id(raw_id) if raw_id else None
+        created_at = _parse_created_at(raw_created) if raw_created else now
+
+        if not is_valid_name(name):
+            error = "nombre vacío o demasiado corto"
+        elif not PHONE_RE.fullmatch(phone):
+            error = f"teléfono no válido: {phone!r}"
+        elif not is_valid_reason(reason):
+            error = "motivo vacío o demasiado corto"
+        elif day is None:
+            error = f"fecha no reconocida: {_field(rec, 'date')!r}"
+        elif t is None:
+            error = f"hora no reconocida: {_field(rec, 'time')!r}"
+        elif half_day and half_day not in _HALF_DAYS:
+            error = f"franja no válida: {half_day!r}"
+        elif status not in _STATUSES:
+            error = f"estado no válido: {status!r}"
+        elif raw_id and row_id is None:
+            error = f"id no válido: {raw_id!r}"
+        elif created_at is None:
+            error = f"created_at no válido: {raw_created!r}"
+        else:
+            error = None
+
+        if error:
+            rejects.append(Reject(lineno, error))
+            continue
+
+        if not half_day:
+            half_day = "tarde" if t.hour >= AFTERNOON_FROM_HOUR else "mañana"
+        if row_id is None:
+            content = "|".join((name, phone, reason, day.isoformat(), t.isoformat()))
+            row_id = uuid.uuid5(_IMPORT_NAMESPACE, content)
+
+        rows.append((row_id, name, phone, reason, day, t, half_day, status, created_at, f"import:{row_id}"))
+
+    return rows, rejects
+
+
+# =========================
+# CARGA
+# =========================
+def _new_rows(conn, rows: list[tuple]) -> list[tuple]:
+    """Filas cuyo id no está ya en la BD ni repetido en el lote."""
+    ids = {r[0] for r in rows}
+    existing = set(conn.execute(select(Appointment.id).where(Appointment.id.in_(ids))).scalars())
+    fresh = []
+    for r in rows:
+        if r[0] not in existing:
+            existing.add(r[0])
+            fresh.append(r)
+    return fresh
+
+
+def copy_rows(conn, rows: list[tuple]) -> int:
+    """
+    COPY en Postgres (psycopg 3 o psycopg2); INSERT multi-fila en otros motores.
+    Omite las citas que ya están y actualiza los agregados de disponibilidad en
+    la misma transacción. Devuelve cuántas se han insertado.
+    """
+    rows = _new_rows(conn, rows)
+    deltas = availability_deltas((r[4], r[6], r[7]) for r in rows)
+    if deltas:
+        conn.execute(availability_upsert(conn.dialect.name, deltas))
+
+    if rows:
+        bulk_copy(conn, Appointment.__table__, COLUMNS, rows)
+    return len(rows)
+
+
+def _chunks(records: Iterable, size: int) -> Iterator[list]:
+    chunk = []
+    for item in records:
+        chunk.append(item)
+        if len(chunk) >= size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def import_stream(
+    stream: TextIO,
+    fmt: str,
+    *,
+    chunk_size: int = DEFAULT_CHUNK_SIZE,
+    on_reject: Callable[[Reject], None] | None = None,
+) -> ImportResult:
+    if fmt not in FORMATS:
+        raise ValueError(f"Formato no soportado: {fmt}")
+
+    result = ImportResult()
+
+    def reject(r: Reject) -> None:
+        result.rejected += 1
+        if on_reject:
+            on_reject(r)
+
+    def parsed() -> Iterator[tuple[int, dict]]:
+        for lineno, rec, error in iter_records(stream, fmt):
+            if error:
+                reject(Reject(lineno, error))
+            else:
+                yield lineno, rec
+
+    for chunk in _chunks(parsed(), chunk_size):
+        rows, rejects = _validate_chunk(chunk)
+        for r in rejects:
+            reject(r)
+        if rows:
+            with get_engine().begin() as conn:
+                inserted = copy_rows(conn, rows)
+            result.imported += inserted
+            result.skipped += len(rows) - inserted
+
+    calendar_cache.clear()
+    return result
+
+
+def detect_format(filename: str | None) -> str:
+    if filename and filename.lower().endswith((".ndjson", ".jsonl")):
+        return "ndjson"
+    return "csv"
+
+
+# =========================
+# CLI
+# =========================
+def main(argv: list[str] | None = None) -> int:
+    parser = argparse.ArgumentParser(description="Importa citas desde CSV o NDJSON")
+    parser.add_argument("path", help="fichero a importar ('-' para stdin)")
+    parser.add_argument("--format", choices=FORMATS)
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    args = parser.parse_args(argv)
+
+    fmt = args.format or detect_format(args.path)
+    prepare_database()
+
+    def report(r: Reject) -> None:
+        print(f"línea {r.line}: {r.error}", file=sys.stderr)
+
+    if args.path == "-":
+        result = import_stream(sys.stdin, fmt, chunk_size=args.chunk_size, on_reject=report)
+    else:
+        with open(args.path, encoding="utf-8-sig", newline="") as f:
+            result = import_stream(f, fmt, chunk_size=args.chunk_size, on_reject=report)
+
+    print(f"✅ {result.imported} citas importadas, {result.skipped} ya estaban, {result.rejected} rechazadas")
+    return 0 if result.rejected == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
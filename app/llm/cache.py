@@ -0,0 +1,44 @@
+# app/llm/cache.py
+"""
+Cache persistente (SQLite local) de respuestas del modelo.
+Es síncrona y segura entre hilos: desde el event loop se usa con asyncio.to_thread.
+"""
+import sqlite3
+import threading
+import time
+
+
+class ResponseCache:
+    def __init__(self, path: str, ttl_seconds: int = 30 * 24 * 3600):
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS llm_cache ("
+            " kind TEXT NOT NULL, text TEXT NOT NULL, ref TEXT NOT NULL,"
+            " value TEXT, created_at REAL NOT NULL,"
+            " PRIMARY KEY (kind, text, ref))"
+        )
+
+    def get(self, kind: str, text: str, ref: str) -> tuple[bool, str | None]:
+        """(encontrado, valor). Un valor None cacheado también cuenta como encontrado."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT value, created_at FROM llm_cache WHERE kind = ? AND text = ? AND ref = ?",
+                (kind, text, ref),
+            ).fetchone()
+            if row is None or row[1] + self.ttl_seconds < time.time():
+                self.misses += 1
+                return False, None
+            self.hits += 1
+        return True, row[0]
+
+    def put(self, kind: str, text: str, ref: str, value: str | None) -> None:
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (kind, text, ref, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                (kind, text, ref, value, time.time()),
+            )
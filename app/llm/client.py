@@ -0,0 +1,40 @@
+# app/llm/client.py
+"""Cliente mínimo de la API generateContent de Gemini (stdlib, sin SDK)."""
+import asyncio
+import json
+import urllib.parse
+import urllib.request
+
+
+class LLMError(RuntimeError):
+    pass
+
+
+class GeminiClient:
+    def __init__(self, api_key: str, model: str, base_url: str, timeout: float):
+        self.api_key = api_key
+        self.model = model
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+
+    def _url(self) -> str:
+        # la clave va en la cabecera, no en la URL (que acaba en logs y trazas)
+        return f"{self.base_url}/v1beta/models/{urllib.parse.quote(self.model)}:generateContent"
+
+    def _post(self, prompt: str) -> str:
+        payload = json.dumps({
+            "contents": [{"parts": [{"text": prompt}]}],
+            "generationConfig": {"temperature": 0, "maxOutputTokens": 32},
+        }).encode()
+        headers = {"Content-Type": "application/json", "x-goog-api-key": self.api_key}
+        request = urllib.request.Request(self._url(), data=payload, headers=headers, method="POST")
+        try:
+            # timeout del socket: el hilo termina por sí solo aunque nadie espere ya la respuesta
+            with urllib.request.urlopen(request, timeout=self.timeout) as resp:
+                data = json.load(resp)
+            return data["candidates"][0]["content"]["parts"][0]["text"].strip()
+        except (OSError, ValueError, KeyError, IndexError) as exc:
+            raise LLMError(str(exc)) from exc
+
+    async def generate(self, prompt: str) -> str:
+        return await asyncio.to_thread(self._post, prompt)
@@ -0,0 +1,86 @@
+# app/llm/fake_server.py
+"""
+Servidor local que imita generateContent de Gemini, para pruebas sin red.
+
+Entiende unas pocas expresiones fijas y permite simular latencia y errores:
+
+    python -m app.llm.fake_server --port 8089 [--delay-ms 50] [--fail-rate 0.2]
+    GEMINI_BASE_URL=http://127.0.0.1:8089 GEMINI_API_KEY=fake LLM_FALLBACK_ENABLED=1 ...
+"""
+import argparse
+import json
+import random
+import re
+import time
+from datetime import date, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+_NUMBERS = {"uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6,
+            "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12}
+
+
+def answer(prompt: str) -> str:
+    text_m = re.search(r'"([^"]*)"', prompt)
+    text = text_m.group(1) if text_m else ""
+
+    if "YYYY-MM-DD" in prompt:
+        ref = date.fromisoformat(re.search(r"Hoy es (\d{4}-\d{2}-\d{2})", prompt).group(1))
+        if "semana que viene" in text or "próxima semana" in text:
+            return (ref + timedelta(days=7)).isoformat()
+        m = re.search(r"dentro de (\w+) d[ií]as", text)
+        if m:
+            n = int(m.group(1)) if m.group(1).isdigit() else _NUMBERS.get(m.group(1))
+            if n:
+                return (ref + timedelta(days=n)).isoformat()
+        return "NONE"
+
+    m = re.search(r"a las (\w+)( y media)?( de la tarde)?", text)
+    if m:
+        hour = int(m.group(1)) if m.group(1).isdigit() else _NUMBERS.get(m.group(1))
+        if hour is not None:
+            if m.group(3) and hour < 12:
+                hour += 12
+            return f"{hour:02d}:{30 if m.group(2) else 0:02d}"
+    return "NONE"
+
+
+def make_handler(delay: float, fail_rate: float):
+    class Handler(BaseHTTPRequestHandler):
+        def do_POST(self):
+            # la clave tiene que llegar en la cabecera, nunca en la URL
+            if not self.headers.get("x-goog-api-key") or "key=" in self.path:
+                self.send_response(401)
+                self.end_headers()
+                return
+            body = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+            time.sleep(delay)
+            if random.random() < fail_rate:
+                self.send_response(503)
+                self.end_headers()
+                return
+            prompt = body["contents"][0]["parts"][0]["text"]
+            data = json.dumps({"candidates": [{"content": {"parts": [{"text": answer(prompt)}]}}]}).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def serve(port: int, delay_ms: int = 0, fail_rate: float = 0.0) -> ThreadingHTTPServer:
+    return ThreadingHTTPServer(("127.0.0.1", port), make_handler(delay_ms / 1000, fail_rate))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Servidor Gemini falso")
+    parser.add_argument("--port", type=int, default=8089)
+    parser.add_argument("--delay-ms", type=int, default=0)
+    parser.add_argument("--fail-rate", type=float, default=0.0)
+    args = parser.parse_args()
+    print(f"Gemini falso en http://127.0.0.1:{args.port}")
+    serve(args.port, args.delay_ms, args.fail_rate).serve_forever()
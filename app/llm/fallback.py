@@ -0,0 +1,173 @@
+# app/llm/fallback.py
+"""
+Fallback con LLM para fechas/horas que las reglas no entienden.
+
+Solo se llama cuando `normalize_date`/`normalize_time` devuelven None, así
+que el camino habitual no paga nada. Protecciones, por orden:
+- cache persistente por (tipo, texto normalizado, fecha de referencia)
+- circuit breaker: tras N fallos seguidos no se llama durante un rato
+- límite de concurrencia: si está lleno se responde sin modelo, no se espera
+- timeout duro por llamada; el hueco de concurrencia se libera cuando acaba
+  el hilo de la petición (con su propio timeout de socket), no antes
+La salida del modelo se valida con los mismos normalizadores.
+"""
+import asyncio
+import logging
+import re
+import time
+from datetime import date
+
+from app.config import settings
+from app.llm.cache import ResponseCache
+from app.llm.client import GeminiClient, LLMError
+from app.normalizers.date import _today
+from app.normalizers.time import normalize_time
+
+log = logging.getLogger(__name__)
+
+_ISO_RE = re.compile(r"\d{4}-\d{2}-\d{2}")
+_HHMM_RE = re.compile(r"\d{1,2}:\d{2}")
+
+DATE_PROMPT = (
+    "Hoy es {ref} (Europe/Madrid). Un paciente quiere pedir cita y escribe: \"{text}\".\n"
+    "Responde SOLO con la fecha en formato YYYY-MM-DD, o NONE si no indica una fecha."
+)
+TIME_PROMPT = (
+    "Un paciente indica la hora de su cita: \"{text}\".\n"
+    "Responde SOLO con la hora en formato HH:MM de 24 horas, o NONE si no indica una hora."
+)
+
+
+class CircuitBreaker:
+    def __init__(self, max_failures: int, reset_seconds: float, clock=time.monotonic):
+        self.max_failures = max_failures
+        self.reset_seconds = reset_seconds
+        self._clock = clock
+        self._failures = 0
+        self._opened_at: float | None = None
+
+    @property
+    def open(self) -> bool:
+        if self._opened_at is None:
+            return False
+        if self._clock() - self._opened_at >= self.reset_seconds:
+            # semiabierto: se deja pasar una llamada de prueba
+            self._opened_at = None
+            self._failures = self.max_failures - 1
+            return False
+        return True
+
+    def success(self) -> None:
+        self._failures = 0
+        self._opened_at = None
+
+    def failure(self) -> None:
+        self._failures += 1
+        if self._failures >= self.max_failures:
+            self._opened_at = self._clock()
+
+
+class LLMFallback:
+    def __init__(self, client: GeminiClient, cache: ResponseCache, *, max_concurrency: int,
+                 timeout: float, breaker: CircuitBreaker):
+        self.client = client
+        self.cache = cache
+        self.timeout = timeout
+        self.breaker = breaker
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+        self.calls = 0
+        self.failures = 0
+        self.skipped = 0   # breaker abierto o sin hueco de concurrencia
+
+    async def resolve_date(self, text: str) -> str | None:
+        ref = _today()
+        key = " ".join(text.lower().split())
+        raw = await self._ask("date", key, ref.isoformat(), DATE_PROMPT.format(ref=ref.isoformat(), text=key))
+        if raw is None:
+            return None
+        m = _ISO_RE.search(raw)
+        if not m:
+            return None
+        try:
+            value = date.fromisoformat(m.group())
+        except ValueError:
+            return None
+        # solo fechas futuras y razonables
+        if not ref <= value <= date(ref.year + 2, 12, 31):
+            return None
+        return value.isoformat()
+
+    async def resolve_time(self, text: str) -> str | None:
+        key = " ".join(text.lower().split())
+        raw = await self._ask("time", key, "", TIME_PROMPT.format(text=key))
+        if raw is None:
+            return None
+        m = _HHMM_RE.search(raw)
+        return normalize_time(m.group()) if m else None
+
+    async def _ask(self, kind: str, key: str, ref: str, prompt: str) -> str | None:
+        # la cache es SQLite síncrono: fuera del event loop
+        found, value = await asyncio.to_thread(self.cache.get, kind, key, ref)
+        if found:
+            return value
+
+        if self.breaker.open or self._semaphore.locked():
+            self.skipped += 1
+            return None
+
+        await self._semaphore.acquire()
+        self.calls += 1
+        # el hilo de urllib no se cancela: el hueco sigue ocupado hasta que termina
+        call = asyncio.ensure_future(self.client.generate(prompt))
+        call.add_done_callback(self._release)
+        try:
+            done, _ = await asyncio.wait((call,), timeout=self.timeout)
+            if not done:
+                raise asyncio.TimeoutError(f"sin respuesta en {self.timeout}s")
+            raw = call.result()
+        except (LLMError, asyncio.TimeoutError) as exc:
+            self.failures += 1
+            self.breaker.failure()
+            log.warning("Fallback LLM (%s) sin respuesta: %s", kind, exc)
+            return None
+
+        self.breaker.success()
+        value = None if raw.strip().upper().startswith("NONE") else raw.strip()
+        await asyncio.to_thread(self.cache.put, kind, key, ref, value)
+        return value
+
+    def _release(self, call: asyncio.Future) -> None:
+        self._semaphore.release()
+        if not call.cancelled():
+            call.exception()   # ya contada, o descartada tras el timeout
+
+    def stats(self) -> dict:
+        return {
+            "calls": self.calls,
+            "failures": self.failures,
+            "skipped": self.skipped,
+            "cache_hits": self.cache.hits,
+            "cache_misses": self.cache.misses,
+            "breaker_open": self.breaker.open,
+        }
+
+
+_fallback: LLMFallback | None = None
+
+
+def get_fallback() -> LLMFallback | None:
+    """Instancia única, o None si el fallback está desactivado o sin API key."""
+    global _fallback
+    if not settings.llm_fallback_enabled or not settings.gemini_api_key:
+        return None
+    if _fallback is None:
+        timeout = settings.llm_timeout_ms / 1000
+        _fallback = LLMFallback(
+            GeminiClient(settings.gemini_api_key, settings.gemini_model, settings.gemini_base_url, timeout),
+            ResponseCache(settings.llm_cache_path),
+            max_concurrency=settings.llm_max_concurrency,
+            timeout=timeout,
+            breaker=CircuitBreaker(settings.llm_breaker_failures, settings.llm_breaker_reset_seconds),
+        )
+    return _fallback
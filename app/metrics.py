@@ -0,0 +1,154 @@
+# app/metrics.py
+"""
+Métricas en memoria con exposición en formato de texto de Prometheus.
+
+Sin dependencias: contadores, gauges calculados al vuelo e histogramas con
+buckets fijos. Registrar una observación es un acceso a dict y un bisect,
+así que se puede dejar activo en producción.
+"""
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from typing import Callable, Iterator
+
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5)
+FAST_BUCKETS = (0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005)
+
+_REGISTRY: list["_Metric"] = []
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(names: tuple[str, ...], values: tuple, extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        self.name = name
+        self.help = help
+        self.label_names = labels
+        _REGISTRY.append(self)
+
+    def header(self) -> list[str]:
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}"]
+
+    def samples(self) -> list[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = ()):
+        super().__init__(name, help, labels)
+        self._values: dict[tuple, float] = {}
+
+    def inc(self, *labels, amount: float = 1) -> None:
+        self._values[labels] = self._values.get(labels, 0) + amount
+
+    def value(self, *labels) -> float:
+        return self._values.get(labels, 0)
+
+    def samples(self) -> list[str]:
+        return [
+            f"{self.name}{_labels(self.label_names, key)} {value}"
+            for key, value in list(self._values.items())
+        ]
+
+
+class GaugeFunc(_Metric):
+    """Gauge cuyo valor se calcula al exportar (tamaños de colas, sesiones...)."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, help: str, fn: Callable[[], float]):
+        super().__init__(name, help)
+        self._fn = fn
+
+    def samples(self) -> list[str]:
+        try:
+            return [f"{self.name} {self._fn()}"]
+        except Exception:
+            return []
+
+
+class CounterFunc(GaugeFunc):
+    """Contador mantenido por otro componente (p. ej. aciertos de cache)."""
+
+    kind = "counter"
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name: str, help: str, labels: tuple[str, ...] = (), buckets=LATENCY_BUCKETS):
+        super().__init__(name, help, labels)
+        self.buckets = tuple(buckets)
+        # labels -> [conteos por bucket (+Inf al final), suma]
+        self._series: dict[tuple, list] = {}
+
+    def observe(self, value: float, *labels) -> None:
+        series = self._series.get(labels)
+        if series is None:
+            series = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+        series[0][bisect_left(self.buckets, value)] += 1
+        series[1] += value
+
+    @contextmanager
+    def time(self, *labels) -> Iterator[None]:
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - t0, *labels)
+
+    def samples(self) -> list[str]:
+        lines = []
+        for key, (counts, total) in list(self._series.items()):
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = 'le="+Inf"' if bound == float("inf") else f'le="{bound!r}"'
+                lines.append(f"{self.name}_bucket{_labels(self.label_names, key, le)} {cumulative}")
+            lines.append(f"{self.name}_sum{_labels(self.label_names, key)} {total}")
+            lines.append(f"{self.name}_count{_labels(self.label_names, key)} {cumulative}")
+        return lines
+
+
+def render() -> str:
+    lines: list[str] = []
+    for metric in _REGISTRY:
+        lines.extend(metric.header())
+        lines.extend(metric.samples())
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# MÉTRICAS DE LA APP
+# =========================
+CHAT_LATENCY = Histogram(
+    "chat_turn_seconds", "Latencia de un turno de /chat por estado de partida", ("state",)
+)
+CHAT_REPROMPTS = Counter(
+    "chat_reprompts_total", "Respuestas que vuelven a pedir el mismo dato", ("state", "reason")
+)
+CHAT_TRANSITIONS = Counter(
+    "chat_transitions_total", "Transiciones entre estados de la conversación", ("from_state", "to_state")
+)
+NORMALIZER_LATENCY = Histogram(
+    "normalizer_seconds", "Tiempo de normalización de fecha/hora", ("normalizer",), buckets=FAST_BUCKETS
+)
+DB_WRITE_LATENCY = Histogram(
+    "appointment_write_seconds", "Latencia de escritura de citas en BD", ("path",)
+)
+CHAT_REJECTIONS = Counter(
+    "chat_admission_rejections_total", "Peticiones de chat rechazadas por el control de admisión", ("reason",)
+)
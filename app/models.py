@@ -1,15 +1,18 @@
 # app/models.py
 import uuid
 from datetime import datetime
-from sqlalchemy import Column, String, Date, Time, DateTime
-from sqlalchemy.dialects.postgresql import UUID
-from app.database import Base
+from sqlalchemy import BigInteger, Boolean, Column, String, Date, Time, DateTime, Float, Index, Integer, Uuid
+from sqlalchemy.orm import declarative_base
+
+# aquí y no en app.database: importar la BD no arrastra el ORM al arranque
+Base = declarative_base()
 
 
 class Appointment(Base):
     __tablename__ = "appointments"
 
-    id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
+    # uuid nativo en Postgres; CHAR(32) en SQLite (pruebas y benchmarks)
+    id = Column(Uuid(as_uuid=True), primary_key=True, default=uuid.uuid4)
 
     name = Column(String, nullable=False)
     phone = Column(String, nullable=False)
@@ -22,4 +25,54 @@ class Appointment(Base):
     status = Column(String, default="confirmed")
     created_at = Column(DateTime, default=datetime.utcnow)
 
+    # "<sessionId>:<id de la conversación>" en las altas del chat: un reintento
+    # de la confirmación no duplica la cita. "import:<id>" en las importadas.
+    idempotency_key = Column(String, nullable=True)
+
+    # Índices para la paginación por cursor (created_at, id), que recorre en
+    # orden de created_at hasta llenar la página:
+    # - sin filtro o con filtros de igualdad (status, half_day, un solo día)
+    #   la página es un range scan acotado, sin importar el tamaño de la tabla;
+    # - un rango de fechas no es igualdad: o se recorre (created_at, id, date)
+    #   filtrando la fecha dentro del índice, sin ir a la tabla, o se lee el
+    #   rango por (date, ...) y se ordena. El planificador elige según lo
+    #   selectivo que sea el rango; en el peor caso el coste es el del rango.
+    __table_args__ = (
+        Index("ix_appointments_created_at_id_date", "created_at", "id", "date"),
+        Index("ix_appointments_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_appointments_half_day_created_at_id", "half_day", "created_at", "id"),
+        Index("ix_appointments_date_created_at_id", "date", "created_at", "id"),
+        Index("ux_appointments_idempotency_key", "idempotency_key", unique=True),
+    )
+
+
+class DailyAvailability(Base):
+    """Citas no canceladas por día y franja; se mantiene en cada alta y cambio de estado."""
+
+    __tablename__ = "daily_availability"
+
+    date = Column(Date, primary_key=True)
+    half_day = Column(String, primary_key=True)
+    booked = Column(Integer, nullable=False, default=0)
+
+
+class ConversationEvent(Base):
+    """Turno de chat del registro de eventos; se carga por lotes (COPY), nunca fila a fila."""
+
+    __tablename__ = "conversation_events"
+
+    id = Column(BigInteger().with_variant(Integer, "sqlite"), primary_key=True, autoincrement=True)
+    ts = Column(DateTime, nullable=False)
+    session_id = Column(String, nullable=False)
+    state_from = Column(String, nullable=False)
+    state_to = Column(String, nullable=False)
+    text = Column(String, nullable=False)
+    value = Column(String)   # fecha ISO u hora HH:MM normalizada en ese turno
+    llm = Column(Boolean, nullable=False, default=False)
+    reprompt = Column(String)
+    confirmed = Column(Boolean, nullable=False, default=False)
+    latency_ms = Column(Float, nullable=False)
 
+    __table_args__ = (
+        Index("ix_conversation_events_session_id_ts", "session_id", "ts"),
+    )
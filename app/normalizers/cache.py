@@ -0,0 +1,65 @@
+# app/normalizers/cache.py
+from __future__ import annotations
+
+import time
+from datetime import date, datetime, timedelta
+from zoneinfo import ZoneInfo
+
+MISS = object()
+
+
+class DayScopedCache:
+    """
+    Cache acotada (FIFO) cuyo contenido solo vale para el día actual en `tz`.
+    Se vacía al pasar la medianoche (lo detecta `today()`, que hay que llamar
+    antes de `get`); entre medias, `today()` solo compara con un timestamp.
+    """
+
+    def __init__(self, maxsize: int, tz: ZoneInfo):
+        self.maxsize = maxsize
+        self.tz = tz
+        self.hits = 0
+        self.misses = 0
+        self._data: dict = {}
+        self._day: date | None = None
+        self._expires_at = 0.0   # epoch de la próxima medianoche
+
+    def today(self) -> date:
+        if time.time() >= self._expires_at:
+            now = datetime.now(self.tz)
+            day = now.date()
+            midnight = datetime.combine(day + timedelta(days=1), datetime.min.time(), tzinfo=self.tz)
+            self._expires_at = midnight.timestamp()
+            if day != self._day:
+                self._data.clear()
+                self._day = day
+        return self._day
+
+    def get(self, key):
+        value = self._data.get(key, MISS)
+        if value is MISS:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    def put(self, key, value) -> None:
+        if len(self._data) >= self.maxsize:
+            try:
+                del self._data[next(iter(self._data))]
+            except (KeyError, StopIteration, RuntimeError):
+                pass
+        self._data[key] = value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self) -> dict[str, int]:
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._data),
+            "maxsize": self.maxsize,
+        }
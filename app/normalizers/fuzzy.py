@@ -0,0 +1,190 @@
+# app/normalizers/fuzzy.py
+"""
+Coincidencia tolerante a erratas para respuestas de vocabulario cerrado
+("mñana", "tarde!", "febreo", "Sí.").
+
+El texto se pliega (minúsculas, sin tildes ni signos) y se busca en dicts:
+- las erratas de una letra (borrado, inserción, sustitución o transposición)
+  están todas precalculadas, la primera vez que hace falta una: buscar una
+  es plegar y un acceso a dict;
+- las de dos letras (solo palabras de 8 o más) van por un índice de borrado
+  simétrico: se borran letras de la consulta y se mira en un dict, sin
+  recorrer el vocabulario, y los candidatos se confirman con la distancia
+  de edición (con transposiciones) real.
+Los textos ya resueltos se memorizan.
+"""
+from __future__ import annotations
+
+import re
+from typing import Generic, Mapping, TypeVar
+
+from app.normalizers.cache import MISS
+
+V = TypeVar("V")
+
+_ACCENTS = str.maketrans("áéíóúàèìòùäëïöüâêîôûñç", "aeiouaeiouaeiouaeiounc")
+_WORD_RE = re.compile(r"[^\W_]+")   # letras y dígitos; emojis y signos fuera
+# lo que puede quedar tras `fold` (salvo letras raras, que van por el índice de borrado)
+_ALPHABET = "abcdefghijklmnopqrstuvwxyz0123456789"
+
+
+def fold(text: str) -> str:
+    """"¡Mañana!" -> "manana", "1️⃣" -> "1", "Por la  TARDE." -> "por la tarde"."""
+    if text.isascii() and text.isalnum():
+        return text.lower()   # una palabra sin tildes ni signos: sin regex
+    return " ".join(_WORD_RE.findall(text.lower().translate(_ACCENTS)))
+
+
+def max_distance(length: int) -> int:
+    # palabras cortas ("si", "hoy", "hora") solo exactas: con una errata serían otra ("hola")
+    if length < 5:
+        return 0
+    return 1 if length < 8 else 2
+
+
+def _deletes(word: str, depth: int) -> set[str]:
+    """`word` y todas sus variantes con hasta `depth` letras borradas."""
+    out = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {w[:i] + w[i + 1:] for w in frontier for i in range(len(w))}
+        out |= frontier
+    return out
+
+
+def _edits1(word: str) -> set[str]:
+    """Todo lo que está a distancia 1 de `word` sobre _ALPHABET."""
+    splits = [(word[:i], word[i:]) for i in range(len(word) + 1)]
+    out = {a + b[1:] for a, b in splits if b}
+    out |= {a + b[1] + b[0] + b[2:] for a, b in splits if len(b) > 1}
+    out |= {a + c + b[1:] for a, b in splits if b for c in _ALPHABET}
+    out |= {a + c + b for a, b in splits for c in _ALPHABET}
+    out.discard(word)
+    return out
+
+
+def _one_edit(a: str, b: str) -> bool:
+    """¿A distancia 1 (borrado, inserción, sustitución o transposición)? Lineal, sin tabla."""
+    la, lb = len(a), len(b)
+    if abs(la - lb) > 1:
+        return False
+    i = 0
+    n = min(la, lb)
+    while i < n and a[i] == b[i]:
+        i += 1
+    if la > lb:
+        return a[i + 1:] == b[i:]
+    if la < lb:
+        return a[i:] == b[i + 1:]
+    if a[i + 1:] == b[i + 1:]:
+        return True
+    return i + 1 < n and a[i] == b[i + 1] and a[i + 1] == b[i] and a[i + 2:] == b[i + 2:]
+
+
+def distance(a: str, b: str) -> int:
+    """Distancia de edición con transposición de letras contiguas (OSA)."""
+    if a == b:
+        return 0
+    prev2: list[int] = []
+    prev = list(range(len(b) + 1))
+    for i, ca in enumerate(a, 1):
+        cur = [i]
+        for j, cb in enumerate(b, 1):
+            d = min(prev[j] + 1, cur[j - 1] + 1, prev[j - 1] + (ca != cb))
+            if i > 1 and j > 1 and ca == b[j - 2] and a[i - 2] == cb:
+                d = min(d, prev2[j - 2] + 1)
+            cur.append(d)
+        prev2, prev = prev, cur
+    return prev[-1]
+
+
+class Vocabulary(Generic[V]):
+    """
+    Vocabulario cerrado palabra -> valor. `lookup` devuelve el valor de la
+    palabra exacta o, si no, de la única más cercana dentro de `max_distance`
+    (None si no hay ninguna o si dos valores distintos empatan).
+    """
+
+    def __init__(self, words: Mapping[str, V], memo_size: int = 1024):
+        # texto tal cual y plegado: el caso habitual es un acceso a dict
+        self._exact: dict[str, V] = dict(words)
+        self._folded: dict[str, V] = {fold(w): v for w, v in words.items()}
+        self._exact.update(self._folded)
+        # textos ya plegados/resueltos (tal cual -> valor o None)
+        self.memo_size = memo_size
+        self._memo: dict[str, V | None] = {}
+
+        # errata de una letra -> valor (None si vale para dos); en la primera errata
+        self._typos: dict[str, V | None] | None = None
+        self._index: dict[str, list[str]] = {}
+        self._depth = 0
+        for word in self._folded:
+            depth = max_distance(len(word))
+            self._depth = max(self._depth, depth)
+            for variant in _deletes(word, depth):
+                self._index.setdefault(variant, []).append(word)
+
+    def lookup(self, text: str) -> V | None:
+        value = self._exact.get(text)
+        if value is not None:
+            return value
+        value = self._memo.get(text, MISS)
+        if value is not MISS:
+            return value
+
+        key = fold(text)
+        value = self._folded.get(key)
+        if value is None and len(key) >= 4:
+            value = self._search(key)
+        if len(self._memo) >= self.memo_size:
+            self._memo.pop(next(iter(self._memo)))   # FIFO
+        self._memo[text] = value
+        return value
+
+    def _search(self, key: str) -> V | None:
+        """Valor de la errata `key` (ya plegada y fuera del vocabulario), o None."""
+        if self._typos is None:
+            self._typos = self._typo_table()
+        value = self._typos.get(key, MISS)
+        if value is not MISS:
+            return value
+        if self._depth < 2:
+            return None
+        return self._nearest(key)   # a distancia 2, o con letras fuera de _ALPHABET
+
+    def _typo_table(self) -> dict[str, V | None]:
+        table: dict[str, V | None] = {}
+        for word, value in self._folded.items():
+            if max_distance(len(word)) == 0:
+                continue
+            for typo in _edits1(word):
+                if typo in self._folded:
+                    continue   # es otra palabra del vocabulario
+                seen = table.get(typo, MISS)
+                table[typo] = value if seen is MISS or seen == value else None
+        return table
+
+    def _nearest(self, key: str) -> V | None:
+        best: V | None = None
+        best_d = self._depth + 1
+        seen = set()
+        for variant in _deletes(key, self._depth):
+            for word in self._index.get(variant, ()):
+                if word in seen:
+                    continue
+                seen.add(word)
+                limit = max_distance(len(word))
+                if _one_edit(key, word):
+                    d = 1
+                elif limit > 1:
+                    d = distance(key, word)
+                else:
+                    continue
+                if d > limit or d > best_d:
+                    continue
+                candidate = self._folded[word]
+                if d < best_d:
+                    best, best_d = candidate, d
+                elif candidate != best:
+                    best = None   # empate entre valores distintos: no se adivina
+        return best
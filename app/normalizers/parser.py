@@ -0,0 +1,394 @@
+# app/normalizers/parser.py
+"""
+Analizador de fecha, hora y franja en español, en una sola pasada.
+
+El texto se parte en tokens con una única expresión precompilada y una
+gramática pequeña los recorre una vez de izquierda a derecha, así que una
+misma frase puede dar los tres datos ("el viernes a las 10",
+"mañana por la tarde", "a las cinco y media de la tarde"). Los nombres de
+mes y de día admiten una errata (app.normalizers.fuzzy), pero solo donde se
+espera uno ("20 de febreo", "el vierns", "mñana" al principio): una palabra
+cualquiera no paga la búsqueda ni se confunde con una fecha.
+
+`scan` no depende del día (cacheable sin caducidad); la fecha relativa se
+resuelve después con `resolve_date(spec, hoy)`. `parse` hace las dos cosas.
+"""
+from __future__ import annotations
+
+import re
+from datetime import date, timedelta
+from typing import NamedTuple
+
+from app.normalizers.fuzzy import Vocabulary
+
+MONTHS = {
+    "enero": 1,
+    "febrero": 2,
+    "marzo": 3,
+    "abril": 4,
+    "mayo": 5,
+    "junio": 6,
+    "julio": 7,
+    "agosto": 8,
+    "septiembre": 9,
+    "setiembre": 9,
+    "octubre": 10,
+    "noviembre": 11,
+    "diciembre": 12,
+}
+
+WEEKDAYS = {
+    "lunes": 0,
+    "martes": 1,
+    "miercoles": 2,
+    "miércoles": 2,
+    "jueves": 3,
+    "viernes": 4,
+    "sabado": 5,
+    "sábado": 5,
+    "domingo": 6,
+}
+
+HOUR_WORDS = {
+    "una": 1, "uno": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5, "seis": 6,
+    "siete": 7, "ocho": 8, "nueve": 9, "diez": 10, "once": 11, "doce": 12,
+}
+
+# números (con :, /, . o - dentro) o palabras; lo demás se ignora
+_TOKEN_RE = re.compile(r"-?\d+(?:[:/.\-]\d+)*h?|[^\W\d_]+")
+
+# atajos sin tokenizar, además de _PLAIN: "20/01/2027", "20 de enero [de 2027]"
+_PLAIN_DATE_RE = re.compile(r"(\d{1,2})/(\d{1,2})/(\d{4})")
+_PLAIN_MONTH_RE = re.compile(r"(\d{1,2}) (?:de )?([^\W\d_]+)(?: de (\d{4}))?")
+
+# palabras que pueden ir entre la hora y la franja: "a las 5 de la tarde"
+_LINKS = frozenset(("de", "la", "del", "por", "en"))
+# "el 20", "el día 20": número = día del mes
+_DAY_MARKERS = frozenset(("el", "día", "dia"))
+_TOMORROW = frozenset(("mañana", "manana"))
+_NOON = frozenset(("mediodía", "mediodia"))
+_THIS = frozenset(("esta", "este"))
+_HALVES = {"tarde": "tarde", "mañana": "mañana", "manana": "mañana"}
+# "por las mañanas", "de tardes": solo franja, nunca fecha
+_HALVES_PLURAL = {"tardes": "tarde", "mañanas": "mañana", "mananas": "mañana"}
+# palabras tras las que puede ir un día con errata ("" = principio del mensaje)
+_DAY_CUES = frozenset(("", "el", "este", "próximo", "proximo", "pasado"))
+# "cinco" al principio solo es hora si le sigue algo de hora ("cinco y media")
+_AFTER_HOUR_WORD = frozenset(("", "y", "menos", "en", "de", "h", "horas"))
+
+# erratas -> palabra exacta: meses detrás de un número ("20 de febreo") y días
+# o "mañana" detrás de _DAY_CUES ("el vierns", "mñana")
+_MONTH_TYPOS = Vocabulary({w: w for w in MONTHS})
+_DAY_TYPOS = Vocabulary({w: w for w in (*WEEKDAYS, *_TOMORROW)})
+_GRAMMAR = frozenset((
+    *MONTHS, *WEEKDAYS, *HOUR_WORDS, *_TOMORROW, *_NOON, *_THIS, *_HALVES_PLURAL,
+    "tarde", "noche", "pasado", "media", "cuarto", "menos", "punto", "horas",
+))
+
+
+class Parsed(NamedTuple):
+    date: str | None = None       # YYYY-MM-DD
+    time: str | None = None       # HH:MM
+    half_day: str | None = None   # "mañana" | "tarde"
+
+
+class Scan(NamedTuple):
+    # ("rel", días) | ("weekday", wd) | ("dmy", d, m, año | None) | ("day", d, wd | None);
+    # ("dmy", d, m, año | None, True) si el mes venía con errata
+    date: tuple | None = None
+    time: str | None = None
+    half_day: str | None = None
+
+
+_EMPTY = Scan()
+
+# "HH:MM" ya formateadas: el f-string por llamada cuesta más que el resto de _clock
+_CLOCK = [[f"{h:02d}:{m:02d}" for m in range(60)] for h in range(24)]
+
+
+# =========================
+# GRAMÁTICA
+# =========================
+def _numeric(tok: str) -> tuple | None:
+    """Token numérico compuesto: ("clock", h, m) | ("dmy", d, m, año | None) | None si no vale."""
+    core = tok[:-1] if tok.endswith("h") else tok
+    if core.isdigit():
+        return ("clock", int(core), 0)   # "10h"
+    for sep in (":", "."):
+        if sep in core:
+            hh, _, mm = core.partition(sep)
+            if hh.isdigit() and len(hh) <= 2 and mm.isdigit() and len(mm) == 2:
+                return ("clock", int(hh), int(mm))
+            return None
+
+    parts = tok.split("/")
+    if len(parts) in (2, 3) and all(p.isdigit() for p in parts) and len(parts[0]) <= 2 and len(parts[1]) <= 2:
+        if len(parts) == 2:
+            return ("dmy", int(parts[0]), int(parts[1]), None)
+        if len(parts[2]) == 4:
+            return ("dmy", int(parts[0]), int(parts[1]), int(parts[2]))
+    return None   # "-1", "20-01", "2026-03-20", "20/01/27", "17:15:00"...
+
+
+def _clock(toks: list[str], i: int, h: int, m: int) -> tuple[int, str | None]:
+    """
+    Hora ya leída; `i` apunta al token siguiente. Consume "y media",
+    "menos cuarto"... y devuelve (siguiente token, "HH:MM" o None si no vale).
+    """
+    nxt, after = toks[i], toks[i + 1]
+    if nxt == "y" and after in ("media", "cuarto"):
+        m = 30 if after == "media" else 15
+        i += 2
+    elif nxt == "y" and after.isdigit() and m == 0:
+        m = int(after)
+        i += 2
+    elif nxt == "menos" and after == "cuarto":
+        h, m = h - 1, 45
+        i += 2
+    elif nxt == "en" and after == "punto":
+        i += 2
+    elif nxt in ("h", "horas"):
+        i += 1
+
+    # franja detrás: "de la tarde", "por la mañana", "del mediodía" (no se consume)
+    k = i
+    while toks[k] in _LINKS and k < i + 3:
+        k += 1
+    word = toks[k]
+    if word == "noche" and h == 12:
+        h = 0   # "las 12 de la noche"
+    elif word in ("tarde", "noche") and h < 12:
+        h += 12
+    elif word in _NOON and 1 <= h <= 4:
+        h += 12
+
+    if not (0 <= h <= 23 and 0 <= m <= 59):
+        return i, None
+    return i, _CLOCK[h][m]
+
+
+def _typo(tok: str, vocabulary: Vocabulary) -> str | None:
+    """Palabra exacta de `vocabulary` si `tok` puede ser una errata suya."""
+    if len(tok) < 4 or tok in _GRAMMAR or not tok.isalpha():
+        return None
+    return vocabulary.lookup(tok)
+
+
+def scan(text: str) -> Scan:
+    """
+    Fecha (sin resolver), hora y franja de `text`. Las palabras desconocidas
+    se ignoran; un número inválido o dos valores distintos para el mismo
+    dato ("hoy o mañana") dan todo None.
+    """
+    # atajos: mismo resultado que la gramática (lo comprueba tests/test_parser.py)
+    plain = _PLAIN.get(text)
+    if plain is not None:
+        return plain
+    text = text.lower()
+    if text[:1].isdigit():
+        m = _PLAIN_DATE_RE.fullmatch(text)
+        if m:
+            return Scan(("dmy", int(m[1]), int(m[2]), int(m[3])))
+        m = _PLAIN_MONTH_RE.fullmatch(text)
+        if m and m[2] in MONTHS:
+            return Scan(("dmy", int(m[1]), MONTHS[m[2]], int(m[3]) if m[3] else None))
+    return _scan_tokens(text)
+
+
+def _scan_tokens(text: str) -> Scan:
+    toks = _TOKEN_RE.findall(text)
+    if not toks:
+        return _EMPTY
+    # centinelas: toks[i - 1] y toks[i + 4] siempre existen
+    toks = ["", *toks, "", "", "", "", ""]
+    end = len(toks) - 5
+
+    dates: list[tuple] = []
+    times: list[str] = []
+    halves: list[str] = []
+    i = 1
+    while i < end:
+        tok, prev = toks[i], toks[i - 1]
+
+        n = None
+        if tok.isdigit():
+            n = int(tok)
+        elif tok in HOUR_WORDS and (prev in ("la", "las") or i == 1 and toks[2] in _AFTER_HOUR_WORD):
+            n = HOUR_WORDS[tok]
+
+        if n is not None:
+            # "20 de enero [de 2027]" / "20 enero"
+            k = i + 2 if toks[i + 1] == "de" else i + 1
+            month = MONTHS.get(toks[k])
+            guessed = False
+            if month is None:
+                fixed = _typo(toks[k], _MONTH_TYPOS)   # "20 de febreo"
+                if fixed is not None:
+                    toks[k] = fixed
+                    month = MONTHS[fixed]
+                    guessed = True
+            if month is not None:
+                i = k
+                year = None
+                k = i + 2 if toks[i + 1] in ("de", "del") else i + 1
+                if len(toks[k]) == 4 and toks[k].isdigit():
+                    year = int(toks[k])
+                    i = k
+                dates.append(("dmy", n, month, year, True) if guessed else ("dmy", n, month, year))
+            # "el 20", "el día 20", "viernes 20"
+            elif prev in _DAY_MARKERS or prev in WEEKDAYS:
+                if not 1 <= n <= 31:
+                    return _EMPTY
+                dates.append(("day", n, WEEKDAYS.get(prev)))
+            # lo demás es una hora: "10", "a las 10", "a las cinco"
+            else:
+                i, value = _clock(toks, i + 1, n, 0)
+                if value is None:
+                    return _EMPTY
+                times.append(value)
+                continue
+
+        elif tok[0].isdigit() or tok[0] == "-":
+            num = _numeric(tok)
+            if num is None:
+                return _EMPTY
+            if num[0] == "dmy":
+                dates.append(num)
+            else:
+                i, value = _clock(toks, i + 1, num[1], num[2])
+                if value is None:
+                    return _EMPTY
+                times.append(value)
+                continue
+
+        elif tok == "hoy":
+            dates.append(("rel", 0))
+        elif tok in _TOMORROW:
+            if prev == "la":
+                halves.append("mañana")   # "por la mañana"
+            else:
+                dates.append(("rel", 2 if prev == "pasado" else 1))
+        elif tok == "tarde":
+            halves.append("tarde")
+        elif tok in _HALVES_PLURAL:
+            halves.append(_HALVES_PLURAL[tok])
+        elif tok in _THIS and toks[i + 1] in _HALVES:
+            # "esta tarde", "esta mañana": hoy y la franja
+            dates.append(("rel", 0))
+            i += 1
+            halves.append(_HALVES[toks[i]])
+        elif tok in WEEKDAYS:
+            if not toks[i + 1].isdigit():   # "viernes 20": lo resuelve el número
+                dates.append(("weekday", WEEKDAYS[tok]))
+        elif tok in _NOON:
+            if prev != "del":   # "la una del mediodía" ya es una hora
+                times.append(_CLOCK[12][0])
+        elif prev in _DAY_CUES:
+            fixed = _typo(tok, _DAY_TYPOS)   # "el vierns", "mñana"
+            if fixed is not None:
+                toks[i] = fixed
+                continue   # se vuelve a leer ya corregida
+        # el resto son palabras de relleno ("el", "a", "las", "próximo"...)
+        i += 1
+
+    for values in (dates, times, halves):
+        if len(values) > 1 and len(set(values)) > 1:
+            return _EMPTY
+    return Scan(
+        dates[0] if dates else None,
+        times[0] if times else None,
+        halves[0] if halves else None,
+    )
+
+
+# lo más frecuente, resuelto de antemano: una búsqueda en vez de tokenizar.
+# Horas "10", "09:30" y fechas "20/01" válidas, directamente; las frases de
+# una o dos palabras, con la propia gramática.
+def _plain_table() -> dict[str, Scan]:
+    table: dict[str, Scan] = {}
+    for h in range(24):
+        hours = (str(h), f"{h:02d}") if h < 10 else (str(h),)
+        for m in range(60):
+            value = Scan(None, _CLOCK[h][m], None)
+            for hh in hours:
+                table[f"{hh}:{_CLOCK[0][m][3:]}"] = value
+                if m == 0:
+                    table[hh] = value
+    for m in range(1, 13):
+        months = (str(m), f"{m:02d}") if m < 10 else (str(m),)
+        for d in range(1, 32):
+            value = Scan(("dmy", d, m, None))
+            for dd in ((str(d), f"{d:02d}") if d < 10 else (str(d),)):
+                for mm in months:
+                    table[f"{dd}/{mm}"] = value
+    for w in (
+        "hoy", *_TOMORROW, *(f"pasado {t}" for t in _TOMORROW), "esta tarde", "esta mañana",
+        *WEEKDAYS, *(f"el {d}" for d in WEEKDAYS), *_NOON, "mañana por la tarde", "mañana por la mañana",
+        "por la mañana", "por la tarde",
+    ):
+        table[w] = _scan_tokens(w)
+    return table
+
+
+_PLAIN = _plain_table()
+
+
+# =========================
+# RESOLUCIÓN DE FECHAS
+# =========================
+def _safe_date(y: int, m: int, d: int) -> date | None:
+    if not (1 <= m <= 12 and 1 <= d <= 31):
+        return None   # sin pagar la excepción: "32/13", "0/1"
+    try:
+        return date(y, m, d)
+    except ValueError:
+        return None
+
+
+def _next_weekday(target_weekday: int, base: date) -> date:
+    # próxima ocurrencia (si hoy es el mismo día, lo toma como hoy+7)
+    days_ahead = (target_weekday - base.weekday()) % 7
+    if days_ahead == 0:
+        days_ahead = 7
+    return base + timedelta(days=days_ahead)
+
+
+def resolve_date(spec: tuple | None, base: date) -> str | None:
+    """
+    Fecha ISO de un spec de `scan` respecto a `base`.
+    Sin año explícito, una fecha ya pasada se lleva al año (o mes) siguiente;
+    si el mes venía con errata ("20 de febreo"), no: mejor volver a preguntar.
+    """
+    if spec is None:
+        return None
+    kind = spec[0]
+
+    if kind == "rel":
+        return (base + timedelta(days=spec[1])).isoformat()
+
+    if kind == "weekday":
+        return _next_weekday(spec[1], base).isoformat()
+
+    if kind == "dmy":
+        d, m, y = spec[1:4]
+        candidate = _safe_date(y or base.year, m, d)
+        if candidate and y is None and candidate < base:
+            candidate = None if len(spec) > 4 else _safe_date(base.year + 1, m, d)
+        return candidate.isoformat() if candidate else None
+
+    # "day": el próximo día `d` (hoy incluido), en el día de la semana pedido si lo hay
+    _, d, wd = spec
+    y, m = base.year, base.month
+    for _ in range(12):
+        candidate = _safe_date(y, m, d)
+        if candidate and candidate >= base:
+            if wd is not None and candidate.weekday() != wd:
+                return None
+            return candidate.isoformat()
+        y, m = (y + 1, 1) if m == 12 else (y, m + 1)
+    return None
+
+
+def parse(text: str, today: date) -> Parsed:
+    s = scan(text)
+    return Parsed(resolve_date(s.date, today), s.time, s.half_day)
@@ -1,13 +1,30 @@
-import re
+from app.normalizers.cache import MISS, DayScopedCache
+from app.normalizers.date import CACHE_SIZE, TZ
+from app.normalizers.parser import scan
+
+_cache = DayScopedCache(CACHE_SIZE, TZ)
 
-TIME_RE = re.compile(r"^([01]?\d|2[0-3])(:[0-5]\d)?$")
 
 def normalize_time(text: str) -> str | None:
-    m = TIME_RE.match(text.strip())
-    if not m:
-        return None
+    """
+    HH:MM o None. Soporta "10", "10:30", "10h", "a las 10",
+    "diez y media", "a las cinco de la tarde", "menos cuarto", "mediodía".
+    """
+    raw = text.strip()
+
+    _cache.today()
+    cached = _cache.get(raw)
+    if cached is not MISS:
+        return cached
+
+    value = _parse(raw)
+    _cache.put(raw, value)
+    return value
+
+
+normalize_time.cache_info = _cache.info
+normalize_time.cache_clear = _cache.clear
 
-    hour = int(m.group(1))
-    minute = m.group(2) or ":00"
 
-    return f"{hour:02d}{minute}"
+def _parse(raw: str) -> str | None:
+    return scan(raw).time
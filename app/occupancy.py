@@ -0,0 +1,124 @@
+# app/occupancy.py
+"""
+Índice en memoria de huecos ocupados por día.
+
+Cada día es un entero usado como bitmap de franjas de SLOT_MINUTES (96 bits
+con franjas de 15 min). Los días se cargan de `appointments` bajo demanda
+(`load`) y se actualizan al confirmar (`mark`) o liberar (`release`); las
+consultas son operaciones de bits, sin ir a la BD.
+
+Es por proceso: lo que reserven otros workers se ve al recargar el día
+(cada `reload_seconds`). La BD sigue siendo la fuente de verdad: al cargar,
+el bitmap se sustituye por el de la consulta más los cambios locales hechos
+mientras esta estaba en curso (`begin_load` ... `load`).
+"""
+import time
+from collections import OrderedDict
+
+from app.config import settings
+
+SLOT_MINUTES = 15
+AFTERNOON_FROM_MINUTES = 14 * 60
+
+
+def half_day_window(half_day: str | None) -> tuple[int, int]:
+    """[inicio, fin) en minutos de la franja; sin franja, todo el horario."""
+    open_at = settings.clinic_open_hour * 60
+    close_at = settings.clinic_close_hour * 60
+    if half_day == "mañana":
+        return open_at, min(close_at, AFTERNOON_FROM_MINUTES)
+    if half_day == "tarde":
+        return max(open_at, AFTERNOON_FROM_MINUTES), close_at
+    return open_at, close_at
+
+
+def format_minutes(minutes: int) -> str:
+    return f"{minutes // 60:02d}:{minutes % 60:02d}"
+
+
+class OccupancyIndex:
+    def __init__(self, max_days: int = 400, reload_seconds: float = 60.0, clock=time.monotonic):
+        self.max_days = max_days
+        self.reload_seconds = reload_seconds
+        self._clock = clock
+        self._bits: dict[int, int] = {}                    # ordinal -> bitmap
+        self._loaded: OrderedDict[int, float] = OrderedDict()   # ordinal -> cargado en
+        # ordinal -> [cargas en curso, marcadas, liberadas] desde que empezó la consulta
+        self._loading: dict[int, list[int]] = {}
+
+    # ---------- carga ----------
+    def needs_load(self, ordinal: int) -> bool:
+        loaded_at = self._loaded.get(ordinal)
+        return loaded_at is None or self._clock() - loaded_at > self.reload_seconds
+
+    def begin_load(self, ordinal: int) -> None:
+        """Antes de consultar la BD: desde aquí se apuntan los cambios locales del día."""
+        pending = self._loading.setdefault(ordinal, [0, 0, 0])
+        pending[0] += 1
+
+    def cancel_load(self, ordinal: int) -> None:
+        self._finish_load(ordinal)
+
+    def load(self, ordinal: int, minutes: list[int]) -> None:
+        """Sustituye el día por lo que hay en la BD (`minutes`) más los cambios desde `begin_load`."""
+        bits = 0
+        for m in minutes:
+            bits |= 1 << (m // SLOT_MINUTES)
+        marked, released = self._finish_load(ordinal)
+        self._bits[ordinal] = bits & ~released | marked
+        self._loaded[ordinal] = self._clock()
+        self._loaded.move_to_end(ordinal)
+
+        while len(self._loaded) > self.max_days:
+            old, _ = self._loaded.popitem(last=False)
+            self._bits.pop(old, None)
+
+    def _finish_load(self, ordinal: int) -> tuple[int, int]:
+        pending = self._loading.get(ordinal)
+        if pending is None:
+            return 0, 0
+        pending[0] -= 1
+        if pending[0] <= 0:
+            del self._loading[ordinal]
+        return pending[1], pending[2]
+
+    # ---------- consultas ----------
+    def is_taken(self, ordinal: int, minutes: int) -> bool:
+        return bool(self._bits.get(ordinal, 0) >> (minutes // SLOT_MINUTES) & 1)
+
+    def nearest_free(self, ordinal: int, minutes: int, half_day: str | None, n: int = 3) -> list[int]:
+        """Los `n` huecos libres más cercanos a `minutes` dentro de la franja, por hora."""
+        start, end = half_day_window(half_day)
+        first, last = start // SLOT_MINUTES, (end - 1) // SLOT_MINUTES
+        target = min(max(minutes // SLOT_MINUTES, first), last)
+        bits = self._bits.get(ordinal, 0)
+
+        found: list[int] = []
+        for distance in range(0, last - first + 1):
+            for slot in ((target - distance, target + distance) if distance else (target,)):
+                if first <= slot <= last and not bits >> slot & 1:
+                    found.append(slot)
+            if len(found) >= n:
+                break
+        return sorted(slot * SLOT_MINUTES for slot in found[:n])
+
+    # ---------- cambios ----------
+    def mark(self, ordinal: int, minutes: int) -> None:
+        bit = 1 << (minutes // SLOT_MINUTES)
+        self._bits[ordinal] = self._bits.get(ordinal, 0) | bit
+        pending = self._loading.get(ordinal)
+        if pending is not None:
+            pending[1] |= bit
+            pending[2] &= ~bit
+
+    def release(self, ordinal: int, minutes: int) -> None:
+        bit = 1 << (minutes // SLOT_MINUTES)
+        if ordinal in self._bits:
+            self._bits[ordinal] &= ~bit
+        pending = self._loading.get(ordinal)
+        if pending is not None:
+            pending[1] &= ~bit
+            pending[2] |= bit
+
+
+occupancy = OccupancyIndex()
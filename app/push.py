@@ -0,0 +1,63 @@
+# app/push.py
+"""
+Mensajes del servidor hacia las conexiones abiertas de una sesión
+(WebSocket `/chat/ws` o SSE `/chat/events`).
+
+Cada conexión tiene su cola acotada; si un cliente no lee, se descartan sus
+mensajes en lugar de frenar al que publica (p. ej. el writer de citas).
+"""
+import asyncio
+from contextlib import contextmanager
+from typing import Iterator
+
+from app import replies
+from app.config import settings
+
+
+class PushHub:
+    def __init__(self, queue_size: int):
+        self.queue_size = queue_size
+        self._subscribers: dict[str, set[asyncio.Queue]] = {}
+        self.published = 0
+        self.dropped = 0
+
+    @contextmanager
+    def subscribe(self, session_id: str) -> Iterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(session_id, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            queues = self._subscribers.get(session_id)
+            if queues is not None:
+                queues.discard(queue)
+                if not queues:
+                    del self._subscribers[session_id]
+
+    def publish(self, session_id: str, message: dict) -> int:
+        """Entrega `message` a las conexiones de la sesión; devuelve a cuántas."""
+        delivered = 0
+        for queue in self._subscribers.get(session_id, ()):
+            try:
+                queue.put_nowait(message)
+                delivered += 1
+            except asyncio.QueueFull:
+                self.dropped += 1
+        self.published += delivered
+        return delivered
+
+    def size(self) -> int:
+        return sum(len(queues) for queues in self._subscribers.values())
+
+
+push = PushHub(settings.push_queue_size)
+
+
+def notify_saved(rows: list[dict]) -> None:
+    """Avisa a cada sesión de que su cita ya está en BD (la respuesta del chat salió antes)."""
+    for row in rows:
+        key = row.get("idempotency_key")
+        if key is None:
+            continue
+        session_id = key.rpartition(":")[0]   # ver repositories.appointments.idempotency_key
+        push.publish(session_id, {"type": "saved", "reply": replies.SAVED, "sessionId": session_id})
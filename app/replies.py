@@ -0,0 +1,137 @@
+# app/replies.py
+# Textos del bot. Los constantes se construyen una sola vez al importar.
+from app.context import ChatContext
+
+GREETING = "Hola 😊 ¿Cómo te llamas?"
+ASK_NAME_AGAIN = "Necesito tu nombre para continuar 😊"
+
+INVALID_PHONE = "El teléfono debe tener 9 dígitos y empezar por 6 o 9 📞"
+ASK_REASON = "Perfecto 👍 ¿Cuál es el motivo de la consulta?"
+
+ASK_REASON_AGAIN = "¿Podrías indicarme brevemente el motivo de la consulta?"
+ASK_DATE = "Perfecto 😊 ¿Para qué día te gustaría la cita?"
+
+INVALID_DATE = (
+    "Indícame una fecha válida 😊\n\n"
+    "Ejemplos:\n"
+    "- mañana\n"
+    "- el viernes\n"
+    "- el viernes a las 10\n"
+    "- 20/01\n"
+    "- 20 de enero"
+)
+ASK_HALF_DAY = "Genial 😊 ¿Prefieres **por la mañana** o **por la tarde**?"
+
+INVALID_HALF_DAY = (
+    "Por favor, elige una opción válida 👇\n\n"
+    "🟢 **mañana**\n"
+    "🟣 **tarde**"
+)
+
+INVALID_TIME = (
+    "Indícame una **hora válida** ⏰\n\n"
+    "Ejemplos:\n"
+    "• 10\n"
+    "• 10:30\n"
+    "• a las cinco y media de la tarde"
+)
+TIME_LOOKS_AFTERNOON = "Esa hora parece de **tarde** 😊 Elige una hora de mañana."
+TIME_LOOKS_MORNING = "Esa hora parece de **mañana** 😊 Elige una hora de tarde."
+
+CONFIRMED = (
+    "✅ **Cita confirmada**\n\n"
+    "Gracias 😊 Hemos registrado tu solicitud y en breve nos pondremos en contacto contigo "
+    "para confirmar la disponibilidad.\n\n"
+    "¡Que tengas un buen día!"
+)
+CHANGE_WHAT = (
+    "De acuerdo 👍 ¿Qué te gustaría cambiar?\n\n"
+    "1️⃣ Fecha\n"
+    "2️⃣ Hora\n"
+    "3️⃣ Motivo\n\n"
+    "Escribe el número de la opción."
+)
+SAVED = "📅 Tu cita ya está registrada en nuestra agenda."
+SAVE_FAILED = (
+    "No hemos podido registrar la cita ahora mismo 😓\n\n"
+    "Responde **sí** de nuevo en unos segundos para confirmarla."
+)
+YES_OR_NO = "Respóndeme solo con **sí** o **no** 😊"
+
+ASK_DATE_EDIT = "📅 De acuerdo. ¿Para qué fecha te vendría mejor la cita?"
+ASK_TIME_EDIT = "⏰ Perfecto. ¿Qué hora prefieres?"
+ASK_REASON_EDIT = "📝 Entendido. ¿Cuál sería ahora el motivo de la consulta?"
+INVALID_CHANGE_OPTION = (
+    "Por favor, elige una opción válida:\n\n"
+    "1️⃣ Fecha\n"
+    "2️⃣ Hora\n"
+    "3️⃣ Motivo"
+)
+
+INVALID_TIME_EDIT = "Indícame una hora válida ⏰ (por ejemplo 10 o 10:30)"
+INVALID_REASON_EDIT = "Indícame un motivo válido, por favor 😊"
+
+RESTART = "Algo no ha ido bien, vamos a empezar de nuevo 😊"
+
+DATE_UPDATED = "Perfecto 👍 He actualizado la **fecha**."
+TIME_UPDATED = "Genial 👍 He actualizado la **hora**."
+REASON_UPDATED = "Perfecto 👍 He actualizado el **motivo**."
+
+
+# =========================
+# DINÁMICOS
+# =========================
+def greet_name(name: str) -> str:
+    return f"Encantado, {name}. ¿Me indicas tu teléfono?"
+
+
+def half_day_chosen(choice: str) -> str:
+    return (
+        f"Perfecto 👍 Por la **{choice}**.\n\n"
+        "⏰ ¿A qué **hora** te vendría bien?"
+    )
+
+
+def out_of_hours(open_hour: int, close_hour: int) -> str:
+    return f"A esa hora no atendemos 😕 Nuestro horario es de {open_hour}:00 a {close_hour}:00."
+
+
+def slot_taken(suggestions: list[str]) -> str:
+    if len(suggestions) == 1:
+        options = suggestions[0]
+    else:
+        options = ", ".join(suggestions[:-1]) + f" o {suggestions[-1]}"
+    return (
+        "Esa hora ya está ocupada 😕\n\n"
+        f"Te propongo: **{options}**. ¿Cuál prefieres?"
+    )
+
+
+def day_full(half_day: str | None) -> str:
+    when = f" por la **{half_day}**" if half_day else ""
+    return f"Ese día ya no quedan huecos{when} 😕 ¿Qué otro día te vendría bien?"
+
+
+def summary(ctx: ChatContext) -> str:
+    return (
+        "Perfecto 👍 Aquí tienes el resumen de tu cita:\n\n"
+        f"👤 Nombre: {ctx.name}\n"
+        f"📞 Teléfono: {ctx.phone}\n"
+        f"📝 Motivo: {ctx.reason}\n"
+        f"📅 Fecha: {ctx.date_text} ({ctx.date_iso})\n"
+        f"🕒 Hora: {ctx.time_text} ({ctx.time_24h})\n\n"
+        "¿Confirmamos la cita? (**sí / no**)"
+    )
+
+
+def edit_summary(header: str, ctx: ChatContext) -> str:
+    return (
+        f"{header}\n\n"
+        f"📋 **Resumen de tu cita:**\n"
+        f"- Nombre: {ctx.name}\n"
+        f"- Teléfono: {ctx.phone}\n"
+        f"- Motivo: {ctx.reason}\n"
+        f"- Fecha: {ctx.date_text} ({ctx.date_iso})\n"
+        f"- Hora: {ctx.time_text} ({ctx.time_24h})\n\n"
+        "¿Confirmamos la cita? (**sí / no**)"
+    )
@@ -1,6 +1,289 @@
+import base64
+import binascii
+import uuid
+from collections import Counter
+from datetime import date, datetime, time
+from typing import Iterable, Iterator
+
+from sqlalchemy import select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
-from app.models import Appointment
+
+from app.availability import calendar_cache
+from app.context import ChatContext
+from app.models import Appointment, DailyAvailability
+from app.occupancy import SLOT_MINUTES
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+# =========================
+# CURSOR
+# =========================
+def encode_cursor(created_at: datetime, appointment_id: uuid.UUID) -> str:
+    raw = f"{created_at.isoformat()}|{appointment_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, uuid.UUID]:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, appointment_id = base64.urlsafe_b64decode(padded).decode().split("|")
+        return datetime.fromisoformat(created_at), uuid.UUID(appointment_id)
+    except (binascii.Error, UnicodeDecodeError, ValueError) as exc:
+        raise InvalidCursor(cursor) from exc
+
+
+# =========================
+# LISTADO
+# =========================
+PAGE_COLUMNS = ("id", "name", "phone", "reason", "date", "time", "half_day", "status", "created_at")
+
+
+def _page_statement(
+    columns: list,
+    *,
+    limit: int,
+    cursor: str | None,
+    date_from: date | None,
+    date_to: date | None,
+    status: str | None,
+    half_day: str | None,
+):
+    stmt = select(*columns)
+
+    if date_from is not None and date_from == date_to:
+        # un solo día es igualdad: (date, created_at, id) ya da el orden de la página
+        stmt = stmt.where(Appointment.date == date_from)
+    else:
+        if date_from is not None:
+            stmt = stmt.where(Appointment.date >= date_from)
+        if date_to is not None:
+            stmt = stmt.where(Appointment.date <= date_to)
+    if status is not None:
+        stmt = stmt.where(Appointment.status == status)
+    if half_day is not None:
+        stmt = stmt.where(Appointment.half_day == half_day)
+
+    if cursor:
+        created_at, appointment_id = decode_cursor(cursor)
+        stmt = stmt.where(
+            tuple_(Appointment.created_at, Appointment.id) < tuple_(created_at, appointment_id)
+        )
+
+    # pedimos una fila de más para saber si hay página siguiente
+    return stmt.order_by(Appointment.created_at.desc(), Appointment.id.desc()).limit(limit + 1)
+
+
+def _cut_page(rows: list, limit: int) -> tuple[list, str | None]:
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    last = rows[-1]
+    return rows, encode_cursor(last.created_at, last.id)
+
+
+def list_appointments_page(
+    db: Session,
+    *,
+    limit: int = 50,
+    cursor: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    status: str | None = None,
+    half_day: str | None = None,
+) -> tuple[list, str | None]:
+    """
+    Página de citas ordenadas por (created_at, id) descendente, como filas
+    (tuplas en el orden de PAGE_COLUMNS, sin objetos ORM).
+    Devuelve (filas, next_cursor); next_cursor es None en la última página.
+    """
+    columns = [getattr(Appointment, c) for c in PAGE_COLUMNS]
+    stmt = _page_statement(
+        columns, limit=limit, cursor=cursor,
+        date_from=date_from, date_to=date_to, status=status, half_day=half_day,
+    )
+    return _cut_page(list(db.execute(stmt)), limit)
+
+
+# =========================
+# DISPONIBILIDAD (agregados diarios)
+# =========================
+CANCELLED = "cancelled"
+
+
+def availability_deltas(rows: Iterable[tuple[date, str, str | None]]) -> dict[tuple[date, str], int]:
+    """(fecha, franja, estado) -> incremento de `booked` por (fecha, franja)."""
+    return dict(Counter((d, h) for d, h, status in rows if status != CANCELLED))
+
+
+def availability_upsert(dialect: str, deltas: dict[tuple[date, str], int]):
+    """INSERT ... ON CONFLICT que suma `deltas` a daily_availability."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    stmt = dialect_insert(DailyAvailability).values([
+        {"date": d, "half_day": h, "booked": n} for (d, h), n in deltas.items()
+    ])
+    return stmt.on_conflict_do_update(
+        index_elements=[DailyAvailability.date, DailyAvailability.half_day],
+        set_={"booked": DailyAvailability.booked + stmt.excluded.booked},
+    )
+
+
+def availability_range(db: Session, date_from: date, date_to: date) -> list[tuple[date, str, int]]:
+    stmt = select(DailyAvailability.date, DailyAvailability.half_day, DailyAvailability.booked).where(
+        DailyAvailability.date >= date_from,
+        DailyAvailability.date <= date_to,
+    )
+    return [tuple(r) for r in db.execute(stmt)]
+
+
+def update_appointment_status(db: Session, appointment_id: uuid.UUID, status: str) -> Appointment | None:
+    appointment = db.get(Appointment, appointment_id, with_for_update=True)
+    if appointment is None:
+        return None
+
+    was_counted = appointment.status != CANCELLED
+    is_counted = status != CANCELLED
+    appointment.status = status
+
+    if was_counted != is_counted:
+        delta = {(appointment.date, appointment.half_day): 1 if is_counted else -1}
+        db.execute(availability_upsert(db.get_bind().dialect.name, delta))
+
+    db.commit()
+    calendar_cache.clear()
+    return appointment
+
+
+# =========================
+# OCUPACIÓN
+# =========================
+def _booked_times(day: date):
+    return select(Appointment.time).where(Appointment.date == day, Appointment.status != CANCELLED)
+
+
+async def booked_minutes(db: AsyncSession, day: date) -> list[int]:
+    """Horas (en minutos desde 00:00) con cita no cancelada ese día."""
+    result = await db.execute(_booked_times(day))
+    return [t.hour * 60 + t.minute for t in result.scalars()]
+
+
+def slot_is_booked(db: Session, day: date, minutes: int) -> bool:
+    """¿Alguna cita no cancelada en la franja del índice (SLOT_MINUTES) que contiene `minutes`?"""
+    slot = minutes // SLOT_MINUTES
+    return any((t.hour * 60 + t.minute) // SLOT_MINUTES == slot for t in db.scalars(_booked_times(day)))
+
+
+# =========================
+# EXPORTACIÓN
+# =========================
+EXPORT_COLUMNS = PAGE_COLUMNS
+
+
+def iter_appointment_partitions(
+    db: Session,
+    *,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    chunk_size: int = 1000,
+) -> Iterator[list]:
+    """
+    Filas (tuplas en el orden de EXPORT_COLUMNS) en bloques de `chunk_size`,
+    leídas con un cursor de servidor: la memoria no crece con la tabla.
+    """
+    stmt = select(*(getattr(Appointment, c) for c in EXPORT_COLUMNS))
+    if date_from is not None:
+        stmt = stmt.where(Appointment.date >= date_from)
+    if date_to is not None:
+        stmt = stmt.where(Appointment.date <= date_to)
+    stmt = stmt.order_by(Appointment.date, Appointment.time)
+
+    result = db.execute(stmt.execution_options(yield_per=chunk_size))
+    yield from result.partitions()
+
+
+# =========================
+# ALTA
+# =========================
+def idempotency_key(session_id: str, ctx: ChatContext) -> str:
+    # una cita por conversación; el id no se repite aunque el contexto se pierda
+    return f"{session_id}:{ctx.conversation.hex()}"
+
+
+def appointment_row(ctx: ChatContext, session_id: str) -> dict:
+    """Valores de la cita confirmada en el contexto, listos para un INSERT."""
+    return {
+        "id": uuid.uuid4(),
+        "name": ctx.name,
+        "phone": ctx.phone,
+        "reason": ctx.reason,
+        "date": date.fromordinal(ctx.date_ordinal),
+        "time": time(ctx.time_minutes // 60, ctx.time_minutes % 60),
+        "half_day": ctx.half_day,
+        "status": "confirmed",
+        "created_at": datetime.utcnow(),
+        "idempotency_key": idempotency_key(session_id, ctx),
+    }
+
+
+def _insert_ignoring_duplicates(dialect: str):
+    """INSERT que descarta las filas con una clave de idempotencia ya guardada."""
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+
+    return (
+        dialect_insert(Appointment)
+        .on_conflict_do_nothing(index_elements=[Appointment.idempotency_key])
+        .returning(Appointment.date, Appointment.half_day, Appointment.status)
+    )
+
+
+async def insert_appointments(db: AsyncSession, rows: list[dict]) -> int:
+    """Inserta las citas y actualiza los agregados; devuelve cuántas eran nuevas."""
+    # reintentos dentro del mismo lote: basta con la primera
+    seen: set[str] = set()
+    unique = []
+    for r in rows:
+        key = r.get("idempotency_key")
+        if key is not None:
+            if key in seen:
+                continue
+            seen.add(key)
+        unique.append({**r, "idempotency_key": key})
+
+    # executemany: SQLAlchemy lo agrupa en INSERTs multi-fila; RETURNING solo
+    # devuelve las insertadas, que son las que cuentan en los agregados
+    result = await db.execute(_insert_ignoring_duplicates(db.bind.dialect.name), unique)
+    inserted = result.all()
+
+    # agregados diarios en la misma transacción
+    deltas = availability_deltas((d, h, status) for d, h, status in inserted)
+    if deltas:
+        await db.execute(availability_upsert(db.bind.dialect.name, deltas))
+
+    await db.commit()
+    calendar_cache.clear()
+    return len(inserted)
 
 
-def get_all_appointments(db: Session):
-    return db.query(Appointment).order_by(Appointment.created_at.desc()).all()
+async def conflicting_rows(db: AsyncSession, rows: list[dict]) -> list[dict]:
+    """
+    Filas de `rows` que no están guardadas tal cual tras un INSERT con
+    descartes: su clave la tiene otra cita (otro día u hora) o no está.
+    Las que coinciden son un reintento de la misma cita y cuentan como guardadas.
+    """
+    keys = [r["idempotency_key"] for r in rows if r.get("idempotency_key")]
+    result = await db.execute(
+        select(Appointment.idempotency_key, Appointment.date, Appointment.time)
+        .where(Appointment.idempotency_key.in_(keys))
+    )
+    stored = {key: (d, t) for key, d, t in result}
+    return [r for r in rows if r.get("idempotency_key") and stored.get(r["idempotency_key"]) != (r["date"], r["time"])]
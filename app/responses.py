@@ -0,0 +1,80 @@
+# app/responses.py
+"""
+Respuestas JSON ya codificadas para los endpoints calientes.
+
+Las respuestas constantes del bot (app.replies) se codifican una vez al
+importar; por petición solo se añade el sessionId. Los listados de citas se
+codifican directamente desde las filas SQL, sin pasar por Pydantic, con el
+mismo codificador en todos los motores (nada de JSON construido en la BD).
+Mismo formato que JSONResponse: UTF-8 sin escapes y sin espacios.
+"""
+import json
+import re
+import uuid
+from datetime import date, datetime, time
+
+from fastapi import Response
+
+from app import replies
+
+_dumps = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+# sessionIds que no necesitan escapado (uuid, ids de pasarela habituales)
+_SAFE_ID = re.compile(r"[A-Za-z0-9_.:\-]*\Z")
+
+
+def _reply_prefix(text: str) -> bytes:
+    return b'{"reply":' + _dumps(text).encode() + b',"sessionId":'
+
+
+# texto constante -> bytes hasta el sessionId
+_PREFIXES: dict[str, bytes] = {
+    value: _reply_prefix(value)
+    for name, value in vars(replies).items()
+    if name.isupper() and isinstance(value, str)
+}
+
+
+def _json_string(value: str) -> bytes:
+    if _SAFE_ID.match(value):
+        return b'"' + value.encode() + b'"'
+    return _dumps(value).encode()
+
+
+def encode_reply(text: str, session_id: str) -> bytes:
+    """{"reply": text, "sessionId": session_id} en bytes."""
+    prefix = _PREFIXES.get(text)
+    if prefix is None:
+        # texto con datos del usuario (resumen, saludo): se codifica entero
+        prefix = _reply_prefix(text)
+    return prefix + _json_string(session_id) + b"}"
+
+
+def chat_reply(text: str, session_id: str) -> Response:
+    return Response(content=encode_reply(text, session_id), media_type="application/json")
+
+
+def chat_batch(items: list[tuple[str, str]]) -> Response:
+    """items: (texto, session_id) en orden."""
+    body = b'{"items":[' + b",".join(encode_reply(t, sid) for t, sid in items) + b"]}"
+    return Response(content=body, media_type="application/json")
+
+
+# =========================
+# LISTADOS DE CITAS
+# =========================
+def plain(value):
+    """Valor de una columna listo para JSON/CSV (también lo usa app.exporter)."""
+    if isinstance(value, (date, time, datetime)):   # datetime es subclase de date
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+    return value
+
+
+def appointment_page(columns: tuple[str, ...], rows: list, next_cursor: str | None) -> Response:
+    """Página de citas desde filas SQL (tuplas en el orden de `columns`)."""
+    items = [dict(zip(columns, map(plain, row))) for row in rows]
+    body = _dumps({"items": items, "next_cursor": next_cursor}).encode()
+    return Response(content=body, media_type="application/json")
+
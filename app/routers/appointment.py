@@ -1,15 +1,127 @@
-from fastapi import APIRouter, Depends
-from sqlalchemy.orm import Session
+from __future__ import annotations
 
-from app.database import get_db
-from app.repositories.appointments import get_all_appointments
-from app.schemas.appointment import AppointmentResponse
+import io
+import uuid
+from datetime import date
+from typing import TYPE_CHECKING, Literal
+
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+
+from app.database import get_db, get_read_db
+from app.occupancy import occupancy
+from app.model.appointment_status import AppointmentStatus
+from app.responses import appointment_page
+from app.schemas.appointment import AppointmentPage, AppointmentResponse, AppointmentStatusUpdate
+from app.writebehind import writer
+
+# el ORM y los repositorios se importan en cada endpoint: no los paga el arranque
+if TYPE_CHECKING:
+    from sqlalchemy.orm import Session
 
 router = APIRouter(
     prefix="/appointments",
     tags=["Appointments"]
 )
 
-@router.get("/", response_model=list[AppointmentResponse])
-def list_appointments(db: Session = Depends(get_db)):
-    return get_all_appointments(db)
+@router.get("/", response_model=AppointmentPage)
+def list_appointments(
+    limit: int = Query(50, ge=1, le=500),
+    cursor: str | None = None,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    status: AppointmentStatus | None = None,
+    half_day: Literal["mañana", "tarde"] | None = None,
+    db: Session = Depends(get_read_db),
+):
+    from app.repositories.appointments import PAGE_COLUMNS, InvalidCursor, list_appointments_page
+
+    # response_model queda para la documentación: la respuesta sale ya codificada
+    # (filas SQL → JSON sin pasar por Pydantic)
+    try:
+        items, next_cursor = list_appointments_page(
+            db,
+            limit=limit,
+            cursor=cursor,
+            date_from=date_from,
+            date_to=date_to,
+            status=status.value if status else None,
+            half_day=half_day,
+        )
+    except InvalidCursor:
+        raise HTTPException(status_code=400, detail="Cursor no válido")
+
+    return appointment_page(PAGE_COLUMNS, items, next_cursor)
+
+
+@router.get("/export")
+def export_appointments(
+    format: Literal["csv", "ndjson"] = "csv",
+    date_from: date | None = None,
+    date_to: date | None = None,
+):
+    # import perezoso: solo lo paga quien exporta, no el arranque
+    from app.exporter import MEDIA_TYPES, iter_export
+
+    return StreamingResponse(
+        iter_export(format, date_from, date_to),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="appointments.{format}"'},
+    )
+
+
+MAX_REPORTED_REJECTS = 1000
+
+
+@router.post("/import")
+async def import_appointments(file: UploadFile, format: Literal["csv", "ndjson"] | None = None):
+    from app.importer import Reject, detect_format, import_stream
+
+    fmt = format or detect_format(file.filename)
+
+    # el total de rechazos se cuenta siempre; el detalle, solo los primeros
+    rejects: list[dict] = []
+
+    def collect(r: "Reject") -> None:
+        if len(rejects) < MAX_REPORTED_REJECTS:
+            rejects.append({"line": r.line, "error": r.error})
+
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    result = await run_in_threadpool(import_stream, stream, fmt, on_reject=collect)
+
+    return {
+        "imported": result.imported,
+        "skipped": result.skipped,
+        "rejected": result.rejected,
+        "rejects": rejects,
+    }
+
+
+@router.patch("/{appointment_id}/status", response_model=AppointmentResponse)
+def change_status(
+    appointment_id: uuid.UUID,
+    body: AppointmentStatusUpdate,
+    db: Session = Depends(get_db),
+):
+    from app.repositories.appointments import slot_is_booked, update_appointment_status
+
+    appointment = update_appointment_status(db, appointment_id, body.status.value)
+    if appointment is None:
+        raise HTTPException(status_code=404, detail="Cita no encontrada")
+
+    # el hueco queda libre (u ocupado de nuevo) para el bot de este worker; se
+    # mira en la BD: otra cita confirmada puede seguir en la misma franja
+    ordinal = appointment.date.toordinal()
+    minutes = appointment.time.hour * 60 + appointment.time.minute
+    if slot_is_booked(db, appointment.date, minutes):
+        occupancy.mark(ordinal, minutes)
+    else:
+        occupancy.release(ordinal, minutes)
+
+    return AppointmentResponse.model_validate(appointment)
+
+
+@router.get("/queue/stats")
+def write_queue_stats():
+    return writer.stats()
@@ -0,0 +1,44 @@
+from __future__ import annotations
+
+from datetime import date, timedelta
+
+from fastapi import APIRouter, Header, HTTPException, Query, Response
+
+from app.availability import build_calendar, calendar_cache
+from app.database import ReadSessionLocal
+
+router = APIRouter(
+    prefix="/availability",
+    tags=["Availability"]
+)
+
+MAX_RANGE_DAYS = 92
+
+
+@router.get("")
+def get_availability(
+    date_from: date = Query(alias="from"),
+    date_to: date = Query(alias="to"),
+    if_none_match: str | None = Header(default=None),
+):
+    if date_to < date_from:
+        raise HTTPException(status_code=400, detail="'to' debe ser igual o posterior a 'from'")
+    if date_to - date_from > timedelta(days=MAX_RANGE_DAYS):
+        raise HTTPException(status_code=400, detail=f"Rango máximo: {MAX_RANGE_DAYS} días")
+
+    key = (date_from, date_to)
+    cached = calendar_cache.get(key)
+    if cached is None:
+        from app.repositories.appointments import availability_range   # ORM solo si no hay caché
+
+        # la sesión también: un acierto de caché no abre ninguna
+        with ReadSessionLocal() as db:
+            rows = availability_range(db, date_from, date_to)
+        days = build_calendar(rows, date_from, date_to)
+        cached = calendar_cache.put(key, days)
+    body, etag = cached
+
+    headers = {"ETag": etag, "Cache-Control": "private, max-age=30"}
+    if if_none_match == etag:
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
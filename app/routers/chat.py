@@ -0,0 +1,145 @@
+import asyncio
+import json
+import logging
+import uuid
+
+from fastapi import APIRouter, HTTPException, Request, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
+from pydantic import BaseModel, Field
+
+from app.admission import Rejected, admission
+from app.chat_service import handle_batch, handle_message, session_exists
+from app.config import settings
+from app.context_store import store
+from app.push import push
+from app.responses import chat_batch as batch_response, chat_reply
+
+log = logging.getLogger(__name__)
+
+router = APIRouter(tags=["Chat"])
+
+
+# ---------- input ----------
+class ChatIn(BaseModel):
+    message: str
+    sessionId: str | None = None
+
+
+class ChatBatchIn(BaseModel):
+    items: list[ChatIn] = Field(min_length=1, max_length=500)
+
+
+def _client_ip(conn: Request | WebSocket) -> str | None:
+    return conn.client.host if conn.client else None
+
+
+# ---------- endpoints ----------
+# Rejected (429/503) lo convierte en respuesta el handler de app.main
+@router.post("/chat")
+async def chat(m: ChatIn, request: Request):
+    sid = m.sessionId or str(uuid.uuid4())
+    with admission.admit(_client_ip(request), [sid]):
+        reply = await handle_message(sid, m.message)
+    return chat_reply(reply.text, sid)
+
+
+@router.post("/chat/batch")
+async def chat_batch(batch: ChatBatchIn, request: Request):
+    sids = [m.sessionId or str(uuid.uuid4()) for m in batch.items]
+    with admission.admit(_client_ip(request), sids):
+        results = await handle_batch([(sid, m.message) for sid, m in zip(sids, batch.items)])
+    return batch_response([(reply.text, sid) for sid, reply in zip(sids, results)])
+
+
+# ---------- conexión persistente ----------
+async def _pump(ws: WebSocket, outbox: asyncio.Queue) -> None:
+    # único escritor del socket: respuestas y avisos del servidor salen en orden
+    while True:
+        await ws.send_text(json.dumps(await outbox.get(), ensure_ascii=False))
+
+
+@router.websocket("/chat/ws")
+async def chat_ws(ws: WebSocket, sessionId: str | None = None):
+    """
+    Una sesión por conexión. El cliente envía {"message": "..."} y recibe
+    {"type": "reply", ...} por cada mensaje, más los avisos del servidor
+    ({"type": "saved", ...} cuando la cita llega a BD).
+    """
+    sid = sessionId or str(uuid.uuid4())
+    ip = _client_ip(ws)
+    try:
+        admission.check(ip, [sid])
+    except Rejected as exc:
+        await ws.close(code=1013, reason=exc.reason)   # 1013: inténtalo más tarde
+        return
+    await ws.accept()
+    prepaid = True   # la comprobación al conectar ya cobró el primer mensaje
+
+    with push.subscribe(sid) as outbox:
+        outbox.put_nowait({"type": "session", "sessionId": sid})
+        sender = asyncio.create_task(_pump(ws, outbox))
+        try:
+            while True:
+                try:
+                    data = json.loads(await ws.receive_text())
+                    message = data["message"]
+                    if not isinstance(message, str):
+                        raise TypeError(message)
+                except (ValueError, KeyError, TypeError):
+                    await outbox.put({"type": "error", "detail": 'Se espera {"message": "..."}'})
+                    continue
+
+                try:
+                    # un cobro por mensaje: el primero ya lo pagó la conexión
+                    admitted = admission.slot() if prepaid else admission.admit(ip, [sid])
+                    prepaid = False
+                    with admitted:
+                        reply = await handle_message(sid, message)
+                except Rejected as exc:
+                    await outbox.put({"type": "error", "detail": exc.reason, "retryAfter": exc.retry_after})
+                    continue
+                except Exception:
+                    log.exception("Error en el turno de la sesión %s", sid)
+                    await outbox.put({"type": "error", "detail": "Error interno"})
+                    continue
+                await outbox.put({"type": "reply", "reply": reply.text, "sessionId": sid})
+        except WebSocketDisconnect:
+            pass
+        finally:
+            sender.cancel()
+            await asyncio.gather(sender, return_exceptions=True)
+
+
+@router.get("/chat/events")
+async def chat_events(sessionId: str, request: Request):
+    """
+    Alternativa con SSE para clientes sin WebSocket: los mensajes se siguen
+    enviando por POST /chat y aquí llegan los avisos del servidor.
+    Mismas reglas que /chat: admisión por IP y sesión, y el sessionId tiene
+    que ser el de una sesión abierta (no se crean sesiones desde aquí).
+    """
+    admission.check(_client_ip(request), [sessionId])
+    if not await session_exists(sessionId):
+        raise HTTPException(status_code=404, detail="Sesión no encontrada")
+
+    async def stream():
+        with push.subscribe(sessionId) as outbox:
+            yield ": conectado\n\n"
+            while True:
+                try:
+                    msg = await asyncio.wait_for(outbox.get(), settings.sse_ping_seconds)
+                except asyncio.TimeoutError:
+                    yield ": ping\n\n"   # mantiene viva la conexión en el proxy
+                    continue
+                yield f"event: {msg['type']}\ndata: {json.dumps(msg, ensure_ascii=False)}\n\n"
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/sessions/stats")
+def sessions_stats():
+    return store.stats()
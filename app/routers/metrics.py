@@ -0,0 +1,70 @@
+from fastapi import APIRouter
+from fastapi.responses import PlainTextResponse
+
+from app import metrics
+from app.admission import admission
+from app.context_store import store
+from app.eventlog import event_log
+from app.llm.fallback import get_fallback
+from app.normalizers.date import normalize_date
+from app.normalizers.time import normalize_time
+from app.push import push
+from app.writebehind import writer
+
+router = APIRouter(tags=["Metrics"])
+
+# ---------- valores que mantienen otros componentes ----------
+if not store.blocking:
+    # con el store SQL sería un count(*) por scrape sobre una tabla compartida:
+    # ese tamaño se mira en /sessions/stats, no en cada scrape
+    metrics.GaugeFunc("chat_sessions_live", "Sesiones de chat en el store", store.size)
+metrics.CounterFunc("chat_session_evictions_total", "Sesiones expulsadas por LRU", lambda: store.evictions)
+metrics.CounterFunc("chat_session_expirations_total", "Sesiones caducadas por TTL", lambda: store.expirations)
+metrics.CounterFunc("chat_session_hits_total", "Lecturas de sesión encontradas", lambda: store.hits)
+metrics.CounterFunc("chat_session_misses_total", "Lecturas de sesión nuevas o caducadas", lambda: store.misses)
+
+metrics.GaugeFunc("appointment_queue_depth", "Citas pendientes en la cola write-behind",
+                  lambda: writer.stats()["queue_depth"])
+metrics.GaugeFunc("appointment_spilled_rows", "Citas en el volcado local pendientes de BD",
+                  lambda: writer.spilled_rows)
+metrics.GaugeFunc("appointment_unsaved_rows", "Citas que no han llegado ni a la BD ni al volcado",
+                  lambda: writer.stats()["unsaved_rows"])
+metrics.CounterFunc("appointment_rejected_rows_total", "Citas descartadas por clave de idempotencia ajena",
+                    lambda: writer.rejected_rows)
+
+metrics.GaugeFunc("chat_turns_inflight", "Turnos de chat en curso en este worker", lambda: admission.inflight)
+
+metrics.CounterFunc("chat_events_recorded_total", "Turnos añadidos al registro de eventos",
+                    lambda: event_log.recorded)
+metrics.CounterFunc("chat_events_dropped_total", "Turnos perdidos por anillo lleno", lambda: event_log.dropped)
+metrics.CounterFunc("chat_events_written_total", "Turnos escritos en segmentos", lambda: event_log.written)
+
+metrics.GaugeFunc("chat_push_connections", "Conexiones WebSocket/SSE abiertas", push.size)
+metrics.CounterFunc("chat_push_dropped_total", "Avisos descartados por cola llena", lambda: push.dropped)
+
+metrics.CounterFunc("normalizer_date_cache_hits_total", "Aciertos de cache de normalize_date",
+                    lambda: normalize_date.cache_info()["hits"])
+metrics.CounterFunc("normalizer_date_cache_misses_total", "Fallos de cache de normalize_date",
+                    lambda: normalize_date.cache_info()["misses"])
+metrics.CounterFunc("normalizer_time_cache_hits_total", "Aciertos de cache de normalize_time",
+                    lambda: normalize_time.cache_info()["hits"])
+metrics.CounterFunc("normalizer_time_cache_misses_total", "Fallos de cache de normalize_time",
+                    lambda: normalize_time.cache_info()["misses"])
+
+
+def _llm(field: str):
+    def value() -> float:
+        fallback = get_fallback()
+        return fallback.stats()[field] if fallback else 0
+    return value
+
+
+metrics.CounterFunc("llm_fallback_calls_total", "Llamadas al modelo de fallback", _llm("calls"))
+metrics.CounterFunc("llm_fallback_failures_total", "Llamadas fallidas o con timeout", _llm("failures"))
+metrics.CounterFunc("llm_fallback_skipped_total", "Llamadas evitadas (breaker o concurrencia)", _llm("skipped"))
+metrics.CounterFunc("llm_fallback_cache_hits_total", "Respuestas servidas desde la cache", _llm("cache_hits"))
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+def get_metrics():
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
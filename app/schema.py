@@ -0,0 +1,185 @@
+# app/schema.py
+"""
+Versión del esquema de BD.
+
+Las migraciones se ejecutan fuera de banda (`python -m app.create_tables`);
+los workers solo comprueban, una vez por proceso, que la versión es la
+esperada. Con SCHEMA_AUTO_MIGRATE=1 (desarrollo, benchmarks) migran ellos.
+La tabla de sesiones del store SQL lleva su propia cadena (SESSION_MIGRATIONS).
+"""
+import logging
+from typing import Callable
+
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, select, text
+from sqlalchemy.engine import Connection, Engine
+
+from app.config import settings
+
+log = logging.getLogger(__name__)
+
+_metadata = MetaData()
+
+schema_version = Table(
+    "schema_version",
+    _metadata,
+    Column("version", Integer, nullable=False),
+)
+
+
+class SchemaOutdated(RuntimeError):
+    pass
+
+
+# =========================
+# MIGRACIONES
+# =========================
+def _create_indexes(conn: Connection, ddl: tuple[str, ...]) -> None:
+    # SQL fijo, no los índices del modelo: cada migración crea los de su versión
+    # aunque el modelo cambie después (IF NOT EXISTS vale en Postgres y SQLite)
+    for statement in ddl:
+        conn.execute(text(statement))
+
+
+_V1_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS ix_appointments_created_at_id ON appointments (created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_appointments_status_created_at_id ON appointments (status, created_at, id)",
+    "CREATE INDEX IF NOT EXISTS ix_appointments_date_created_at_id ON appointments (date, created_at, id)",
+)
+
+
+def _v1_initial(conn: Connection) -> None:
+    from app.models import Base
+
+    Base.metadata.create_all(conn)
+    # create_all no añade índices a tablas que ya existían
+    _create_indexes(conn, _V1_INDEXES)
+
+
+def _v2_daily_availability(conn: Connection) -> None:
+    from app import models
+
+    models.DailyAvailability.__table__.create(conn, checkfirst=True)
+    conn.execute(text(
+        "INSERT INTO daily_availability (date, half_day, booked) "
+        "SELECT date, half_day, COUNT(*) FROM appointments "
+        "WHERE status IS NULL OR status <> 'cancelled' "
+        "GROUP BY date, half_day"
+    ))
+
+
+def _v3_idempotency_key(conn: Connection) -> None:
+    from sqlalchemy import inspect
+
+    columns = {c["name"] for c in inspect(conn).get_columns("appointments")}
+    if "idempotency_key" not in columns:
+        conn.execute(text("ALTER TABLE appointments ADD COLUMN idempotency_key VARCHAR"))
+    _create_indexes(conn, (
+        "CREATE UNIQUE INDEX IF NOT EXISTS ux_appointments_idempotency_key ON appointments (idempotency_key)",
+    ))
+
+
+def _v4_conversation_events(conn: Connection) -> None:
+    from app import models
+
+    models.ConversationEvent.__table__.create(conn, checkfirst=True)
+
+
+def _v5_page_indexes(conn: Connection) -> None:
+    # (created_at, id, date) sustituye a (created_at, id): sirve el mismo orden
+    # y filtra un rango de fechas dentro del índice; half_day tenía que ir a la tabla
+    _create_indexes(conn, (
+        "CREATE INDEX IF NOT EXISTS ix_appointments_created_at_id_date ON appointments (created_at, id, date)",
+        "CREATE INDEX IF NOT EXISTS ix_appointments_half_day_created_at_id ON appointments (half_day, created_at, id)",
+    ))
+    conn.execute(text("DROP INDEX IF EXISTS ix_appointments_created_at_id"))
+
+
+MIGRATIONS: list[Callable[[Connection], None]] = [
+    _v1_initial,
+    _v2_daily_availability,
+    _v3_idempotency_key,
+    _v4_conversation_events,
+    _v5_page_indexes,
+]
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+
+# =========================
+# SESIONES DE CHAT (store SQL)
+# =========================
+# `chat_sessions` puede estar en otra BD (SESSION_STORE_URL): lleva su propia versión.
+session_schema_version = Table(
+    "session_schema_version",
+    _metadata,
+    Column("version", Integer, nullable=False),
+)
+
+chat_sessions = Table(
+    "chat_sessions",
+    MetaData(),
+    Column("session_id", String, primary_key=True),
+    Column("data", LargeBinary, nullable=False),
+    Column("expires_at", Float, nullable=False, index=True),
+    Column("version", Integer, nullable=False, default=1),   # compare-and-swap
+)
+
+
+def _s1_chat_sessions(conn: Connection) -> None:
+    chat_sessions.create(conn, checkfirst=True)
+
+
+def _s2_chat_sessions_version(conn: Connection) -> None:
+    from sqlalchemy import inspect
+
+    columns = {c["name"] for c in inspect(conn).get_columns("chat_sessions")}
+    if "version" not in columns:
+        conn.execute(text("ALTER TABLE chat_sessions ADD COLUMN version INTEGER NOT NULL DEFAULT 1"))
+
+
+SESSION_MIGRATIONS: list[Callable[[Connection], None]] = [
+    _s1_chat_sessions,
+    _s2_chat_sessions_version,
+]
+
+
+# =========================
+# EJECUCIÓN / COMPROBACIÓN
+# =========================
+def current_version(conn: Connection, table: Table = schema_version) -> int:
+    table.create(conn, checkfirst=True)
+    return conn.execute(select(table.c.version)).scalar() or 0
+
+
+def migrate(engine: Engine, migrations: list = MIGRATIONS, table: Table = schema_version) -> int:
+    target_version = len(migrations)
+    with engine.begin() as conn:
+        version = current_version(conn, table)
+        for target, step in enumerate(migrations[version:], start=version + 1):
+            log.info("Migrando %s a la versión %d", table.name, target)
+            step(conn)
+        if version != target_version:
+            conn.execute(table.delete())
+            conn.execute(table.insert().values(version=target_version))
+    return target_version
+
+
+def ensure_schema(engine: Engine, migrations: list = MIGRATIONS, table: Table = schema_version) -> None:
+    if settings.schema_auto_migrate:
+        migrate(engine, migrations, table)
+        return
+
+    with engine.connect() as conn:
+        version = conn.execute(select(table.c.version)).scalar() if _has_table(conn, table) else 0
+
+    if version != len(migrations):
+        raise SchemaOutdated(
+            f"{table.name} en versión {version}, se espera {len(migrations)}: "
+            "ejecuta `python -m app.create_tables`"
+        )
+
+
+def _has_table(conn: Connection, table: Table) -> bool:
+    from sqlalchemy import inspect
+
+    return inspect(conn).has_table(table.name)
@@ -2,6 +2,8 @@ from pydantic import BaseModel
 from datetime import date, time, datetime
 from uuid import UUID
 
+from app.model.appointment_status import AppointmentStatus
+
 
 class AppointmentResponse(BaseModel):
     id: UUID
@@ -16,3 +18,12 @@ class AppointmentResponse(BaseModel):
 
     class Config:
         from_attributes = True  # 👈 MUY IMPORTANTE con SQLAlchemy 2
+
+
+class AppointmentPage(BaseModel):
+    items: list[AppointmentResponse]
+    next_cursor: str | None = None
+
+
+class AppointmentStatusUpdate(BaseModel):
+    status: AppointmentStatus
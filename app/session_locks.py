@@ -0,0 +1,46 @@
+# app/session_locks.py
+"""
+Orden por sesión dentro de un worker: dos mensajes con el mismo sessionId
+(doble toque, reintento de la pasarela) se procesan uno detrás de otro.
+Entre workers lo garantiza el compare-and-swap del store compartido.
+"""
+import asyncio
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+
+class SessionLocks:
+    """asyncio.Lock por sessionId; se descarta en cuanto nadie lo espera."""
+
+    def __init__(self):
+        # session_id -> [lock, usuarios (dentro o esperando)]
+        self._locks: dict[str, list] = {}
+
+    @asynccontextmanager
+    async def hold(self, *session_ids: str) -> AsyncIterator[None]:
+        # siempre en el mismo orden: dos lotes con sesiones comunes no se bloquean
+        entries = []
+        for sid in sorted(set(session_ids)):
+            entry = self._locks.setdefault(sid, [asyncio.Lock(), 0])
+            entry[1] += 1
+            entries.append((sid, entry))
+
+        acquired: list[asyncio.Lock] = []
+        try:
+            for _, (lock, _) in entries:
+                await lock.acquire()
+                acquired.append(lock)
+            yield
+        finally:
+            for lock in reversed(acquired):
+                lock.release()
+            for sid, entry in entries:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[sid]
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+
+session_locks = SessionLocks()
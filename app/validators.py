@@ -0,0 +1,58 @@
+# app/validators.py
+import re
+import time
+
+from app.metrics import NORMALIZER_LATENCY
+from app.normalizers import date as _date
+from app.normalizers import time as _time
+
+__all__ = [
+    "PHONE_RE",
+    "is_valid_phone",
+    "is_valid_name",
+    "is_valid_reason",
+    "normalize_date",
+    "normalize_time",
+    "normalize_utterance",
+]
+
+PHONE_RE = re.compile(r"^[69]\d{8}$")
+
+MIN_NAME_LEN = 2
+MIN_REASON_LEN = 3
+
+
+def normalize_date(text: str) -> str | None:
+    t0 = time.perf_counter()
+    try:
+        return _date.normalize_date(text)
+    finally:
+        NORMALIZER_LATENCY.observe(time.perf_counter() - t0, "date")
+
+
+def normalize_time(text: str) -> str | None:
+    t0 = time.perf_counter()
+    try:
+        return _time.normalize_time(text)
+    finally:
+        NORMALIZER_LATENCY.observe(time.perf_counter() - t0, "time")
+
+
+def normalize_utterance(text: str) -> _date.Parsed:
+    t0 = time.perf_counter()
+    try:
+        return _date.normalize_utterance(text)
+    finally:
+        NORMALIZER_LATENCY.observe(time.perf_counter() - t0, "date")
+
+
+def is_valid_phone(text: str) -> bool:
+    return bool(PHONE_RE.fullmatch(text.strip()))
+
+
+def is_valid_name(text: str) -> bool:
+    return len(text) >= MIN_NAME_LEN
+
+
+def is_valid_reason(text: str) -> bool:
+    return len(text) >= MIN_REASON_LEN
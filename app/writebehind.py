@@ -0,0 +1,240 @@
+# app/writebehind.py
+"""
+Cola write-behind de citas confirmadas.
+
+Las citas se encolan (cola acotada: si se llena, `submit` espera) y se
+insertan en lotes al llegar a `batch_size` o tras `flush_interval` segundos.
+Si la BD falla, el lote se vuelca a un fichero NDJSON local y se reintenta
+entero en el siguiente flush que funcione; si tampoco se puede escribir el
+fichero, el lote se queda en memoria y va con el siguiente. El bucle nunca
+muere por un error de E/S. `stop()` vacía la cola.
+Tras cada lote guardado se avisa a las sesiones por el canal push.
+"""
+import asyncio
+import json
+import logging
+import os
+import time as _time
+import uuid
+from datetime import date, datetime, time
+
+from app.config import settings
+from app.database import AsyncSessionLocal
+from app.metrics import DB_WRITE_LATENCY
+from app.push import notify_saved
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+def _encode(row: dict) -> str:
+    return json.dumps(
+        {k: v.isoformat() if isinstance(v, (date, time, datetime)) else str(v) if isinstance(v, uuid.UUID) else v
+         for k, v in row.items()},
+        ensure_ascii=False,
+    )
+
+
+def _decode(line: str) -> dict:
+    row = json.loads(line)
+    row["id"] = uuid.UUID(row["id"])
+    row["date"] = date.fromisoformat(row["date"])
+    row["time"] = time.fromisoformat(row["time"])
+    row["created_at"] = datetime.fromisoformat(row["created_at"])
+    return row
+
+
+class AppointmentWriter:
+    def __init__(
+        self,
+        session_factory,
+        *,
+        max_queue: int,
+        batch_size: int,
+        flush_interval: float,
+        spill_path: str,
+    ):
+        self._session_factory = session_factory
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self._max_queue = max_queue
+        self._queue: asyncio.Queue | None = None
+        self._task: asyncio.Task | None = None
+        # citas que no llegaron ni a la BD ni al volcado: van en el siguiente flush
+        self._unsaved: list[dict] = []
+
+        # métricas
+        self.flushes = 0
+        self.flushed_rows = 0
+        self.failed_flushes = 0
+        self.spilled_rows = 0
+        self.failed_spills = 0
+        self.rejected_rows = 0
+        self.last_flush_ms = 0.0
+        self.max_flush_ms = 0.0
+        self.total_flush_ms = 0.0
+
+    @property
+    def running(self) -> bool:
+        return self._task is not None and not self._task.done()
+
+    # ---------- ciclo de vida ----------
+    async def start(self) -> None:
+        if self.running:
+            return
+        self._queue = asyncio.Queue(maxsize=self._max_queue)
+        self._task = asyncio.create_task(self._run(), name="appointment-writer")
+        await self._replay_spill()
+
+    async def stop(self) -> None:
+        if not self.running:
+            return
+        await self._queue.put(_STOP)
+        await self._task
+        self._task = None
+
+    async def submit(self, row: dict) -> None:
+        await self._queue.put(row)
+
+    # ---------- bucle ----------
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        stopping = False
+        while not stopping:
+            item = await self._queue.get()
+            if item is _STOP:
+                break
+            batch = [item]
+            deadline = loop.time() + self.flush_interval
+
+            while len(batch) < self.batch_size:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    item = await asyncio.wait_for(self._queue.get(), timeout)
+                except asyncio.TimeoutError:
+                    break
+                if item is _STOP:
+                    stopping = True
+                    break
+                batch.append(item)
+
+            await self._flush(batch)
+
+        if self._unsaved:
+            await self._flush([])   # último intento al parar
+        if self._unsaved:
+            # sin BD ni disco: que al menos queden en el log para recuperarlas a mano
+            for row in self._unsaved:
+                log.critical("Cita sin guardar: %s", _encode(row))
+
+    async def _flush(self, batch: list[dict]) -> None:
+        batch, self._unsaved = self._unsaved + batch, []
+        t0 = _time.perf_counter()
+        try:
+            async with self._session_factory() as db:
+                saved = await self._insert(db, batch)
+        except Exception:
+            self.failed_flushes += 1
+            log.exception("Fallo guardando %d citas; se vuelcan a %s", len(batch), self.spill_path)
+            try:
+                await asyncio.to_thread(self._spill, batch)
+            except Exception:
+                self.failed_spills += 1
+                self._unsaved = batch
+                log.critical(
+                    "No se pudo volcar %d citas a %s; siguen en memoria hasta el próximo lote",
+                    len(batch), self.spill_path, exc_info=True,
+                )
+            return
+
+        elapsed = (_time.perf_counter() - t0) * 1000
+        DB_WRITE_LATENCY.observe(elapsed / 1000, "write_behind")
+        self.flushes += 1
+        self.flushed_rows += len(batch)
+        self.last_flush_ms = elapsed
+        self.max_flush_ms = max(self.max_flush_ms, elapsed)
+        self.total_flush_ms += elapsed
+        notify_saved(saved)
+
+        if self.spilled_rows:
+            await self._replay_spill()
+
+    async def _insert(self, db, rows: list[dict]) -> list[dict]:
+        """Inserta y devuelve las filas guardadas; las de clave ajena se registran y no se avisan."""
+        from app.repositories.appointments import conflicting_rows, insert_appointments   # ORM en el primer lote
+
+        if await insert_appointments(db, rows) == len(rows):
+            return rows
+        rejected = {id(r) for r in await conflicting_rows(db, rows)}
+        if rejected:
+            self.rejected_rows += len(rejected)
+            log.error("%d citas descartadas: su clave de idempotencia ya es de otra cita", len(rejected))
+        return [r for r in rows if id(r) not in rejected]
+
+    # ---------- fichero de volcado ----------
+    def _spill(self, batch: list[dict]) -> None:
+        with open(self.spill_path, "a", encoding="utf-8") as f:
+            for row in batch:
+                f.write(_encode(row) + "\n")
+            f.flush()
+            os.fsync(f.fileno())
+        self.spilled_rows += len(batch)
+
+    async def _replay_spill(self) -> None:
+        if not os.path.exists(self.spill_path):
+            self.spilled_rows = 0
+            return
+
+        try:
+            with open(self.spill_path, encoding="utf-8") as f:
+                rows = [_decode(line) for line in f if line.strip()]
+        except (OSError, ValueError, KeyError):
+            log.exception("No se pudo leer el volcado %s; se reintenta en el próximo lote", self.spill_path)
+            return
+
+        try:
+            # todo o nada: si falla, el fichero sigue intacto para el siguiente intento
+            async with self._session_factory() as db:
+                saved = await self._insert(db, rows)
+        except Exception:
+            log.warning("La BD sigue sin aceptar las %d citas volcadas", len(rows))
+            self.spilled_rows = len(rows)
+            return
+
+        try:
+            os.remove(self.spill_path)
+        except OSError:
+            # se volverán a insertar: la clave de idempotencia evita duplicados
+            log.exception("No se pudo borrar el volcado %s", self.spill_path)
+        self.flushed_rows += len(rows)
+        self.spilled_rows = 0
+        notify_saved(saved)
+        log.info("Recuperadas %d citas del volcado local", len(rows))
+
+    def stats(self) -> dict:
+        return {
+            "queue_depth": self._queue.qsize() if self._queue else 0,
+            "flushes": self.flushes,
+            "flushed_rows": self.flushed_rows,
+            "failed_flushes": self.failed_flushes,
+            "spilled_rows": self.spilled_rows,
+            "failed_spills": self.failed_spills,
+            "unsaved_rows": len(self._unsaved),
+            "rejected_rows": self.rejected_rows,
+            "last_flush_ms": round(self.last_flush_ms, 3),
+            "max_flush_ms": round(self.max_flush_ms, 3),
+            "avg_flush_ms": round(self.total_flush_ms / self.flushes, 3) if self.flushes else 0.0,
+        }
+
+
+writer = AppointmentWriter(
+    AsyncSessionLocal,
+    max_queue=settings.write_behind_max_queue,
+    batch_size=settings.write_behind_batch_size,
+    flush_interval=settings.write_behind_flush_ms / 1000,
+    spill_path=settings.write_behind_spill_path,
+)
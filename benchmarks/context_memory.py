@@ -0,0 +1,72 @@
+"""
+Memoria por sesión: ChatContext anterior (__dict__ + strings) frente al compacto.
+
+    python -m benchmarks.context_memory [N]
+"""
+import sys
+import tracemalloc
+
+from app.context import ChatContext
+from app.state import ChatState
+
+
+class LegacyChatContext:
+    # copia de la representación anterior, solo para comparar
+    def __init__(self):
+        self.state = ChatState.START
+        self.name = None
+        self.phone = None
+        self.reason = None
+        self.date_text = None
+        self.time_text = None
+        self.half_day = None
+        self.date_iso = None
+        self.time_24h = None
+
+
+def _fresh(text: str) -> str:
+    # como en producción: cada valor llega como string nuevo (JSON, isoformat, f-string)
+    return text.encode().decode()
+
+
+def _fill(ctx, i: int) -> None:
+    # sesión "típica" a mitad de flujo, con textos distintos por sesión
+    ctx.state = ChatState.CONFIRMATION
+    ctx.name = f"Usuario {i}"
+    ctx.phone = f"6{i:08d}"
+    ctx.reason = f"Revisión {i}"
+    ctx.date_text = _fresh("el viernes")
+    ctx.time_text = _fresh("10:30")
+    ctx.half_day = _fresh("mañana")
+    ctx.date_iso = _fresh("2026-10-23")
+    ctx.time_24h = _fresh("10:30")
+
+
+def bytes_per_session(cls, n: int) -> float:
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    sessions = {}
+    for i in range(n):
+        ctx = cls()
+        _fill(ctx, i)
+        sessions[f"s{i}"] = ctx
+    after = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    return (after - before) / n
+
+
+def main(n: int = 100_000) -> None:
+    legacy = bytes_per_session(LegacyChatContext, n)
+    compact = bytes_per_session(ChatContext, n)
+
+    sample = ChatContext()
+    _fill(sample, 0)
+
+    print(f"sesiones:            {n}")
+    print(f"antes   (bytes/ses): {legacy:8.1f}")
+    print(f"después (bytes/ses): {compact:8.1f}  ({compact / legacy:.0%})")
+    print(f"serializado (bytes): {len(sample.to_bytes()):8d}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,111 @@
+"""
+Implementaciones anteriores de los normalizadores, solo como referencia
+para el oráculo y las mediciones de benchmarks.normalizers:
+
+- `normalize_date` / `normalize_time`: el antiguo `app/normalize.py`.
+- `regex_date` / `regex_time`: la cascada de expresiones regulares de
+  `app.normalizers` antes del analizador de una pasada.
+"""
+import re
+from datetime import date, datetime, timedelta
+
+from app.normalizers.parser import MONTHS, WEEKDAYS, _next_weekday, _safe_date
+
+
+# =========================
+# app/normalize.py
+# =========================
+def normalize_date(text: str) -> str | None:
+    t = text.lower().strip()
+
+    today = datetime.now().date()
+
+    if t == "hoy":
+        return today.isoformat()
+
+    if t == "mañana":
+        return (today + timedelta(days=1)).isoformat()
+
+    # dd/mm o dd-mm
+    m = re.match(r"(\d{1,2})[/-](\d{1,2})", t)
+    if m:
+        day, month = map(int, m.groups())
+        year = today.year
+        return datetime(year, month, day).date().isoformat()
+
+    # dd de mes
+    m = re.match(r"(\d{1,2}) de (\w+)", t)
+    if m:
+        months = {
+            "enero": 1, "febrero": 2, "marzo": 3, "abril": 4,
+            "mayo": 5, "junio": 6, "julio": 7, "agosto": 8,
+            "septiembre": 9, "octubre": 10, "noviembre": 11, "diciembre": 12
+        }
+        day = int(m.group(1))
+        month = months.get(m.group(2))
+        if month:
+            return datetime(today.year, month, day).date().isoformat()
+
+    return None
+
+
+def normalize_time(text: str) -> str | None:
+    t = text.strip()
+
+    # 10 → 10:00
+    if re.fullmatch(r"\d{1,2}", t):
+        return f"{int(t):02d}:00"
+
+    # 10:30
+    if re.fullmatch(r"\d{1,2}:\d{2}", t):
+        h, m = map(int, t.split(":"))
+        if 0 <= h <= 23 and 0 <= m <= 59:
+            return f"{h:02d}:{m:02d}"
+
+    return None
+
+
+# =========================
+# CASCADA DE REGEX
+# =========================
+TIME_RE = re.compile(r"^([01]?\d|2[0-3])(:[0-5]\d)?$")
+
+
+def regex_date(text: str, base: date) -> str | None:
+    raw = " ".join(text.lower().split())
+
+    if raw in ("hoy",):
+        return base.isoformat()
+    if raw in ("mañana", "manana"):
+        return (base + timedelta(days=1)).isoformat()
+    if raw in ("pasado mañana", "pasado manana"):
+        return (base + timedelta(days=2)).isoformat()
+
+    m_wd = re.fullmatch(r"(?:el\s+)?(lunes|martes|miercoles|miércoles|jueves|viernes|sabado|sábado|domingo)", raw)
+    if m_wd:
+        return _next_weekday(WEEKDAYS[m_wd.group(1)], base).isoformat()
+
+    m_num = re.fullmatch(r"(\d{1,2})/(\d{1,2})(?:/(\d{4}))?", raw)
+    m_txt = re.fullmatch(
+        r"(\d{1,2})\s*(?:de\s+)?(enero|febrero|marzo|abril|mayo|junio|julio|agosto|septiembre|setiembre|octubre|noviembre|diciembre)(?:\s+de\s+(\d{4}))?",
+        raw
+    )
+    if m_num:
+        d, m, year = int(m_num.group(1)), int(m_num.group(2)), m_num.group(3)
+    elif m_txt:
+        d, m, year = int(m_txt.group(1)), MONTHS[m_txt.group(2)], m_txt.group(3)
+    else:
+        return None
+
+    y = int(year) if year else base.year
+    candidate = _safe_date(y, m, d)
+    if candidate and year is None and candidate < base:
+        candidate = _safe_date(y + 1, m, d)
+    return candidate.isoformat() if candidate else None
+
+
+def regex_time(text: str) -> str | None:
+    m = TIME_RE.match(text.strip())
+    if not m:
+        return None
+    return f"{int(m.group(1)):02d}{m.group(2) or ':00'}"
@@ -0,0 +1,223 @@
+"""
+Prueba de carga de conversaciones completas contra la app FastAPI, en proceso
+y sin red (httpx + ASGITransport) sobre una SQLite temporal.
+
+Cada conversación recorre START → CONFIRMED con errores y ediciones
+(CHANGE_WHAT) y reserva un día propio, así que ninguna choca con otra. Tras
+cada respuesta se comprueba el estado real de la sesión contra el guion: la
+latencia se apunta en el estado en que se procesó el mensaje y solo cuentan
+como citas las conversaciones que llegan de verdad a CONFIRMED. Informa
+throughput y p50/p95/p99 por estado y por nivel de concurrencia.
+
+    python -m benchmarks.load_chat [--levels 1,10,50] [--conversations 200]
+"""
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import sys
+import tempfile
+import time
+from collections import defaultdict
+from datetime import date, timedelta
+
+
+def _configure_env(db_path: str) -> None:
+    # antes de importar la app: la configuración se lee al importar
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SESSION_BACKEND", "memory")
+    os.environ.setdefault("SCHEMA_AUTO_MIGRATE", "1")   # BD temporal: se migra al primer uso
+    os.environ.setdefault("SLOW_QUERY_SAMPLE_RATE", "0")
+    os.environ.setdefault("WRITE_BEHIND_SPILL_PATH", f"{db_path}.spill.ndjson")
+    os.environ.setdefault("ADMISSION_ENABLED", "0")   # todo llega de una IP y sin pausas
+    os.environ.setdefault("EVENT_LOG_DIR", os.path.join(os.path.dirname(db_path), "events"))
+
+
+# =========================
+# GUIONES
+# =========================
+_MONTH_NAMES = (
+    "enero", "febrero", "marzo", "abril", "mayo", "junio",
+    "julio", "agosto", "septiembre", "octubre", "noviembre", "diciembre",
+)
+
+
+def _say_date(rng: random.Random, day: date) -> str:
+    if rng.random() < 0.5:
+        return f"{day.day:02d}/{day.month:02d}/{day.year}"
+    return f"{day.day} de {_MONTH_NAMES[day.month - 1]} de {day.year}"
+
+
+def _script(rng: random.Random, i: int, day: date) -> list[tuple[str, str]]:
+    """
+    Lista de (estado esperado, mensaje) para una conversación. La cita acaba
+    el día `day`, que no comparte con ninguna otra conversación.
+    """
+    half_day = rng.choice(("mañana", "tarde"))
+    hour = rng.randint(9, 13) if half_day == "mañana" else rng.randint(15, 19)
+    wrong_hour = 17 if half_day == "mañana" else 10
+    edits = rng.random() < 0.5
+
+    steps = [
+        ("START", "hola"),
+        ("ASK_NAME", f"Paciente {i}"),
+    ]
+    if rng.random() < 0.3:
+        steps.append(("ASK_PHONE", "12345"))
+    steps += [
+        ("ASK_PHONE", f"6{rng.randint(0, 99_999_999):08d}"),
+        ("ASK_REASON", rng.choice(("revisión", "dolor de muelas", "limpieza dental"))),
+    ]
+    if rng.random() < 0.3:
+        steps.append(("ASK_DATE", "cuando pueda"))
+    # con ediciones, el primer día es cualquiera: la cita queda en el editado
+    first_day = rng.choice(("mañana", "el viernes", "20/01", "3 de marzo", "pasado mañana"))
+    steps += [
+        ("ASK_DATE", first_day if edits else _say_date(rng, day)),
+        ("ASK_HALF_DAY", half_day),
+    ]
+    if rng.random() < 0.3:
+        steps.append(("ASK_TIME", str(wrong_hour)))
+    steps.append(("ASK_TIME", f"{hour}:{rng.choice(('00', '15', '30', '45'))}"))
+
+    if edits:
+        steps += [
+            ("CONFIRMATION", "no"),
+            ("CHANGE_WHAT", "1"),
+            ("ASK_DATE_EDIT", _say_date(rng, day)),
+            ("CONFIRMATION", "no"),
+            ("CHANGE_WHAT", "2"),
+            ("ASK_TIME_EDIT", f"{hour}:30"),
+            ("CONFIRMATION", "no"),
+            ("CHANGE_WHAT", "3"),
+            ("ASK_REASON_EDIT", "revisión anual"),
+        ]
+    steps.append(("CONFIRMATION", "sí"))
+    return steps
+
+
+# =========================
+# EJECUCIÓN
+# =========================
+async def _run_level(client, store, concurrency: int, conversations: int, seed: int, first_day: date) -> dict:
+    rng = random.Random(seed)
+    scripts = [_script(rng, i, first_day + timedelta(days=i)) for i in range(conversations)]
+    queue: asyncio.Queue = asyncio.Queue()
+    for s in scripts:
+        queue.put_nowait(s)
+
+    latencies: dict[str, list[float]] = defaultdict(list)
+    errors = 0      # respuestas no 200
+    diverged = 0    # la sesión no está en el estado que espera el guion
+    confirmed = 0
+
+    def state_of(sid: str | None) -> str:
+        # mismo proceso y store en memoria: el estado real de la sesión
+        return "START" if sid is None else store.get(sid).state.value
+
+    async def worker(w: int) -> None:
+        nonlocal errors, diverged, confirmed
+        while True:
+            try:
+                script = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            sid = None
+            for expected, message in script:
+                state = state_of(sid)
+                if state != expected:
+                    diverged += 1
+                    break
+                t0 = time.perf_counter()
+                resp = await client.post("/chat", json={"message": message, "sessionId": sid})
+                latencies[state].append(time.perf_counter() - t0)
+                if resp.status_code != 200:
+                    errors += 1
+                    break
+                sid = resp.json()["sessionId"]
+            else:
+                if state_of(sid) == "CONFIRMED":
+                    confirmed += 1
+                else:
+                    diverged += 1
+
+    t0 = time.perf_counter()
+    await asyncio.gather(*(worker(w) for w in range(concurrency)))
+    elapsed = time.perf_counter() - t0
+
+    requests = sum(len(v) for v in latencies.values())
+    return {
+        "concurrency": concurrency,
+        "elapsed": elapsed,
+        "requests": requests,
+        "conversations": conversations,
+        "confirmed": confirmed,
+        "errors": errors,
+        "diverged": diverged,
+        "latencies": latencies,
+    }
+
+
+def _pct(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    k = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered) + 0.5) - 1))
+    return ordered[k]
+
+
+def _report(result: dict) -> None:
+    lat = result["latencies"]
+    every = [v for values in lat.values() for v in values]
+    print(
+        f"\n== concurrencia {result['concurrency']}: "
+        f"{result['requests'] / result['elapsed']:.0f} req/s, "
+        f"{result['confirmed'] / result['elapsed']:.1f} citas/s "
+        f"({result['confirmed']}/{result['conversations']} confirmadas), "
+        f"{result['errors']} errores, {result['diverged']} fuera de guion"
+    )
+    print(f"{'estado':<18}{'n':>7}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}")
+    for state in sorted(lat, key=lambda s: -statistics.mean(lat[s])):
+        values = lat[state]
+        print(f"{state:<18}{len(values):>7}"
+              f"{_pct(values, 50) * 1000:>10.2f}{_pct(values, 95) * 1000:>10.2f}{_pct(values, 99) * 1000:>10.2f}")
+    print(f"{'TOTAL':<18}{len(every):>7}"
+          f"{_pct(every, 50) * 1000:>10.2f}{_pct(every, 95) * 1000:>10.2f}{_pct(every, 99) * 1000:>10.2f}")
+
+
+async def main(levels: list[int], conversations: int, seed: int) -> int:
+    import httpx
+
+    from app.context_store import store
+    from app.main import app
+
+    failed = False
+    # cada conversación su día, sin repetir entre niveles y después de los
+    # días compartidos del guion ("mañana", "20/01"...), que caen antes de un año
+    first_day = date.today() + timedelta(days=400)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await _run_level(client, store, 1, 5, seed, first_day)   # calentamiento
+            first_day += timedelta(days=5)
+            for level in levels:
+                result = await _run_level(client, store, level, conversations, seed + level, first_day)
+                first_day += timedelta(days=conversations)
+                _report(result)
+                failed |= result["errors"] > 0 or result["confirmed"] != conversations
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--levels", default="1,10,50,100")
+    parser.add_argument("--conversations", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(os.path.join(tmp, "load.db"))
+        sys.exit(asyncio.run(main(
+            [int(x) for x in args.levels.split(",")],
+            args.conversations,
+            args.seed,
+        )))
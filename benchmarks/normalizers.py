@@ -0,0 +1,381 @@
+"""
+Microbenchmark y oráculo de los normalizadores de fecha/hora.
+
+- Mide ns/llamada sobre un corpus de expresiones en español (válidas e
+  inválidas) para `app.normalizers` (con y sin cache) y las implementaciones
+  anteriores de benchmarks.legacy_normalizers (`app/normalize.py` y la
+  cascada de regex).
+- Fija el comportamiento con una tabla de resultados esperados a fecha fija.
+- Todo lo que entendía la cascada de regex debe dar el mismo resultado con el
+  analizador de una pasada; lo nuevo se cuenta como ampliación.
+- Compara con `app/normalize.py` y asigna cada diferencia a un motivo de una
+  lista cerrada; una diferencia que no encaja en ninguno hace fallar la
+  ejecución.
+- `--check` compara en la misma ejecución el camino nuevo con el anterior
+  (GATES): no depende de una línea base guardada en la máquina de nadie.
+
+    python -m benchmarks.normalizers                   # informe
+    python -m benchmarks.normalizers --check [--threshold 0.25]
+"""
+import argparse
+import re
+import sys
+import time
+from datetime import date, datetime
+from unittest import mock
+
+from app.normalizers import date as date_mod
+from app.normalizers import time as time_mod
+from app.normalizers.fuzzy import Vocabulary, fold
+from app.normalizers.parser import HOUR_WORDS, Parsed
+from benchmarks import legacy_normalizers as legacy
+
+REF = date(2026, 3, 10)   # martes
+
+MONTHS = list(date_mod.MONTHS)
+WEEKDAYS = list(date_mod.WEEKDAYS)
+
+
+# =========================
+# CORPUS
+# =========================
+def date_corpus() -> list[str]:
+    out = ["hoy", "mañana", "manana", "pasado mañana", "pasado manana", "Mañana", "  HOY  ", "pasado   mañana"]
+    for wd in WEEKDAYS:
+        out += [wd, f"el {wd}", f"El {wd.capitalize()}", f"el  {wd}"]
+    for m in range(1, 14):
+        for d in (0, 1, 9, 15, 28, 29, 30, 31, 32):
+            out += [f"{d}/{m}", f"{d:02d}/{m:02d}", f"{d}/{m}/2027", f"{d}-{m}"]
+    for name in MONTHS:
+        for d in (1, 15, 29, 30, 31):
+            out += [f"{d} de {name}", f"{d} {name}", f"{d} de {name} de 2027", f"{d} De {name.capitalize()}"]
+    out += [
+        "", "   ", "ayer", "la semana que viene", "el finde", "20/01/27", "2026-03-20",
+        "20 de eneroo", "20 de febreo", "20 de abirl", "viernes 20", "el próximo lunes", "31 de febrero",
+        "cuando pueda", "lo antes posible", "20/01 por la tarde", "01/01/1999", "el 20",
+        "el viernes a las 10", "mañana por la tarde", "esta tarde", "el día 31", "dos de mayo",
+        "el lunes que viene a las cinco y media de la tarde", "viernes 21",
+    ]
+    return out
+
+
+def time_corpus() -> list[str]:
+    out = []
+    for h in range(0, 26):
+        out += [str(h), f"{h:02d}", f"{h}:00", f"{h}:30", f"{h:02d}:45", f" {h}:15 "]
+    out += ["", "10h", "10.30", "10:60", "10:5", "a las 10", "diez", "10 y media", "mediodía", "17:15:00", "-1"]
+    out += [
+        "a las cinco y media de la tarde", "a la una del mediodía", "las 10 menos cuarto",
+        "sobre las 6 de la tarde", "10 de la mañana", "a las once en punto", "una cita",
+    ]
+    return out
+
+
+# =========================
+# ORÁCULO
+# =========================
+GOLDEN_DATES = {
+    "hoy": "2026-03-10",
+    "mañana": "2026-03-11",
+    "Pasado  Mañana": "2026-03-12",
+    "martes": "2026-03-17",          # mismo día de la semana => +7
+    "el viernes": "2026-03-13",
+    "el lunes": "2026-03-16",
+    "miercoles": "2026-03-11",
+    "sábado": "2026-03-14",
+    "20/01": "2027-01-20",           # ya pasó => año siguiente
+    "10/03": "2026-03-10",
+    "20/03/2026": "2026-03-20",
+    "1/1/2025": "2025-01-01",        # año explícito: se respeta
+    "29/02": None,                   # 2026 y 2027 no son bisiestos
+    "31/04": None,
+    "3 de marzo": "2027-03-03",
+    "20 de enero de 2027": "2027-01-20",
+    "15 setiembre": "2026-09-15",
+    "31 de febrero": None,
+    "31/02": None,                   # sin excepción
+    "20-01": None,
+    "2026-03-20": None,
+    "el 20": "2026-03-20",
+    "el día 31": "2026-03-31",
+    "viernes 20": "2026-03-20",
+    "viernes 21": None,              # el 21 no es viernes
+    "el próximo lunes": "2026-03-16",
+    "esta tarde": "2026-03-10",
+    "20 de abirl": "2026-04-20",     # erratas en nombres de mes/día
+    "20 de febreo": None,            # errata y ya pasó: no se salta al año siguiente
+    "el vierns": "2026-03-13",
+    "mñana": "2026-03-11",
+    "cuando pueda": None,
+    "": None,
+}
+
+GOLDEN_TIMES = {
+    "10": "10:00",
+    "9": "09:00",
+    "09:30": "09:30",
+    " 17:15 ": "17:15",
+    "23:59": "23:59",
+    "24": None,
+    "10:60": None,
+    "10:5": None,
+    "10h": "10:00",
+    "diez": "10:00",
+    "a las cinco y media de la tarde": "17:30",
+    "las 10 menos cuarto": "09:45",
+    "mediodía": "12:00",
+    "a la una del mediodía": "13:00",
+    "a las 12 de la noche": "00:00",
+    "17:15:00": None,
+    "-1": None,
+    "una cita": None,
+}
+
+GOLDEN_UTTERANCES = {
+    "el viernes a las 10": Parsed("2026-03-13", "10:00", None),
+    "mañana por la tarde": Parsed("2026-03-11", None, "tarde"),
+    "mañana por la mañana a las 9": Parsed("2026-03-11", "09:00", "mañana"),
+    "el 20 a las cinco y media de la tarde": Parsed("2026-03-20", "17:30", "tarde"),
+    "hoy o mañana": Parsed(),        # dos fechas: no se adivina
+    "por las mañanas": Parsed(None, None, "mañana"),   # franja, no "mañana" con errata
+    "quiero cita el vierns": Parsed("2026-03-13", None, None),
+    "cita para el 2 de abrl": Parsed("2026-04-02", None, None),
+}
+
+HALF_DAYS = Vocabulary({"mañana": "mañana", "tarde": "tarde"})
+GOLDEN_FUZZY = {
+    "mañana": "mañana",
+    "Tarde": "tarde",
+    "tarde!": "tarde",
+    "¡MAÑANA!": "mañana",
+    "mñana": "mañana",
+    "trade": "tarde",               # transposición
+    "tardes": "tarde",
+    "noche": None,
+    "mtarde": "tarde",
+    "ma": None,                     # corta: solo exacta
+}
+FUZZY_TYPOS = ["mñana", "manaña", "trade", "tardee", "Tarde!", "mañanaa", "noche", "xyz"]
+
+
+def _legacy_date(text: str) -> str | None | Exception:
+    class _Frozen(datetime):
+        @classmethod
+        def now(cls, tz=None):
+            return datetime(REF.year, REF.month, REF.day, 12, 0)
+
+    with mock.patch.object(legacy, "datetime", _Frozen):
+        try:
+            return legacy.normalize_date(text)
+        except Exception as exc:   # la versión antigua revienta con días inválidos
+            return exc
+
+
+# Diferencias con app/normalize.py, enumeradas. Cada motivo es una forma
+# cerrada de texto (con `fold`: sin tildes ni mayúsculas); lo que no encaje
+# en ninguna es una diferencia sin explicar y hace fallar el oráculo.
+_LEGACY_MONTHS = ("enero", "febrero", "marzo", "abril", "mayo", "junio", "julio",
+                  "agosto", "septiembre", "octubre", "noviembre", "diciembre")
+_WD = "|".join(sorted({fold(w) for w in WEEKDAYS}))
+_MONTH = "|".join(_LEGACY_MONTHS)
+_NUMBER_WORD = "|".join(HOUR_WORDS)
+
+# piezas de frase: un día, una hora o una franja ("el viernes", "a las cinco y media", "por la tarde")
+_DAY = rf"hoy|(pasado )?manana|(el )?(proximo )?({_WD})( que viene)?|el (dia )?\d{{1,2}}|\d{{1,2}}/\d{{1,2}}"
+_HOUR = rf"a las? (\d{{1,2}}(:\d{{2}})?|{_NUMBER_WORD})( y (media|cuarto)| menos cuarto)?"
+_HALF = r"(por|de) la (manana|tarde|noche)"
+
+# la antigua da fecha (o excepción) y la nueva no
+_LEGACY_ONLY = (
+    ("antigua: acepta el separador '-'", re.compile(r"\d{1,2}-\d{1,2}")),
+    ("antigua: lee dd/mm/aa como dd/mm (prefijo con re.match)", re.compile(r"\d{1,2}/\d{1,2}/\d{2}")),
+)
+
+# la nueva da fecha y la antigua no
+_NEW_ONLY = (
+    ("nueva: 'manana' sin tilde y 'pasado mañana'", re.compile(r"(pasado )?manana")),
+    ("nueva: día de la semana", re.compile(rf"(el )?(proximo )?({_WD})")),
+    ("nueva: 'D mes' sin 'de'", re.compile(rf"\d{{1,2}} ({_MONTH})")),
+    ("nueva: 'setiembre'", re.compile(r"\d{1,2} (de )?setiembre( de \d{4})?")),
+    ("nueva: día del mes suelto", re.compile(rf"el (dia )?\d{{1,2}}|({_WD}) \d{{1,2}}")),
+    # una palabra que no es un mes donde se espera uno: la nueva la corrige
+    ("nueva: errata en el mes", re.compile(rf"\d{{1,2}} (de )?(?!({_MONTH}|setiembre)$)[a-z]{{4,11}}")),
+    ("nueva: día en letras", re.compile(rf"({_NUMBER_WORD}) de ({_MONTH})( de \d{{4}})?")),
+    ("nueva: fecha dentro de una frase", re.compile(
+        rf"esta (manana|tarde)|({_DAY})( ({_HOUR}|{_HALF}))+"
+    )),
+)
+
+
+def _classify(text: str, new: str | None, old) -> str | None:
+    """Motivo conocido de la diferencia, o None si no hay explicación."""
+    t = fold(text)
+    if isinstance(old, Exception):
+        # datetime() con un día o mes imposible; la nueva lo rechaza sin más
+        return "antigua: excepción con fecha imposible" if new is None else None
+
+    if new is not None and old is not None:
+        # mismo día y mes: la antigua siempre usa el año en curso
+        if new[4:] != old[4:] or old[:4] != str(REF.year):
+            return None
+        year = re.search(r"\b\d{4}\b", text)
+        if year:
+            return "antigua: ignora el año explícito" if year.group() == new[:4] else None
+        if old < REF.isoformat() and int(new[:4]) == REF.year + 1:
+            return "antigua: no pasa al año siguiente"
+        return None
+
+    for reason, pattern in _LEGACY_ONLY if new is None else _NEW_ONLY:
+        if pattern.fullmatch(text.strip() if new is None else t):
+            return reason
+    return None
+
+
+def check_oracle() -> bool:
+    ok = True
+
+    for text, expected in GOLDEN_DATES.items():
+        got = date_mod.normalize_date(text, today=REF)
+        if got != expected:
+            ok = False
+            print(f"✗ normalize_date({text!r}) = {got!r}, esperado {expected!r}")
+    for text, expected in GOLDEN_TIMES.items():
+        got = time_mod._parse(text.strip())
+        if got != expected:
+            ok = False
+            print(f"✗ normalize_time({text!r}) = {got!r}, esperado {expected!r}")
+    for text, expected in GOLDEN_UTTERANCES.items():
+        got = date_mod.normalize_utterance(text, today=REF)
+        if got != expected:
+            ok = False
+            print(f"✗ normalize_utterance({text!r}) = {got!r}, esperado {expected!r}")
+
+    for text, expected in GOLDEN_FUZZY.items():
+        got = HALF_DAYS.lookup(text)
+        if got != expected:
+            ok = False
+            print(f"✗ fuzzy({text!r}) = {got!r}, esperado {expected!r}")
+
+    # lo que entendía la cascada de regex no cambia
+    widened = 0
+    for kind, corpus, new_fn, old_fn in (
+        ("fecha", date_corpus(), lambda t: date_mod.normalize_date(t, today=REF), lambda t: legacy.regex_date(t, REF)),
+        ("hora", time_corpus(), lambda t: time_mod._parse(t.strip()), legacy.regex_time),
+    ):
+        for text in corpus:
+            new, old = new_fn(text), old_fn(text)
+            if old is None:
+                widened += new is not None
+            elif new != old:
+                ok = False
+                print(f"✗ {kind} {text!r}: analizador={new!r} regex={old!r}")
+    print(f"analizador frente a la cascada de regex: {widened} expresiones nuevas entendidas")
+
+    reasons: dict[str, int] = {}
+    agree = 0
+    for text in date_corpus():
+        new = date_mod.normalize_date(text, today=REF)
+        old = _legacy_date(text)
+        if new == old:
+            agree += 1
+            continue
+        reason = _classify(text, new, old)
+        if reason is None:
+            ok = False
+            print(f"✗ diferencia sin explicar: {text!r}: nueva={new!r} antigua={old!r}")
+            continue
+        reasons[reason] = reasons.get(reason, 0) + 1
+
+    print(f"\noráculo normalize_date frente a app/normalize.py: {agree} coinciden")
+    for reason, n in sorted(reasons.items(), key=lambda kv: -kv[1]):
+        print(f"  {n:5d}  {reason}")
+    return ok
+
+
+# =========================
+# TIEMPOS
+# =========================
+def _ns_per_call(fn, corpus: list[str], min_seconds: float = 0.3) -> float:
+    calls = 0
+    t0 = time.perf_counter_ns()
+    deadline = t0 + int(min_seconds * 1e9)
+    while True:
+        for text in corpus:
+            fn(text)
+        calls += len(corpus)
+        now = time.perf_counter_ns()
+        if now >= deadline:
+            return (now - t0) / calls
+
+
+def _swallow(fn):
+    def call(text):
+        try:
+            return fn(text)
+        except Exception:
+            return None
+    return call
+
+
+# caso -> camino anterior con el que se compara en la misma ejecución
+GATES = {
+    "date.uncached": "date.regex",
+    "time.uncached": "time.regex",
+    "utterance.uncached": "date.regex",
+    "date.cached": "date.uncached",
+    "time.cached": "time.uncached",
+    "fuzzy.typo": "fuzzy.uncached",
+}
+
+
+def measure(rounds: int = 3) -> dict[str, float]:
+    """ns/llamada de cada caso: el mejor de `rounds` vueltas intercaladas (la máquina hace ruido)."""
+    dates, times = date_corpus(), time_corpus()
+    date_mod.normalize_date.cache_clear()
+    time_mod.normalize_time.cache_clear()
+
+    cases = {
+        "date.cached": (date_mod.normalize_date, dates),
+        "date.uncached": (lambda t: date_mod.normalize_date(t, today=REF), dates),
+        "date.regex": (lambda t: legacy.regex_date(t, REF), dates),
+        "date.legacy": (_swallow(legacy.normalize_date), dates),
+        "utterance.uncached": (lambda t: date_mod.normalize_utterance(t, today=REF), dates + times),
+        "time.cached": (time_mod.normalize_time, times),
+        "time.uncached": (lambda t: time_mod._parse(t.strip()), times),
+        "time.regex": (legacy.regex_time, times),
+        "time.legacy": (legacy.normalize_time, times),
+        "fuzzy.exact": (HALF_DAYS.lookup, ["mañana", "tarde"]),
+        "fuzzy.typo": (HALF_DAYS.lookup, FUZZY_TYPOS),
+        "fuzzy.uncached": (lambda t: HALF_DAYS._search(fold(t)), FUZZY_TYPOS),
+    }
+    best = dict.fromkeys(cases, float("inf"))
+    for _ in range(rounds):
+        for name, (fn, corpus) in cases.items():
+            best[name] = min(best[name], _ns_per_call(fn, corpus, min_seconds=0.1))
+    return best
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Benchmark de normalizadores")
+    parser.add_argument("--check", action="store_true", help="falla si un camino nuevo es más lento que el anterior")
+    parser.add_argument("--threshold", type=float, default=0.25, help="margen tolerado (0.25 = 25%%)")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    ok = check_oracle()
+
+    results = measure(args.rounds)
+    print(f"\n{'caso':<20}{'ns/llamada':>12}  {'frente a':<16}{'Δ':>7}")
+    for name, ns in results.items():
+        ref = GATES.get(name)
+        delta = f"{(ns / results[ref] - 1):+.0%}" if ref else ""
+        print(f"{name:<20}{ns:>12.0f}  {ref or '':<16}{delta:>7}")
+        if args.check and ref and ns > results[ref] * (1 + args.threshold):
+            ok = False
+            print(f"✗ {name}: {ns:.0f} ns/llamada, más lento que {ref} ({results[ref]:.0f}, +{args.threshold:.0%})")
+
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,137 @@
+"""
+Codificación de respuestas: JSONResponse/Pydantic (anterior) frente a los
+bytes precodificados de app.responses. Comprueba además que ambos caminos
+producen exactamente el mismo JSON.
+
+    python -m benchmarks.responses [--rows 500] [--repeat 200]
+"""
+import argparse
+import os
+import random
+import sys
+import tempfile
+import timeit
+import uuid
+from datetime import date, datetime, time, timedelta
+
+
+def _configure_env(db_path: str) -> None:
+    # antes de importar la app: la configuración se lee al importar
+    os.environ["DATABASE_URL"] = f"sqlite:///{db_path}"
+    os.environ.setdefault("SCHEMA_AUTO_MIGRATE", "1")
+    os.environ.setdefault("SLOW_QUERY_SAMPLE_RATE", "0")
+
+
+def _seed(n: int) -> None:
+    from sqlalchemy import insert
+
+    from app.database import SessionLocal, prepare_database
+    from app.models import Appointment
+
+    prepare_database()
+    rng = random.Random(7)
+    start = datetime(2026, 1, 1, 9)
+    rows = [
+        {
+            "id": uuid.uuid4(),
+            "name": f"Paciente {i} Núñez",
+            "phone": f"6{rng.randint(0, 99_999_999):08d}",
+            "reason": rng.choice(("revisión", "dolor de muelas", 'limpieza "urgente"')),
+            "date": date(2026, 1, 1) + timedelta(days=i % 90),
+            "time": time(rng.randint(9, 19), rng.choice((0, 15, 30, 45))),
+            "half_day": rng.choice(("mañana", "tarde")),
+            "status": "confirmed",
+            "created_at": start + timedelta(seconds=i, microseconds=rng.randint(0, 999_999)),
+        }
+        for i in range(n)
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(Appointment), rows)
+        db.commit()
+
+
+# =========================
+# CAMINOS ANTERIORES
+# =========================
+def _legacy_reply(text: str, sid: str) -> bytes:
+    from fastapi.responses import JSONResponse
+
+    return JSONResponse({"reply": text, "sessionId": sid}).body
+
+
+def _legacy_page(db, limit: int) -> bytes:
+    from fastapi.encoders import jsonable_encoder
+    from fastapi.responses import JSONResponse
+    from sqlalchemy import select
+
+    from app.models import Appointment
+    from app.schemas.appointment import AppointmentPage, AppointmentResponse
+
+    stmt = select(Appointment).order_by(Appointment.created_at.desc(), Appointment.id.desc()).limit(limit + 1)
+    items = list(db.scalars(stmt))[:limit]
+    page = AppointmentPage(items=[AppointmentResponse.model_validate(a) for a in items], next_cursor=None)
+    return JSONResponse(jsonable_encoder(page)).body
+
+
+def _new_page(db, limit: int) -> bytes:
+    from app.repositories.appointments import PAGE_COLUMNS, list_appointments_page
+    from app.responses import appointment_page
+
+    rows, _ = list_appointments_page(db, limit=limit)
+    return appointment_page(PAGE_COLUMNS, rows, None).body
+
+
+# =========================
+# MEDICIÓN
+# =========================
+def _us(fn, repeat: int) -> float:
+    return min(timeit.repeat(fn, number=repeat, repeat=5)) / repeat * 1e6
+
+
+def main(rows: int, repeat: int) -> int:
+    from app import replies
+    from app.database import SessionLocal
+    from app.responses import encode_reply
+
+    _seed(rows)
+    sid = str(uuid.uuid4())
+    ok = True
+
+    # ---------- /chat ----------
+    constants = [v for k, v in vars(replies).items() if k.isupper() and isinstance(v, str)]
+    for text in constants + ["Encantado, Ana. ¿Me indicas tu teléfono?"]:
+        for session_id in (sid, 'raro "id"\\'):
+            if encode_reply(text, session_id) != _legacy_reply(text, session_id):
+                ok = False
+                print(f"✗ respuesta distinta para {text[:30]!r} / {session_id!r}")
+
+    text = replies.GREETING
+    legacy = _us(lambda: _legacy_reply(text, sid), repeat * 50)
+    new = _us(lambda: encode_reply(text, sid), repeat * 50)
+    print(f"{'caso':<28}{'anterior µs':>12}{'nuevo µs':>12}{'x':>7}")
+    print(f"{'/chat respuesta constante':<28}{legacy:>12.2f}{new:>12.2f}{legacy / new:>7.1f}")
+
+    # ---------- /appointments ----------
+    with SessionLocal() as db:
+        if _legacy_page(db, rows) != _new_page(db, rows):
+            ok = False
+            print("✗ la página de citas no coincide con la de Pydantic")
+
+        legacy = _us(lambda: _legacy_page(db, rows), max(1, repeat // 10))
+        new = _us(lambda: _new_page(db, rows), max(1, repeat // 10))
+    label = f"/appointments ({rows} filas)"
+    print(f"{label:<28}{legacy:>12.0f}{new:>12.0f}{legacy / new:>7.1f}")
+
+    print("\n✓ mismo JSON en ambos caminos" if ok else "\n✗ hay diferencias")
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=500)
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        _configure_env(os.path.join(tmp, "bench.db"))
+        sys.exit(main(args.rows, args.repeat))
@@ -0,0 +1,82 @@
+"""
+Tiempo de arranque: import de la app, startup y primeras respuestas.
+
+Cada muestra es un proceso nuevo (como un pod recién escalado) contra una
+SQLite ya migrada fuera de banda. Mide:
+- import   : `import app.main`
+- startup  : eventos de arranque (lifespan; comprueba el esquema en un hilo)
+- 1ª /chat : primer mensaje (no toca la BD)
+- 1ª BD    : primer GET /appointments/ (importa el ORM y abre la conexión)
+
+    python -m benchmarks.startup [--runs 10]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+_PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+from app.main import app
+t_import = time.perf_counter()
+
+import httpx
+
+async def run():
+    async with app.router.lifespan_context(app):
+        t_startup = time.perf_counter()
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            await client.post("/chat", json={"message": "hola"})
+            t_chat = time.perf_counter()
+            r = await client.get("/appointments/", params={"limit": 1})
+            assert r.status_code == 200, r.text
+            t_db = time.perf_counter()
+    return t_startup, t_chat, t_db
+
+t_startup, t_chat, t_db = asyncio.run(run())
+print(json.dumps({
+    "import": t_import - t0,
+    "startup": t_startup - t_import,
+    "first_chat": t_chat - t_startup,
+    "first_db": t_db - t_chat,
+    "total": t_db - t0,
+}))
+"""
+
+
+def main(runs: int) -> None:
+    with tempfile.TemporaryDirectory() as tmp:
+        env = dict(
+            os.environ,
+            DATABASE_URL=f"sqlite:///{os.path.join(tmp, 'startup.db')}",
+            SLOW_QUERY_SAMPLE_RATE="0",
+            WRITE_BEHIND_SPILL_PATH=os.path.join(tmp, "spill.ndjson"),
+            EVENT_LOG_DIR=os.path.join(tmp, "events"),
+        )
+        # migración fuera de banda, como en un despliegue
+        subprocess.run([sys.executable, "-m", "app.create_tables"], cwd=ROOT, env=env, check=True,
+                       stdout=subprocess.DEVNULL)
+
+        samples: dict[str, list[float]] = {}
+        for _ in range(runs):
+            out = subprocess.run([sys.executable, "-c", _PROBE], cwd=ROOT, env=env, check=True,
+                                 capture_output=True, text=True).stdout
+            for key, value in json.loads(out.strip().splitlines()[-1]).items():
+                samples.setdefault(key, []).append(value * 1000)
+
+    print(f"{'fase':<12}{'mediana ms':>12}{'mín ms':>10}{'máx ms':>10}   ({runs} procesos)")
+    for key, values in samples.items():
+        print(f"{key:<12}{statistics.median(values):>12.1f}{min(values):>10.1f}{max(values):>10.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark de arranque en frío")
+    parser.add_argument("--runs", type=int, default=10)
+    main(parser.parse_args().runs)
@@ -0,0 +1,56 @@
+import os
+import tempfile
+
+import pytest
+
+# antes de importar la app: la configuración se lee al importar
+_TMP = tempfile.mkdtemp(prefix="jotaai-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{_TMP}/app.db"
+os.environ["SESSION_BACKEND"] = "memory"
+os.environ["SESSION_STORE_URL"] = f"sqlite:///{_TMP}/sessions.db"
+os.environ["SCHEMA_AUTO_MIGRATE"] = "1"
+os.environ["SLOW_QUERY_SAMPLE_RATE"] = "0"
+os.environ["WRITE_BEHIND_SPILL_PATH"] = f"{_TMP}/appointments.spill.ndjson"
+os.environ["EVENT_LOG_DIR"] = f"{_TMP}/events"
+os.environ["LLM_FALLBACK_ENABLED"] = "0"
+os.environ["LLM_CACHE_PATH"] = f"{_TMP}/llm_cache.sqlite3"
+
+
+@pytest.fixture(scope="session")
+def anyio_backend():
+    # un solo event loop: los engines async y sus conexiones viven entre tests
+    return "asyncio"
+
+
+@pytest.fixture(scope="session", autouse=True)
+def _schema():
+    # lo que hace el arranque de la app; los tests usan la BD sin lifespan
+    from app.database import prepare_database
+
+    prepare_database()
+
+
+@pytest.fixture(scope="session")
+def tmp_root() -> str:
+    return _TMP
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 1_000_000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def memory_store(monkeypatch):
+    """Store de contextos propio del test, con reloj manual (`store.clock.now`)."""
+    from app import chat_service
+    from app.context_store import MemoryContextStore
+
+    clock = _Clock()
+    store = MemoryContextStore(max_entries=100, ttl_seconds=60, clock=clock)
+    store.clock = clock
+    monkeypatch.setattr(chat_service, "store", store)
+    return store
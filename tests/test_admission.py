@@ -0,0 +1,33 @@
+import pytest
+
+from app.admission import AdmissionControl, Rejected
+
+
+def _admission(**overrides) -> AdmissionControl:
+    options = dict(
+        session_rate=2.0, session_burst=10,
+        ip_rate=0, ip_burst=0,
+        new_session_rate=0.001, new_session_burst=1,
+        max_inflight=10, max_keys=100,
+    )
+    options.update(overrides)
+    return AdmissionControl(**options)
+
+
+@pytest.mark.parametrize("session_rate", [2.0, 0])
+def test_known_session_is_not_charged_as_new(session_rate):
+    admission = _admission(session_rate=session_rate)
+    for _ in range(5):
+        admission.check("1.2.3.4", ["a"])
+
+    with pytest.raises(Rejected) as exc:
+        admission.check("1.2.3.4", ["b"])
+    assert exc.value.reason == "new_sessions"
+
+
+def test_batch_only_charges_new_sessions():
+    admission = _admission(new_session_burst=2)
+    admission.check(None, ["a", "b"])
+    admission.check(None, ["a", "b", "a"])
+
+    assert admission.stats()["tracked_sessions"] == 2
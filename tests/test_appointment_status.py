@@ -0,0 +1,44 @@
+import uuid
+from datetime import date, datetime, time
+
+import httpx
+import pytest
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Appointment
+from app.occupancy import occupancy
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2033, 6, 7)
+
+
+async def test_cancelling_one_of_two_bookings_keeps_the_slot_taken():
+    base = dict(phone="612345678", reason="revisión", date=DAY, half_day="mañana",
+                status="confirmed", created_at=datetime(2033, 1, 1))
+    first, second = uuid.uuid4(), uuid.uuid4()
+    with SessionLocal() as db:
+        db.execute(insert(Appointment), [
+            dict(base, id=first, name="Ana Núñez", time=time(10)),
+            dict(base, id=second, name="Luis Gil", time=time(10, 5)),   # misma franja de 15 min
+        ])
+        db.commit()
+    ordinal, minutes = DAY.toordinal(), 10 * 60
+    occupancy.mark(ordinal, minutes)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        async def set_status(appointment_id: uuid.UUID, status: str) -> None:
+            resp = await client.patch(f"/appointments/{appointment_id}/status", json={"status": status})
+            assert resp.status_code == 200, resp.text
+
+        await set_status(first, "cancelled")
+        assert occupancy.is_taken(ordinal, minutes)
+
+        await set_status(second, "cancelled")
+        assert not occupancy.is_taken(ordinal, minutes)
+
+        await set_status(first, "confirmed")
+        assert occupancy.is_taken(ordinal, minutes)
@@ -0,0 +1,30 @@
+import httpx
+import pytest
+
+from app.main import app
+from app.routers import availability as availability_router
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_cache_hit_does_not_open_a_session(monkeypatch):
+    opened = []
+    real = availability_router.ReadSessionLocal
+
+    def counting_session():
+        opened.append(1)
+        return real()
+
+    monkeypatch.setattr(availability_router, "ReadSessionLocal", counting_session)
+    params = {"from": "2034-01-01", "to": "2034-01-31"}
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        first = await client.get("/availability", params=params)
+        again = await client.get("/availability", params=params)
+        not_modified = await client.get("/availability", params=params,
+                                        headers={"If-None-Match": first.headers["ETag"]})
+
+    assert (first.status_code, again.status_code, not_modified.status_code) == (200, 200, 304)
+    assert again.content == first.content
+    assert len(opened) == 1
@@ -0,0 +1,53 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import chat_service
+from app.chat_service import handle_batch, handle_message, persist_appointments
+from app.context import ChatContext
+from app.database import SessionLocal
+from app.models import Appointment
+from app.occupancy import occupancy
+from app.repositories.appointments import appointment_row
+from app.state import ChatState
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_date_and_time_in_one_message_checks_stored_bookings(memory_store):
+    # otro worker reservó las 10:00 del 5/4: este aún no ha cargado el día
+    other = ChatContext()
+    other.name, other.phone, other.reason = "Luis", "612345678", "revisión"
+    other.date_iso, other.time_24h, other.half_day = "2027-04-05", "10:00", "mañana"
+    assert await persist_appointments([appointment_row(other, "other")]) == []
+
+    for text in ("hola", "Ana Pérez", "612345678", "revisión"):
+        await handle_message("same-day", text)
+    reply = await handle_message("same-day", "el 5/04/2027 a las 10")
+
+    assert reply.reprompt == "slot_taken"
+    assert memory_store.get("same-day").state is ChatState.ASK_TIME
+
+
+async def test_failing_session_in_a_batch_releases_the_other_marks(memory_store, monkeypatch):
+    for text in ("hola", "Eva Gil", "612345678", "limpieza", "el 12/04/2027 a las 11"):
+        await handle_message("batch-ok", text)
+    assert memory_store.get("batch-ok").state is ChatState.CONFIRMATION
+
+    real = chat_service.resolve_with_llm
+
+    async def resolve(ctx, text):
+        if text == "boom":
+            raise RuntimeError("fallo en otra sesión")
+        return await real(ctx, text)
+
+    monkeypatch.setattr(chat_service, "resolve_with_llm", resolve)
+    with pytest.raises(RuntimeError):
+        await handle_batch([("batch-ok", "sí"), ("batch-fail", "boom")])
+
+    day = date(2027, 4, 12)
+    assert not occupancy.is_taken(day.toordinal(), 11 * 60)
+    assert memory_store.get("batch-ok").state is ChatState.CONFIRMATION
+    with SessionLocal() as db:
+        assert db.scalars(select(Appointment).where(Appointment.date == day)).first() is None
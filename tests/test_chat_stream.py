@@ -0,0 +1,78 @@
+import httpx
+import pytest
+from fastapi.testclient import TestClient
+from starlette.requests import Request
+
+from app.admission import AdmissionControl
+from app.main import app
+from app.routers import chat as chat_router
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def strict_admission(monkeypatch) -> AdmissionControl:
+    """Dos mensajes por sesión sin recargar (la tasa es casi cero)."""
+    admission = AdmissionControl(
+        session_rate=0.001, session_burst=2,
+        ip_rate=0, ip_burst=0,
+        new_session_rate=0, new_session_burst=0,
+        max_inflight=10, max_keys=100,
+    )
+    monkeypatch.setattr(chat_router, "admission", admission)
+    return admission
+
+
+# =========================
+# WEBSOCKET
+# =========================
+def test_websocket_charges_one_token_per_message(memory_store, strict_admission):
+    with TestClient(app).websocket_connect("/chat/ws?sessionId=ws-1") as ws:
+        assert ws.receive_json() == {"type": "session", "sessionId": "ws-1"}
+        replies = []
+        for text in ("hola", "Ana Pérez", "612345678"):
+            ws.send_json({"message": text})
+            replies.append(ws.receive_json())
+
+    # conexión + 1er mensaje = un cobro; el 2º agota el cubo; el 3º se rechaza
+    assert [r["type"] for r in replies] == ["reply", "reply", "error"]
+    assert replies[2]["detail"] == "session"
+
+
+# =========================
+# SSE
+# =========================
+async def _get(path: str, **params) -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get(path, params=params)
+
+
+async def test_events_require_an_open_session(memory_store):
+    resp = await _get("/chat/events", sessionId="never-opened")
+
+    assert resp.status_code == 404
+    assert memory_store.size() == 0   # no la crea
+
+
+async def test_events_go_through_admission(memory_store, strict_admission):
+    memory_store.save("sse-1", memory_store.get("sse-1"))
+    for _ in range(2):
+        strict_admission.check(None, ["sse-1"])
+
+    resp = await _get("/chat/events", sessionId="sse-1")
+
+    assert resp.status_code == 429
+    assert resp.json() == {"detail": "session"}
+
+
+async def test_events_stream_for_an_open_session(memory_store, strict_admission):
+    memory_store.save("sse-2", memory_store.get("sse-2"))
+    request = Request({"type": "http", "method": "GET", "path": "/chat/events", "headers": [],
+                       "client": ("127.0.0.1", 1234)})
+
+    resp = await chat_router.chat_events("sse-2", request)
+    try:
+        assert await resp.body_iterator.__anext__() == ": conectado\n\n"
+    finally:
+        await resp.body_iterator.aclose()
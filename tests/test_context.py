@@ -0,0 +1,82 @@
+import struct
+
+import pytest
+
+from app.context import MAX_TEXT_BYTES, ChatContext
+from app.state import ChatState
+
+
+def _filled() -> ChatContext:
+    ctx = ChatContext()
+    ctx.state = ChatState.CONFIRMATION
+    ctx.half_day = "mañana"
+    ctx.name, ctx.phone, ctx.reason = "Begoña Ibáñez 😀", "612345678", "revisión — ortodoncia"
+    ctx.date_text, ctx.time_text = "el jueves", "a las 10"
+    ctx.date_iso, ctx.time_24h = "2027-04-08", "10:30"
+    return ctx
+
+
+def test_round_trip_keeps_every_field():
+    ctx = _filled()
+    back = ChatContext.from_bytes(ctx.to_bytes())
+
+    for field in ("state", "half_day", "name", "phone", "reason", "date_text", "time_text",
+                  "date_iso", "time_24h", "conversation"):
+        assert getattr(back, field) == getattr(ctx, field), field
+
+
+def test_round_trip_of_an_empty_context():
+    ctx = ChatContext()
+    back = ChatContext.from_bytes(ctx.to_bytes())
+
+    assert back.state is ChatState.START
+    assert (back.name, back.half_day, back.date_iso, back.time_24h) == (None, None, None, None)
+    assert back.reason is None and back.conversation == ctx.conversation
+
+
+def test_text_at_the_maximum_length_round_trips():
+    ctx = ChatContext()
+    ctx.reason = "a" * MAX_TEXT_BYTES
+
+    assert ChatContext.from_bytes(ctx.to_bytes()).reason == ctx.reason
+
+
+@pytest.mark.parametrize("char", ["ñ", "€", "😀"])   # 2, 3 y 4 bytes en UTF-8
+def test_long_text_is_cut_on_a_character_boundary(char):
+    ctx = ChatContext()
+    ctx.reason = "a" + char * MAX_TEXT_BYTES
+
+    reason = ChatContext.from_bytes(ctx.to_bytes()).reason
+
+    assert ctx.reason.startswith(reason)
+    assert MAX_TEXT_BYTES - len(char.encode()) < len(reason.encode()) <= MAX_TEXT_BYTES
+
+
+def test_other_format_versions_are_rejected():
+    data = bytearray(_filled().to_bytes())
+    data[0] = 2
+
+    with pytest.raises(ValueError):
+        ChatContext.from_bytes(bytes(data))
+    with pytest.raises(ValueError):
+        ChatContext.from_bytes(b"")
+
+
+def test_sql_store_treats_an_old_row_as_expired(tmp_root):
+    from sqlalchemy import update
+
+    from app.context_store import SQLContextStore
+
+    store = SQLContextStore(f"sqlite:///{tmp_root}/context_v2.db", ttl_seconds=60)
+    store.save("old", _filled())
+    with store._get_engine().begin() as conn:
+        # fila de la versión 2 del formato (sin id de conversación)
+        old = struct.pack("<BBBIHI", 2, 3, 1, 0, 0xFFFF, 0) + struct.pack("<H", 0xFFFF) * 5
+        conn.execute(update(store._table).values(data=old))
+
+    ctx = store.get("old")
+
+    assert ctx.state is ChatState.START and ctx.version == 1
+    assert store.expirations == 1
+    store.save("old", ctx)   # el CAS va contra la fila vieja
+    assert store.get("old").version == 2
@@ -0,0 +1,133 @@
+import pytest
+
+from app.context_store import MemoryContextStore, SQLContextStore, StaleContext
+from app.state import ChatState
+
+
+class _Clock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+# =========================
+# EN MEMORIA
+# =========================
+def _memory(max_entries: int = 3) -> tuple[MemoryContextStore, _Clock]:
+    clock = _Clock()
+    return MemoryContextStore(max_entries=max_entries, ttl_seconds=60, clock=clock), clock
+
+
+def test_memory_get_creates_and_then_hits():
+    store, _ = _memory()
+    ctx = store.get("s1")
+    ctx.state = ChatState.ASK_NAME
+
+    assert store.get("s1") is ctx
+    assert (store.hits, store.misses, store.size()) == (1, 1, 1)
+
+
+def test_memory_ttl_expires_and_reads_refresh_it():
+    store, clock = _memory()
+    store.get("s1")
+    clock.now += 50
+    store.get("s1")   # renueva el TTL
+    clock.now += 50
+    assert store.exists("s1")
+
+    clock.now += 61
+    assert not store.exists("s1")
+    assert store.get("s1").state is ChatState.START
+    assert store.expirations == 1
+
+
+def test_memory_evicts_the_least_recently_used():
+    store, _ = _memory(max_entries=2)
+    store.get("a")
+    store.get("b")
+    store.get("a")
+    store.get("c")
+
+    assert store.exists("a") and store.exists("c") and not store.exists("b")
+    assert store.evictions == 1 and store.size() == 2
+
+
+def test_exists_does_not_create_or_count():
+    store, _ = _memory()
+
+    assert not store.exists("ghost")
+    assert store.size() == 0 and (store.hits, store.misses) == (0, 0)
+
+
+def test_delete_and_stats():
+    store, _ = _memory()
+    store.save("s1", store.get("s1"))
+    store.delete("s1")
+
+    assert store.stats() == {"hits": 0, "misses": 1, "evictions": 0, "expirations": 0, "size": 0}
+
+
+# =========================
+# SQL
+# =========================
+@pytest.fixture
+def sql_store(tmp_root, request):
+    clock = _Clock()
+    store = SQLContextStore(f"sqlite:///{tmp_root}/store_{request.node.name}.db", ttl_seconds=60, clock=clock)
+    store.clock = clock
+    return store
+
+
+def test_sql_round_trip_bumps_the_version(sql_store):
+    ctx = sql_store.get("s1")
+    ctx.state, ctx.name = ChatState.ASK_PHONE, "Ana"
+    sql_store.save("s1", ctx)
+
+    back = sql_store.get("s1")
+    assert (back.state, back.name, back.version) == (ChatState.ASK_PHONE, "Ana", 1)
+    assert back.conversation == ctx.conversation
+    assert sql_store.exists("s1") and sql_store.size() == 1
+
+
+def test_sql_save_over_a_newer_version_is_stale(sql_store):
+    sql_store.save("s1", sql_store.get("s1"))
+    first, second = sql_store.get("s1"), sql_store.get("s1")
+    sql_store.save("s1", first)
+
+    with pytest.raises(StaleContext):
+        sql_store.save("s1", second)
+
+
+def test_sql_concurrent_create_is_stale(sql_store):
+    first, second = sql_store.get("s1"), sql_store.get("s1")
+    sql_store.save("s1", first)
+
+    with pytest.raises(StaleContext):
+        sql_store.save("s1", second)
+
+
+def test_sql_expired_session_starts_over_on_the_same_row(sql_store):
+    ctx = sql_store.get("s1")
+    ctx.name = "Ana"
+    sql_store.save("s1", ctx)
+    sql_store.clock.now += 61
+
+    assert not sql_store.exists("s1")
+    fresh = sql_store.get("s1")
+    assert fresh.name is None and fresh.version == 1 and sql_store.expirations == 1
+    sql_store.save("s1", fresh)
+    assert sql_store.get("s1").version == 2
+
+
+def test_sql_purge_removes_only_expired_rows(sql_store):
+    sql_store.save("old", sql_store.get("old"))
+    sql_store.clock.now += 30
+    sql_store.save("new", sql_store.get("new"))
+    sql_store.clock.now += 31
+
+    assert sql_store.purge_expired() == 1
+    assert sql_store.size() == 1 and sql_store.exists("new")
+    sql_store.delete("new")
+    assert sql_store.size() == 0
@@ -0,0 +1,68 @@
+import dataclasses
+import logging
+
+import pytest
+from sqlalchemy import text
+
+from app import database
+from app.database import _async_url, _pool_options, get_async_engine, get_engine, make_engine
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.mark.parametrize("url, expected", [
+    ("postgresql://u:p@db:5432/jotaai", "postgresql+psycopg://u:p@db:5432/jotaai"),
+    ("postgresql+psycopg2://u:p@db/jotaai", "postgresql+psycopg://u:p@db/jotaai"),
+    ("postgresql+psycopg://u:p@db/jotaai", "postgresql+psycopg://u:p@db/jotaai"),
+    ("sqlite:///tmp/app.db", "sqlite+aiosqlite:///tmp/app.db"),
+    ("sqlite+aiosqlite:///tmp/app.db", "sqlite+aiosqlite:///tmp/app.db"),
+])
+def test_async_url_keeps_the_server_and_swaps_the_driver(url, expected):
+    assert _async_url(url) == expected
+
+
+def test_pool_sizing_only_for_server_databases():
+    sqlite = _pool_options("sqlite:///app.db")
+    postgres = _pool_options("postgresql+psycopg://u:p@db/jotaai")
+
+    assert "pool_size" not in sqlite and "max_overflow" not in sqlite
+    assert postgres["pool_size"] == database.settings.db_pool_size
+    assert postgres["pool_recycle"] == database.settings.db_pool_recycle
+    assert sqlite["pool_pre_ping"] == postgres["pool_pre_ping"] == database.settings.db_pool_pre_ping
+
+
+def test_engine_getters_are_built_once():
+    assert get_engine() is get_engine()
+    assert get_async_engine() is get_async_engine()
+    assert str(get_engine().url) == database.DATABASE_URL
+    assert get_async_engine().url.drivername == "sqlite+aiosqlite"
+
+
+async def test_async_engine_reaches_the_same_database():
+    with get_engine().connect() as conn:
+        sync_tables = set(conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'table'")))
+    async with get_async_engine().connect() as conn:
+        async_tables = set((await conn.scalars(text("SELECT name FROM sqlite_master WHERE type = 'table'"))))
+
+    assert "appointments" in sync_tables and async_tables == sync_tables
+
+
+def test_slow_queries_are_logged_when_sampled(monkeypatch, tmp_root, caplog):
+    monkeypatch.setattr(database, "settings",
+                        dataclasses.replace(database.settings, slow_query_ms=0, slow_query_sample_rate=1.0))
+    engine = make_engine(f"sqlite:///{tmp_root}/slow.db")
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"), engine.connect() as conn:
+        conn.execute(text("SELECT 42"))
+
+    assert any("SELECT 42" in r.getMessage() for r in caplog.records)
+
+
+def test_no_slow_query_hooks_without_sampling(tmp_root, caplog):
+    # los tests corren con SLOW_QUERY_SAMPLE_RATE=0
+    engine = make_engine(f"sqlite:///{tmp_root}/unsampled.db")
+
+    with caplog.at_level(logging.WARNING, logger="app.sql"), engine.connect() as conn:
+        conn.execute(text("SELECT 42"))
+
+    assert not caplog.records
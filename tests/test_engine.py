@@ -0,0 +1,100 @@
+from app import replies
+from app.context import ChatContext
+from app.engine import step
+from app.state import ChatState
+
+
+def _at_ask_date() -> ChatContext:
+    ctx = ChatContext()
+    for text in ("hola", "Ana Pérez", "612345678", "revisión"):
+        step(ctx, text)
+    assert ctx.state is ChatState.ASK_DATE
+    return ctx
+
+
+def test_bare_hour_is_read_within_clinic_hours():
+    ctx = _at_ask_date()
+    step(ctx, "el 9/04/2027 a las 5")
+
+    assert ctx.state is ChatState.CONFIRMATION
+    assert (ctx.half_day, ctx.time_24h) == ("tarde", "17:00")
+
+
+def test_morning_hour_stays_in_the_morning():
+    ctx = _at_ask_date()
+    step(ctx, "el 9/04/2027 a las 10")
+
+    assert (ctx.half_day, ctx.time_24h) == ("mañana", "10:00")
+
+
+def test_out_of_hours_keeps_date_and_asks_again():
+    ctx = _at_ask_date()
+    reply = step(ctx, "el 9/04/2027 a las 23")
+
+    assert ctx.state is ChatState.ASK_HALF_DAY
+    assert ctx.date_iso == "2027-04-09" and ctx.time_24h is None
+    assert reply.text.endswith(replies.ASK_HALF_DAY) and "horario" in reply.text
+
+
+def test_out_of_hours_with_half_day_asks_for_the_time():
+    ctx = _at_ask_date()
+    reply = step(ctx, "el 9/04/2027 a las 5 de la mañana")
+
+    assert ctx.state is ChatState.ASK_TIME
+    assert ctx.half_day == "mañana" and ctx.time_24h is None
+    assert "horario" in reply.text
+
+
+def _at_ask_time(half_day: str) -> ChatContext:
+    ctx = _at_ask_date()
+    step(ctx, "el 9/04/2027")
+    step(ctx, half_day)
+    assert ctx.state is ChatState.ASK_TIME
+    return ctx
+
+
+def test_bare_hour_follows_the_chosen_half_day():
+    ctx = _at_ask_time("tarde")
+    step(ctx, "cinco")
+
+    assert ctx.state is ChatState.CONFIRMATION
+    assert ctx.time_24h == "17:00"
+
+
+def test_morning_hour_with_afternoon_chosen_is_questioned():
+    ctx = _at_ask_time("tarde")
+    reply = step(ctx, "10")
+
+    assert (reply.text, reply.reprompt) == (replies.TIME_LOOKS_MORNING, "wrong_half_day")
+
+
+def test_time_out_of_hours_is_asked_again():
+    ctx = _at_ask_time("tarde")
+    reply = step(ctx, "23:00")
+
+    assert ctx.state is ChatState.ASK_TIME and reply.reprompt == "out_of_hours"
+
+
+def test_time_edit_follows_the_half_day():
+    ctx = _at_ask_time("tarde")
+    for text in ("17:00", "no", "hora"):
+        step(ctx, text)
+    assert ctx.state is ChatState.ASK_TIME_EDIT
+
+    step(ctx, "a las seis")
+
+    assert ctx.state is ChatState.CONFIRMATION
+    assert ctx.time_24h == "18:00"
+
+
+def test_short_change_option_needs_an_exact_match():
+    ctx = _at_ask_time("tarde")
+    for text in ("17:00", "no"):
+        step(ctx, text)
+    assert ctx.state is ChatState.CHANGE_WHAT
+
+    reply = step(ctx, "hola")
+    assert reply.reprompt == "invalid_option" and ctx.state is ChatState.CHANGE_WHAT
+
+    step(ctx, "motvo")   # las palabras de 5 letras o más sí admiten una errata
+    assert ctx.state is ChatState.ASK_REASON_EDIT
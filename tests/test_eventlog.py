@@ -0,0 +1,48 @@
+import json
+
+from app.eventlog import main, replay
+
+
+def _event(sid: str, state_from: str, state_to: str, text: str, value: str | None = None) -> dict:
+    return {
+        "ts": 0.0, "session_id": sid, "state_from": state_from, "state_to": state_to, "text": text,
+        "value": value, "llm": False, "reprompt": None, "confirmed": state_to == "CONFIRMED", "latency_ms": 1.0,
+    }
+
+
+def test_session_from_earlier_segment_is_skipped_until_it_restarts():
+    events = [
+        # empezó en un segmento anterior: sin nombre, fecha ni hora
+        _event("old", "CONFIRMATION", "CONFIRMED", "sí"),
+        _event("old", "CONFIRMED", "START", "gracias"),
+        _event("old", "START", "ASK_NAME", "hola"),
+    ]
+    steps = list(replay(events))
+
+    assert [s.skipped for s in steps] == ["sin historial", None, None]
+    assert all(s.matches for s in steps[1:])
+
+
+def test_forced_state_without_data_is_reported_not_raised():
+    events = [
+        _event("s", "START", "ASK_NAME", "hola"),
+        # el registro sigue en otro estado (turnos perdidos con el anillo lleno)
+        _event("s", "CONFIRMATION", "CONFIRMED", "sí"),
+        _event("s", "CONFIRMATION", "CONFIRMED", "sí"),
+    ]
+    steps = list(replay(events))
+
+    assert steps[0].skipped is None
+    assert steps[1].skipped and steps[1].skipped.startswith("TypeError")
+    assert steps[2].skipped == "sin historial"
+
+
+def test_cli_counts_skipped_turns_apart(tmp_path, capsys):
+    segment = tmp_path / "events-1.ndjson"
+    segment.write_text("".join(json.dumps(e) + "\n" for e in (
+        _event("old", "CONFIRMATION", "CONFIRMED", "sí"),
+        _event("new", "START", "ASK_NAME", "hola"),
+    )))
+
+    assert main(["replay", str(segment)]) == 0
+    assert "0 diferencias, 1 omitidos" in capsys.readouterr().out
@@ -0,0 +1,133 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import select
+
+from app import chat_service, replies
+from app.chat_service import handle_message, persist_appointments
+from app.context_store import SQLContextStore
+from app.database import SessionLocal
+from app.models import Appointment, DailyAvailability
+from app.occupancy import occupancy
+from app.repositories.appointments import appointment_row
+from app.state import ChatState
+
+pytestmark = pytest.mark.anyio
+
+
+async def _to_confirmation(sid: str, day: str, hour: str) -> None:
+    for text in ("hola", "Ana Pérez", "612345678", "revisión", day, "mañana", hour):
+        await handle_message(sid, text)
+
+
+def _rows(sid: str) -> list:
+    with SessionLocal() as db:
+        return list(db.execute(
+            select(Appointment.date, Appointment.time, Appointment.idempotency_key)
+            .where(Appointment.idempotency_key.startswith(f"{sid}:"))
+            .order_by(Appointment.time)
+        ))
+
+
+def _booked(day: date, half_day: str) -> int:
+    with SessionLocal() as db:
+        return db.get(DailyAvailability, (day, half_day)).booked
+
+
+# =========================
+# "SÍ" REPETIDO
+# =========================
+async def test_duplicate_yes_books_once(memory_store):
+    await _to_confirmation("dup", "15/03/2027", "10:00")
+
+    first = await handle_message("dup", "sí")
+    second = await handle_message("dup", "sí")
+
+    assert first.confirmed and first.text == replies.CONFIRMED
+    assert not second.confirmed   # la conversación terminó: "sí" empieza otra
+    assert len(_rows("dup")) == 1
+    assert _booked(date(2027, 3, 15), "mañana") == 1
+
+
+async def test_same_confirmation_persisted_twice_is_one_row(memory_store):
+    await _to_confirmation("twice", "16/03/2027", "10:00")
+    ctx = memory_store.get("twice")
+
+    # reintento de la pasarela con la misma conversación: misma clave, mismo hueco
+    assert await persist_appointments([appointment_row(ctx, "twice")]) == []
+    assert await persist_appointments([appointment_row(ctx, "twice"), appointment_row(ctx, "twice")]) == []
+    assert len(_rows("twice")) == 1
+    assert _booked(date(2027, 3, 16), "mañana") == 1
+
+
+async def test_key_of_another_booking_is_not_reported_as_saved(memory_store):
+    await _to_confirmation("stolen", "17/03/2027", "10:00")
+    assert (await handle_message("stolen", "sí")).confirmed
+    used = _rows("stolen")[0].idempotency_key
+
+    await handle_message("stolen", "hola")   # nueva conversación en la sesión
+    await _to_confirmation("stolen", "17/03/2027", "11:00")
+    ctx = memory_store.get("stolen")
+    ctx.conversation = bytes.fromhex(used.partition(":")[2])
+
+    reply = await handle_message("stolen", "sí")
+
+    assert not reply.confirmed and reply.text == replies.SAVE_FAILED
+    assert ctx.state is ChatState.CONFIRMATION
+    assert ctx.conversation.hex() != used.partition(":")[2]
+    assert not occupancy.is_taken(date(2027, 3, 17).toordinal(), 11 * 60)
+
+    # el siguiente "sí" va con una clave nueva y sí se guarda
+    assert (await handle_message("stolen", "sí")).confirmed
+    assert [r.time.hour for r in _rows("stolen")] == [10, 11]
+
+
+# =========================
+# SESIÓN CADUCADA
+# =========================
+async def test_expired_session_reused_books_again(memory_store):
+    await _to_confirmation("reused", "18/03/2027", "10:00")
+    assert (await handle_message("reused", "sí")).confirmed
+
+    memory_store.clock.now += 3600   # el contexto caduca; el sessionId se reutiliza
+    await _to_confirmation("reused", "18/03/2027", "11:00")
+    reply = await handle_message("reused", "sí")
+
+    assert memory_store.expirations == 1
+    assert reply.confirmed and reply.text == replies.CONFIRMED
+    rows = _rows("reused")
+    assert [r.time.hour for r in rows] == [10, 11]
+    assert rows[0].idempotency_key != rows[1].idempotency_key
+    assert _booked(date(2027, 3, 18), "mañana") == 2
+
+
+# =========================
+# REINTENTO POR COMPARE-AND-SWAP
+# =========================
+class _RacingStore(SQLContextStore):
+    """Otro worker guarda la sesión justo antes de guardar la confirmación."""
+
+    races = 1
+
+    def save(self, session_id, ctx):
+        if self.races and ctx.state is ChatState.CONFIRMED:
+            self.races -= 1
+            super().save(session_id, self.get(session_id))
+        super().save(session_id, ctx)
+
+
+async def test_cas_retry_after_insert_keeps_one_booking(monkeypatch, tmp_root):
+    store = _RacingStore(f"sqlite:///{tmp_root}/sessions.db", ttl_seconds=60)
+    monkeypatch.setattr(chat_service, "store", store)
+    await _to_confirmation("cas", "19/03/2027", "10:00")
+
+    reply = await handle_message("cas", "sí")
+
+    assert store.races == 0
+    # el primer intento insertó la cita; el reintento es la misma cita y se confirma
+    assert reply.confirmed and reply.text == replies.CONFIRMED
+    assert store.get("cas").state is ChatState.CONFIRMED
+    assert len(_rows("cas")) == 1
+    assert _booked(date(2027, 3, 19), "mañana") == 1
+    assert occupancy.is_taken(date(2027, 3, 19).toordinal(), 10 * 60)
+
@@ -0,0 +1,98 @@
+import io
+import uuid
+from datetime import date, datetime, time
+
+from sqlalchemy import delete, insert, select
+
+from app.database import SessionLocal
+from app.exporter import iter_export
+from app.importer import import_stream
+from app.models import Appointment, DailyAvailability
+from app.repositories.appointments import EXPORT_COLUMNS
+
+DAY = date(2032, 2, 3)
+
+
+def _seed() -> list[dict]:
+    base = dict(phone="612345678", date=DAY, status="confirmed")
+    rows = [
+        dict(base, id=uuid.uuid4(), name="Ana Núñez", reason="revisión", time=time(10, 30),
+             half_day="mañana", created_at=datetime(2032, 1, 1, 9, 0, 0, 120000)),
+        dict(base, id=uuid.uuid4(), name='Luis "Lucho"', reason="dolor, de muelas", time=time(17),
+             half_day="tarde", created_at=datetime(2032, 1, 1, 9, 5)),
+    ]
+    with SessionLocal() as db:
+        db.execute(insert(Appointment), rows)
+        db.commit()
+    return rows
+
+
+def _stored(day: date) -> list[tuple]:
+    with SessionLocal() as db:
+        cols = [getattr(Appointment, c) for c in EXPORT_COLUMNS]
+        return [tuple(r) for r in db.execute(select(*cols).where(Appointment.date == day).order_by(Appointment.time))]
+
+
+def _export(fmt: str, day: date) -> io.StringIO:
+    return io.StringIO(b"".join(iter_export(fmt, day, day)).decode())
+
+
+def _wipe(day: date) -> None:
+    with SessionLocal() as db:
+        db.execute(delete(Appointment).where(Appointment.date == day))
+        db.execute(delete(DailyAvailability).where(DailyAvailability.date == day))
+        db.commit()
+
+
+# =========================
+# IDA Y VUELTA
+# =========================
+def test_export_then_import_restores_the_same_rows():
+    _seed()
+    before = _stored(DAY)
+
+    for fmt in ("csv", "ndjson"):
+        dump = _export(fmt, DAY)
+        _wipe(DAY)
+
+        result = import_stream(dump, fmt)
+
+        assert (result.imported, result.skipped, result.rejected) == (2, 0, 0), fmt
+        assert _stored(DAY) == before, fmt
+        with SessionLocal() as db:
+            assert db.get(DailyAvailability, (DAY, "mañana")).booked == 1
+
+
+def test_reimporting_an_export_inserts_nothing():
+    day = date(2032, 2, 4)
+    with SessionLocal() as db:
+        db.execute(insert(Appointment), [dict(
+            id=uuid.uuid4(), name="Eva Ruiz", phone="612345678", reason="limpieza", date=day,
+            time=time(9), half_day="mañana", status="confirmed", created_at=datetime(2032, 1, 2),
+        )])
+        db.commit()
+
+    result = import_stream(_export("csv", day), "csv")
+
+    assert (result.imported, result.skipped) == (0, 1)
+    assert len(_stored(day)) == 1
+
+
+def test_reimporting_a_file_without_ids_inserts_nothing():
+    day = date(2032, 2, 5)
+    text = (
+        "name,phone,reason,date,time\n"
+        "Marta Gil,612345678,revisión anual,2032-02-05,11:15\n"
+        "Pablo Sanz,612345679,dolor de muelas,5/2/2032,16:00\n"
+    )
+
+    first = import_stream(io.StringIO(text), "csv")
+    second = import_stream(io.StringIO(text), "csv")
+
+    assert (first.imported, first.rejected) == (2, 0)
+    assert (second.imported, second.skipped) == (0, 2)
+    rows = _stored(day)
+    assert [r[5] for r in rows] == [time(11, 15), time(16)]
+    with SessionLocal() as db:
+        keys = set(db.scalars(select(Appointment.idempotency_key).where(Appointment.date == day)))
+    assert keys == {f"import:{r[0]}" for r in rows}
@@ -0,0 +1,122 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from app.llm.cache import ResponseCache
+from app.llm.client import GeminiClient, LLMError
+from app.llm.fake_server import serve
+from app.llm.fallback import CircuitBreaker, LLMFallback
+
+pytestmark = pytest.mark.anyio
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def fake_gemini():
+    """Arranca Gemini falso (app.llm.fake_server) con la latencia y tasa de error pedidas."""
+    servers = []
+
+    def start(delay_ms: int = 0, fail_rate: float = 0.0) -> str:
+        server = serve(0, delay_ms, fail_rate)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+        return f"http://127.0.0.1:{server.server_address[1]}"
+
+    yield start
+    for server in servers:
+        server.shutdown()
+        server.server_close()
+
+
+def _fallback(base_url: str, cache_path, *, timeout: float = 2.0, failures: int = 3, clock=None,
+              socket_timeout: float | None = None) -> LLMFallback:
+    return LLMFallback(
+        GeminiClient("fake", "gemini-test", base_url, socket_timeout or timeout),
+        ResponseCache(str(cache_path)),
+        max_concurrency=2,
+        timeout=timeout,
+        breaker=CircuitBreaker(failures, reset_seconds=30, clock=clock or _Clock()),
+    )
+
+
+async def test_answers_are_cached_across_instances(fake_gemini, tmp_path):
+    url = fake_gemini()
+    fallback = _fallback(url, tmp_path / "cache.sqlite3")
+
+    assert await fallback.resolve_time("a las cinco y media de la tarde") == "17:30"
+    assert await fallback.resolve_time("A las  cinco y media de la tarde") == "17:30"
+    assert fallback.stats()["calls"] == 1
+    assert fallback.stats()["cache_hits"] == 1
+
+    # la cache es persistente: otro proceso no vuelve a llamar
+    again = _fallback(url, tmp_path / "cache.sqlite3")
+    assert await again.resolve_time("a las cinco y media de la tarde") == "17:30"
+    assert again.stats()["calls"] == 0
+
+
+async def test_none_answer_is_cached(fake_gemini, tmp_path):
+    fallback = _fallback(fake_gemini(), tmp_path / "cache.sqlite3")
+
+    assert await fallback.resolve_time("cuando mejor os venga") is None
+    assert await fallback.resolve_time("cuando mejor os venga") is None
+    assert fallback.stats()["calls"] == 1
+
+
+async def test_slow_model_times_out(fake_gemini, tmp_path):
+    fallback = _fallback(fake_gemini(delay_ms=300), tmp_path / "cache.sqlite3", timeout=0.05)
+
+    assert await fallback.resolve_time("a las cinco") is None
+    stats = fallback.stats()
+    assert (stats["calls"], stats["failures"]) == (1, 1)
+
+
+async def test_timed_out_call_keeps_its_slot_until_the_thread_ends(fake_gemini, tmp_path):
+    fallback = _fallback(fake_gemini(delay_ms=300), tmp_path / "cache.sqlite3", timeout=0.05, socket_timeout=2.0)
+
+    assert await fallback.resolve_time("a las cinco") is None
+    assert fallback._semaphore._value == 1   # el hilo sigue esperando al servidor
+
+    for _ in range(100):
+        if fallback._semaphore._value == 2:
+            break
+        await asyncio.sleep(0.01)
+    assert fallback._semaphore._value == 2
+
+
+def test_client_socket_timeout_and_key_header(fake_gemini):
+    client = GeminiClient("fake", "gemini-test", fake_gemini(delay_ms=300), timeout=0.05)
+    assert "key=" not in client._url()
+
+    started = time.perf_counter()
+    with pytest.raises(LLMError):
+        client._post("a las cinco")
+    assert time.perf_counter() - started < 0.3
+
+    # la clave va en la cabecera: sin ella el servidor falso responde 401
+    assert GeminiClient("fake", "gemini-test", fake_gemini(), timeout=2.0)._post('"a las cinco"') == "05:00"
+
+
+async def test_breaker_opens_after_failures_and_half_opens(fake_gemini, tmp_path):
+    clock = _Clock()
+    fallback = _fallback(fake_gemini(fail_rate=1.0), tmp_path / "cache.sqlite3", failures=2, clock=clock)
+
+    for text in ("a las una", "a las dos", "a las tres"):
+        assert await fallback.resolve_time(text) is None
+    stats = fallback.stats()
+    assert (stats["calls"], stats["failures"], stats["skipped"]) == (2, 2, 1)
+    assert stats["breaker_open"]
+
+    # pasado el reset deja pasar una llamada de prueba; si falla, se vuelve a abrir
+    clock.now += 30
+    assert await fallback.resolve_time("a las cuatro") is None
+    assert fallback.stats()["calls"] == 3
+    assert fallback.stats()["breaker_open"]
@@ -0,0 +1,76 @@
+import httpx
+import pytest
+
+from app import metrics
+from app.chat_service import handle_message
+from app.main import app
+
+pytestmark = pytest.mark.anyio
+
+
+async def _scrape() -> httpx.Response:
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        return await client.get("/metrics")
+
+
+def _value(body: str, sample: str) -> float:
+    for line in body.splitlines():
+        if line.startswith(sample + " "):
+            return float(line.rsplit(" ", 1)[1])
+    raise AssertionError(f"{sample} no está en /metrics")
+
+
+async def test_metrics_endpoint_speaks_prometheus_text():
+    response = await _scrape()
+
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain; version=0.0.4")
+    body = response.text
+    assert "# TYPE chat_turn_seconds histogram" in body
+    assert "# TYPE chat_sessions_live gauge" in body   # store en memoria en los tests
+    assert "# TYPE llm_fallback_calls_total counter" in body
+    assert body.endswith("\n")
+
+
+async def test_a_chat_turn_shows_up_in_the_scrape(memory_store):
+    before = await _scrape()
+    start = 'chat_turn_seconds_count{state="START"}'
+    turns = _value(before.text, start) if start in before.text else 0
+
+    await handle_message("metrics-1", "hola")
+    body = (await _scrape()).text
+
+    assert _value(body, start) == turns + 1
+    assert 'chat_transitions_total{from_state="START",to_state="ASK_NAME"}' in body
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = metrics.Histogram("test_seconds", "solo para el test", ("kind",), buckets=(0.1, 1.0))
+    try:
+        for value in (0.05, 0.5, 0.5, 5.0):
+            histogram.observe(value, "a")
+
+        assert histogram.samples() == [
+            'test_seconds_bucket{kind="a",le="0.1"} 1',
+            'test_seconds_bucket{kind="a",le="1.0"} 3',
+            'test_seconds_bucket{kind="a",le="+Inf"} 4',
+            'test_seconds_sum{kind="a"} 6.05',
+            'test_seconds_count{kind="a"} 4',
+        ]
+    finally:
+        metrics._REGISTRY.remove(histogram)
+
+
+def test_labels_are_escaped_and_failing_gauges_are_skipped():
+    counter = metrics.Counter("test_total", "solo para el test", ("text",))
+    broken = metrics.GaugeFunc("test_broken", "solo para el test", lambda: 1 / 0)
+    try:
+        counter.inc('di "hola"\n')
+
+        assert counter.samples() == ['test_total{text="di \\"hola\\"\\n"} 1']
+        assert broken.samples() == []
+        assert "# TYPE test_broken gauge" in metrics.render()
+    finally:
+        metrics._REGISTRY.remove(counter)
+        metrics._REGISTRY.remove(broken)
@@ -0,0 +1,54 @@
+from app.occupancy import OccupancyIndex
+
+DAY = 740_000
+
+
+def test_load_replaces_released_slots():
+    index = OccupancyIndex()
+    index.load(DAY, [600, 615])
+    # otro worker cancela la cita de las 10:00: la recarga la deja libre
+    index.load(DAY, [615])
+
+    assert not index.is_taken(DAY, 600)
+    assert index.is_taken(DAY, 615)
+
+
+def test_marks_during_load_survive():
+    index = OccupancyIndex()
+    index.begin_load(DAY)
+    index.mark(DAY, 660)          # confirmada mientras se consultaba la BD
+    index.load(DAY, [600])        # la consulta no la ve
+
+    assert index.is_taken(DAY, 600)
+    assert index.is_taken(DAY, 660)
+
+
+def test_releases_during_load_win():
+    index = OccupancyIndex()
+    index.load(DAY, [600])
+    index.begin_load(DAY)
+    index.release(DAY, 600)       # cancelada mientras se consultaba la BD
+    index.load(DAY, [600])        # la consulta aún la ve
+
+    assert not index.is_taken(DAY, 600)
+
+
+def test_changes_after_load_are_not_replayed():
+    index = OccupancyIndex()
+    index.begin_load(DAY)
+    index.mark(DAY, 660)
+    index.load(DAY, [660])
+    index.release(DAY, 660)
+    index.load(DAY, [])           # carga sin begin_load: solo la BD
+
+    assert not index.is_taken(DAY, 660)
+
+
+def test_cancelled_load_stops_tracking():
+    index = OccupancyIndex()
+    index.begin_load(DAY)
+    index.cancel_load(DAY)
+    index.mark(DAY, 660)
+    index.load(DAY, [])
+
+    assert not index.is_taken(DAY, 660)
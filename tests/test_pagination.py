@@ -0,0 +1,59 @@
+from datetime import date
+
+import pytest
+from sqlalchemy import text
+
+from app.database import get_engine, make_engine
+from app.models import Appointment
+from app.repositories.appointments import PAGE_COLUMNS, _page_statement
+from app.schema import MIGRATIONS, migrate
+
+
+def _plan(**filters) -> str:
+    args = dict(limit=50, cursor=None, date_from=None, date_to=None, status=None, half_day=None)
+    args.update(filters)
+    stmt = _page_statement([getattr(Appointment, c) for c in PAGE_COLUMNS], **args)
+    engine = get_engine()
+    sql = str(stmt.compile(engine, compile_kwargs={"literal_binds": True}))
+    with engine.connect() as conn:
+        return " / ".join(r[-1] for r in conn.execute(text("EXPLAIN QUERY PLAN " + sql)))
+
+
+# =========================
+# PÁGINAS ACOTADAS
+# =========================
+@pytest.mark.parametrize("filters, index", [
+    ({}, "ix_appointments_created_at_id_date"),
+    ({"status": "confirmed"}, "ix_appointments_status_created_at_id"),
+    ({"half_day": "tarde"}, "ix_appointments_half_day_created_at_id"),
+    ({"date_from": date(2027, 1, 5), "date_to": date(2027, 1, 5)}, "ix_appointments_date_created_at_id"),
+])
+def test_equality_filters_read_the_page_in_index_order(filters, index):
+    plan = _plan(**filters)
+    assert index in plan
+    assert "TEMP B-TREE" not in plan   # sin ordenar: se para al llenar la página
+
+
+def test_date_range_is_read_through_an_index():
+    plan = _plan(date_from=date(2027, 1, 1), date_to=date(2027, 2, 1))
+    # el planificador elige: recorrer por created_at o leer el rango y ordenarlo
+    assert "USING INDEX ix_appointments_" in plan
+
+
+# =========================
+# MIGRACIÓN
+# =========================
+def test_v5_replaces_the_created_at_index(tmp_root):
+    engine = make_engine(f"sqlite:///{tmp_root}/v4.db")
+    migrate(engine, MIGRATIONS[:4])
+    assert "ix_appointments_created_at_id" in _indexes(engine)
+
+    assert migrate(engine) == 5
+    names = _indexes(engine)
+    assert "ix_appointments_created_at_id" not in names
+    assert {"ix_appointments_created_at_id_date", "ix_appointments_half_day_created_at_id"} <= names
+
+
+def _indexes(engine) -> set[str]:
+    with engine.connect() as conn:
+        return {r[1] for r in conn.execute(text("PRAGMA index_list(appointments)"))}
@@ -0,0 +1,56 @@
+from datetime import date
+
+import pytest
+
+from app.normalizers.parser import _PLAIN, Parsed, _scan_tokens, parse, scan
+
+TODAY = date(2026, 3, 10)   # martes
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("20 de abirl", Parsed("2026-04-20")),
+    ("20 febreo de 2027", Parsed("2027-02-20")),
+    ("20 de febreo", Parsed()),   # ya pasó: con errata no se salta al año siguiente
+    ("20 febreo", Parsed()),
+    ("el vierns", Parsed("2026-03-13")),
+    ("vierns 20", Parsed("2026-03-20")),
+    ("mñana", Parsed("2026-03-11")),
+    ("pasado mñana", Parsed("2026-03-12")),
+    ("quiero cita el vierns a las 10", Parsed("2026-03-13", "10:00")),
+])
+def test_typos_where_a_date_is_expected(text, expected):
+    assert parse(text, TODAY) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("por las mañanas", Parsed(half_day="mañana")),
+    ("mejor por las tardes", Parsed(half_day="tarde")),
+    ("cuando pueda", Parsed()),
+    ("la semana que viene", Parsed()),
+    ("de lunes a viernes", Parsed()),   # dos días: no se adivina
+])
+def test_other_words_are_not_read_as_dates(text, expected):
+    assert parse(text, TODAY) == expected
+
+
+@pytest.mark.parametrize("text, expected", [
+    ("a las 12 de la noche", Parsed(time="00:00")),
+    ("a las 11 de la noche", Parsed(time="23:00")),
+    ("a las 12 del mediodía", Parsed(time="12:00")),
+    ("cinco", Parsed(time="05:00")),   # la franja la pone el motor (test_engine.py)
+])
+def test_night_and_bare_hours(text, expected):
+    assert parse(text, TODAY) == expected
+
+
+def test_plain_table_matches_the_grammar():
+    for text, value in _PLAIN.items():
+        assert value == _scan_tokens(text), text
+
+
+@pytest.mark.parametrize("text", [
+    "20/03/2026", "31/02/2027", "3 de marzo", "3 De Marzo", "15 setiembre", "20 de enero de 2027",
+    "31 de febrero", "20 de febreo", "9/4", "09:30", "a las 10",
+])
+def test_fast_paths_match_the_grammar(text):
+    assert scan(text) == _scan_tokens(text.lower())
@@ -0,0 +1,46 @@
+import uuid
+from datetime import date, datetime, time
+
+import httpx
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy import insert
+
+from app.database import SessionLocal
+from app.main import app
+from app.models import Appointment
+from app.schemas.appointment import AppointmentPage, AppointmentResponse
+
+pytestmark = pytest.mark.anyio
+
+DAY = date(2031, 5, 5)
+
+
+def _rows() -> list[dict]:
+    base = dict(phone="612345678", date=DAY, half_day="mañana", status="confirmed")
+    return [
+        # segundos exactos, microsegundos con ceros a la derecha y texto que hay que escapar
+        dict(base, id=uuid.uuid4(), name="Ana Núñez", reason="revisión",
+             time=time(10), created_at=datetime(2031, 1, 1, 9, 0, 0)),
+        dict(base, id=uuid.uuid4(), name='Luis "Lucho"', reason="dolor\nde muelas",
+             time=time(10, 30), created_at=datetime(2031, 1, 1, 9, 0, 1, 120000)),
+        dict(base, id=uuid.uuid4(), name="Eva", reason="limpieza \\ 🦷",
+             time=time(11, 15, 5), created_at=datetime(2031, 1, 1, 9, 0, 2, 7)),
+    ]
+
+
+async def test_appointment_page_matches_pydantic_encoding():
+    rows = _rows()
+    with SessionLocal() as db:
+        db.execute(insert(Appointment), rows)
+        db.commit()
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+        resp = await client.get("/appointments/", params={"date_from": DAY, "date_to": DAY})
+
+    newest_first = sorted(rows, key=lambda r: r["created_at"], reverse=True)
+    page = AppointmentPage(items=[AppointmentResponse(**r) for r in newest_first])
+    assert resp.status_code == 200
+    assert resp.content == JSONResponse(jsonable_encoder(page)).body
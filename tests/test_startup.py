@@ -0,0 +1,56 @@
+import os
+import subprocess
+import sys
+
+from app.context_store import SQLContextStore
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+# =========================
+# IMPORT DE LA APP
+# =========================
+def test_importing_the_app_does_not_load_the_orm():
+    # proceso nuevo: en este ya lo han importado otros tests
+    probe = (
+        "import sys, app.main\n"
+        "print(sorted(m for m in sys.modules if m.split('.')[0] == 'sqlalchemy'"
+        " or m in ('app.models', 'app.repositories.appointments', 'app.schema')))"
+    )
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.strip() == "[]"
+
+
+def test_schema_is_checked_at_startup_not_in_the_engine_getters(tmp_root):
+    probe = (
+        "import asyncio, sys\n"
+        "from app.database import get_async_engine, get_engine\n"
+        "get_engine(), get_async_engine()\n"
+        "print('app.schema' in sys.modules)\n"
+        "from app.main import app\n"
+        "async def run():\n"
+        "    async with app.router.lifespan_context(app):\n"
+        "        print('app.schema' in sys.modules)\n"
+        "asyncio.run(run())\n"
+    )
+    env = dict(os.environ, DATABASE_URL=f"sqlite:///{tmp_root}/startup_schema.db")
+    out = subprocess.run([sys.executable, "-c", probe], cwd=ROOT, env=env, check=True,
+                         capture_output=True, text=True).stdout
+    assert out.split() == ["False", "True"]
+
+
+# =========================
+# STORE SQL
+# =========================
+def test_sql_store_connects_on_first_use(tmp_root):
+    path = f"{tmp_root}/lazy_sessions.db"
+    store = SQLContextStore(f"sqlite:///{path}", ttl_seconds=60)
+    assert not os.path.exists(path)
+
+    ctx = store.get("s1")
+    store.save("s1", ctx)
+
+    assert os.path.exists(path)
+    assert store.get("s1").version == 1
+    assert store.size() == 1
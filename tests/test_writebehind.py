@@ -0,0 +1,83 @@
+import asyncio
+
+import pytest
+from sqlalchemy import func, select
+
+from app.context import ChatContext
+from app.database import AsyncSessionLocal, SessionLocal
+from app.models import Appointment
+from app.repositories.appointments import appointment_row
+from app.writebehind import AppointmentWriter
+
+pytestmark = pytest.mark.anyio
+
+
+def _row(sid: str, hhmm: str) -> dict:
+    ctx = ChatContext()
+    ctx.name, ctx.phone, ctx.reason = "Ana Pérez", "612345678", "revisión"
+    ctx.date_iso, ctx.time_24h, ctx.half_day = "2027-05-03", hhmm, "mañana"
+    return appointment_row(ctx, sid)
+
+
+class _FlakyDatabase:
+    """Falla las primeras `failures` sesiones; luego abre sesiones reales."""
+
+    def __init__(self, failures: int):
+        self.failures = failures
+
+    def __call__(self):
+        if self.failures:
+            self.failures -= 1
+            raise ConnectionError("BD caída")
+        return AsyncSessionLocal()
+
+
+async def _until(condition) -> None:
+    for _ in range(200):
+        if condition():
+            return
+        await asyncio.sleep(0.01)
+    raise AssertionError("timeout")
+
+
+async def test_spill_failure_keeps_writer_alive_and_rows_pending(tmp_path):
+    writer = AppointmentWriter(
+        _FlakyDatabase(failures=1),
+        max_queue=10, batch_size=1, flush_interval=0.01,
+        spill_path=str(tmp_path / "no-such-dir" / "spill.ndjson"),   # tampoco hay disco
+    )
+    await writer.start()
+    first, second = _row("wb-a", "10:00"), _row("wb-b", "10:15")
+
+    await writer.submit(first)
+    await _until(lambda: writer.failed_spills == 1)
+    assert writer.running
+    assert writer.stats()["unsaved_rows"] == 1
+
+    # el siguiente lote lleva también la cita pendiente
+    await writer.submit(second)
+    await _until(lambda: writer.flushed_rows == 2)
+    await writer.stop()
+
+    keys = [first["idempotency_key"], second["idempotency_key"]]
+    with SessionLocal() as db:
+        stored = db.execute(
+            select(func.count()).select_from(Appointment).where(Appointment.idempotency_key.in_(keys))
+        ).scalar_one()
+    assert stored == 2
+    assert writer.stats()["unsaved_rows"] == 0
+
+
+async def test_unsaved_rows_are_logged_on_stop(tmp_path, caplog):
+    writer = AppointmentWriter(
+        _FlakyDatabase(failures=10),
+        max_queue=10, batch_size=1, flush_interval=0.01,
+        spill_path=str(tmp_path / "no-such-dir" / "spill.ndjson"),
+    )
+    await writer.start()
+    row = _row("wb-lost", "11:00")
+    await writer.submit(row)
+    await _until(lambda: writer.failed_spills == 1)
+    await writer.stop()
+
+    assert row["idempotency_key"] in caplog.text